@@ -9,11 +9,17 @@ Layer 2 – Tactical (rule-based, no LLM):
 Layer 3 – Execution (every brain cycle):
     Standard LLM call with dynamic context (market only at exchange,
     social only when nearby characters exist, goal/plan injected).
+
+Prompts are built from a frozen WorldView (engine/world_view.py) plus a
+snapshot of the NPC itself, never from live state, so building can run in a
+worker thread (PROMPT_BUILD_IN_THREAD) while the world keeps ticking.
 """
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
+from dataclasses import dataclass
 from typing import Optional
 
 import config
@@ -26,7 +32,11 @@ from agents.prompts import (
     build_strategy_context,
     build_strategy_system_prompt,
 )
+from agents.observation import ObservationFrame
+from engine.inbox import NORMAL
 from engine.world import NPC, World
+from engine.world_manager import check_npc_action
+from engine.world_view import WorldView, freeze_npc
 from game.token_tracker import TokenTracker
 
 logger = logging.getLogger(__name__)
@@ -38,11 +48,58 @@ _FALLBACK_ACTIONS = [
 ]
 
 
+def _strategy_prompts(npc: NPC, view: WorldView, frame) -> tuple[str, str]:
+    return build_strategy_system_prompt(npc, view), build_strategy_context(npc, view, frame)
+
+
+def _execution_prompts(npc: NPC, view: WorldView, rag_memories: str, frame) -> tuple[str, str]:
+    # The context builder computes the situation flags once; reuse them
+    # for the system prompt instead of re-scanning the world.
+    context_msg, _is_social, at_exchange, nearby_count = build_npc_context(
+        npc, view, rag_memories, frame
+    )
+    system_prompt = build_npc_system_prompt(
+        npc, view, at_exchange=at_exchange, nearby_count=nearby_count,
+    )
+    return system_prompt, context_msg
+
+
+async def _build_prompts(fn, *args):
+    """Run a prompt builder inline or, with PROMPT_BUILD_IN_THREAD, in a worker thread."""
+    if config.PROMPT_BUILD_IN_THREAD:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+@dataclass
+class ActionQueueStats:
+    """How well execution-call action queues amortize LLM calls."""
+    queues: int = 0               # non-empty queues returned by execution calls
+    queued: int = 0               # follow-up actions in those queues
+    executed: int = 0             # queued actions run without an LLM call
+    invalidated_inbox: int = 0    # queues dropped because new NORMAL / HIGH events arrived
+    invalidated_failed: int = 0   # queues dropped because an action failed validation
+    dropped: int = 0              # queued actions discarded by invalidation
+
+    def snapshot(self) -> dict:
+        invalidated = self.invalidated_inbox + self.invalidated_failed
+        return {
+            "queues": self.queues,
+            "queued": self.queued,
+            "executed": self.executed,
+            "invalidated_inbox": self.invalidated_inbox,
+            "invalidated_failed": self.invalidated_failed,
+            "dropped": self.dropped,
+            "invalidation_rate": round(invalidated / max(1, self.queues), 3),
+        }
+
+
 class NPCAgent(BaseAgent):
     def __init__(self, token_tracker: TokenTracker, rag_storage=None):
         # Use a shared agent ID for NPCs to group token usage
         super().__init__("npcs", token_tracker)
         self._rag = rag_storage  # Optional[BaseRAGStorage]
+        self.queue_stats = ActionQueueStats()
 
     def set_rag(self, rag_storage) -> None:
         """Attach a RAG storage backend (called after construction)."""
@@ -50,7 +107,7 @@ class NPCAgent(BaseAgent):
 
     # ── Layer 1: Strategic planning ──────────────────────────────────────────
 
-    def _needs_strategy(self, npc: NPC, world: World) -> bool:
+    def _needs_strategy(self, npc: NPC, world: WorldView) -> bool:
         """Return True when the NPC should run a new strategic planning call."""
         if not npc.goal:
             return True  # First run — no strategy yet
@@ -62,11 +119,14 @@ class NPCAgent(BaseAgent):
             return True
         return False
 
-    async def _refresh_strategy(self, npc: NPC, world: World) -> None:
+    async def _refresh_strategy(
+        self, npc: NPC, world: WorldView, frame: Optional[ObservationFrame] = None,
+    ) -> None:
         """Level-1: Call LLM with lightweight strategic prompt, update npc.goal/plan."""
         try:
-            system_prompt = build_strategy_system_prompt(npc, world)
-            context_msg = build_strategy_context(npc, world)
+            system_prompt, context_msg = await _build_prompts(
+                _strategy_prompts, freeze_npc(npc), world, frame
+            )
 
             result = await self.call_llm(
                 system_prompt=system_prompt,
@@ -121,7 +181,7 @@ class NPCAgent(BaseAgent):
 
     # ── RAG helpers ──────────────────────────────────────────────────────────
 
-    def _retrieve_memories(self, npc: NPC, world: World) -> str:
+    def _retrieve_memories(self, npc: NPC, world: WorldView) -> str:
         """Pull relevant memories from RAG and format as a string."""
         if not self._rag or not config.RAG_ENABLED:
             return ""
@@ -143,7 +203,7 @@ class NPCAgent(BaseAgent):
             logger.warning(f"[{npc.name}] RAG retrieve error: {e}")
             return ""
 
-    def _save_action_memory(self, npc: NPC, action: dict, world: World) -> None:
+    def _save_action_memory(self, npc: NPC, action: dict, world: WorldView) -> None:
         """Persist important actions to RAG storage."""
         if not self._rag or not config.RAG_ENABLED:
             return
@@ -176,23 +236,76 @@ class NPCAgent(BaseAgent):
         except Exception as e:
             logger.warning(f"[{npc.name}] RAG save error: {e}")
 
+    # ── Action queue (several primitive actions per execution call) ──────────
+
+    def _enqueue(self, npc: NPC, queue: list[dict], seen_seq: int) -> None:
+        npc.action_queue = list(queue[:config.NPC_ACTION_QUEUE_MAX])
+        npc.queue_inbox_seq = seen_seq
+        if npc.action_queue:
+            self.queue_stats.queues += 1
+            self.queue_stats.queued += len(npc.action_queue)
+
+    def _invalidate_queue(self, npc: NPC, reason: str, dropped: int) -> None:
+        if reason == "inbox":
+            self.queue_stats.invalidated_inbox += 1
+        else:
+            self.queue_stats.invalidated_failed += 1
+        self.queue_stats.dropped += dropped
+        npc.action_queue = []
+        logger.debug(f"[{npc.name}] action queue invalidated ({reason}), dropped {dropped}")
+
+    def next_queued_action(self, npc: NPC, world: World) -> Optional[dict]:
+        """Pop the NPC's next queued action if it is still valid, else None.
+
+        The queue is dropped as soon as a NORMAL or HIGH priority inbox entry
+        newer than the one the queue was planned against arrives (the
+        situation changed: talk, trade, weather, market …) or its next action
+        would fail.  LOW entries — coalesced movement, gathering, resting
+        nearby — do not invalidate it.
+        """
+        if not npc.action_queue:
+            return None
+        if npc.memory.inbox.has_news(npc.queue_inbox_seq, NORMAL):
+            self._invalidate_queue(npc, "inbox", len(npc.action_queue))
+            return None
+        action = npc.action_queue[0]
+        reason = check_npc_action(npc, action, world)
+        if reason:
+            npc.last_action_result = f"排队的{action.get('action')}作废：{reason}"
+            self._invalidate_queue(npc, "failed", len(npc.action_queue))
+            return None
+        npc.action_queue.pop(0)
+        self.queue_stats.executed += 1
+        return action
+
     # ── Main entry point ─────────────────────────────────────────────────────
 
-    async def process(self, npc: NPC, world: World) -> dict:
+    async def process(
+        self, npc: NPC, world: World | WorldView, frame: Optional[ObservationFrame] = None,
+    ) -> dict:
         """Three-layer hierarchical decision cycle.
 
         1. Strategic layer: refresh goal/plan via lightweight LLM call when due.
         2. Tactical layer: rule-based step tracking, no LLM.
         3. Execution layer: focused LLM call using dynamic context.
+
+        `world` is normally the loop's current WorldView (a live World is
+        snapshotted for this call).  `frame` is the tick's shared
+        ObservationFrame; when omitted one is captured for this call only.
         """
         if npc.is_processing:
             return {"action": "idle"}
 
         npc.is_processing = True
         try:
+            if not isinstance(world, WorldView):
+                world = WorldView.capture(world)
+            if frame is None:
+                frame = ObservationFrame.capture(world)
+
             # ── Layer 1: Strategic ─────────────────────────────────────────
             if self._needs_strategy(npc, world):
-                await self._refresh_strategy(npc, world)
+                await self._refresh_strategy(npc, world, frame)
 
             # ── Layer 2: Tactical (rule-based) ────────────────────────────
             self._advance_plan_if_needed(npc, npc.last_action)
@@ -202,23 +315,10 @@ class NPCAgent(BaseAgent):
             # then cleared by world_manager after the next action executes.
             rag_memories = self._retrieve_memories(npc, world)
 
-            # Compute situation flags once; pass to both builders
-            tile = world.get_tile(npc.x, npc.y)
-            at_exchange = bool(tile and tile.is_exchange)
-            nearby = world.get_nearby_npcs_for_npc(npc, config.NPC_HEARING_RADIUS)
-            nearby_count = len(nearby)
-            if world.player:
-                pdist = abs(world.player.x - npc.x) + abs(world.player.y - npc.y)
-                if pdist <= config.NPC_HEARING_RADIUS:
-                    nearby_count += 1
-
-            system_prompt = build_npc_system_prompt(
-                npc, world,
-                at_exchange=at_exchange,
-                nearby_count=nearby_count,
-            )
-            context_msg, is_social, _ae, _nc = build_npc_context(
-                npc, world, rag_memories
+            # Snapshot the NPC after the strategy / tactical updates above
+            me = freeze_npc(npc)
+            system_prompt, context_msg = await _build_prompts(
+                _execution_prompts, me, world, rag_memories, frame
             )
 
             result = await self.call_llm(
@@ -236,10 +336,11 @@ class NPCAgent(BaseAgent):
             npc.memory.add_history_turn("user", context_msg)
             npc.memory.add_history_turn("model", result.model_dump_json())
 
-            # Clear inbox after reading
-            npc.memory.clear_inbox()
+            # Drop the messages the prompt showed; newer ones wait for next cycle
+            npc.memory.consume_inbox(me.memory.inbox.last_seq)
 
             action = result.model_dump(exclude_none=True)
+            self._enqueue(npc, action.pop("queue", []), me.memory.inbox.last_seq)
 
             # Save to RAG
             self._save_action_memory(npc, action, world)
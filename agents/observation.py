@@ -0,0 +1,78 @@
+"""Per-tick observation frame shared by all NPC prompt builders.
+
+Everything in an NPC's execution context that does not depend on *which*
+NPC is asking — recent events, the market table, the one-line summaries of
+every character — is rendered once per world tick here.  `build_npc_context`
+/ `build_strategy_context` then only slice from the frame (and the vision
+grid from the world's glyph layer), so per-NPC context cost no longer grows
+with the size of the world.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+import config
+from agents.prompts import _build_market_table
+
+
+@dataclass
+class ObservationFrame:
+    tick: int
+    width: int
+    height: int
+    recent_events_text: str = "（无）"     # last 5 events, context format
+    strategy_events_text: str = ""         # last 4 events, strategy format
+    market_table: str = ""
+    exchange_hint: str = ""
+    market_line: str = ""                  # one-line price summary for strategy
+    npc_lines: dict = field(default_factory=dict)     # npc_id -> nearby-section line
+    npc_gold_tags: dict = field(default_factory=dict)  # npc_id -> "名(金N)"
+    player_line: str = ""
+
+    @classmethod
+    def capture(cls, world) -> "ObservationFrame":
+        """Render the world-global parts of every NPC prompt for this tick."""
+        recent = world.recent_events.summaries(5)
+        frame = cls(
+            tick=world.time.tick,
+            width=world.width,
+            height=world.height,
+            recent_events_text="\n".join(f"- {e}" for e in recent) or "（无）",
+            strategy_events_text="\n".join(f"- {e}" for e in recent[-4:]),
+            market_table=_build_market_table(world),
+        )
+
+        prices = world.market.prices
+        hint_parts = []
+        for item in ("wood", "stone", "ore", "food", "herb"):
+            mp = prices.get(item)
+            if mp:
+                hint_parts.append(f"{item}={mp.current:.1f}金")
+        frame.exchange_hint = f"★ 你正站在交易所！当前卖价参考: {', '.join(hint_parts[:5])}\n"
+        frame.market_line = " ".join(
+            f"{item}={mp.current:.1f}{mp.trend}"
+            for item, mp in list(prices.items())[:6]
+        )
+
+        for n in world.npcs:
+            inv = n.inventory
+            prof = getattr(n, "profile", None)
+            title = f"[{prof.title}]" if prof and prof.title else ""
+            frame.npc_lines[n.npc_id] = (
+                f"- {n.name}{title}({n.npc_id}) @ ({n.x},{n.y}) "
+                f"背包:木{inv.wood}/石{inv.stone}/矿{inv.ore}/食{inv.food}"
+                f"/草药{inv.herb}/金{inv.gold:.0f} 体力:{n.energy} "
+                f"提案:{world.proposals.count(n.npc_id)}"
+            )
+            frame.npc_gold_tags[n.npc_id] = f"{n.name}(金{inv.gold:.0f})"
+
+        player = world.player
+        if player:
+            inv = player.inventory
+            frame.player_line = (
+                f"- {player.name}(player) @ ({player.x},{player.y}) "
+                f"背包:木{inv.wood}/石{inv.stone}/矿{inv.ore}/食{inv.food}/金{inv.gold:.0f} "
+                f"体力:{player.energy} 装备:{player.equipped or '空'} "
+                f"背包:{inv.total_items()}/{config.INVENTORY_MAX_SLOTS}格"
+            )
+        return frame
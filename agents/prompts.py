@@ -18,6 +18,7 @@ from typing import Optional
 from pydantic import BaseModel
 
 import config
+from engine.glyphs import fixture_glyph
 
 logger = logging.getLogger(__name__)
 
@@ -69,6 +70,20 @@ class NPCStrategy(BaseModel):
     steps: list[str]     # 3-5 concrete, actionable steps
 
 
+class QueuedAction(BaseModel):
+    """A follow-up primitive action queued behind the main one."""
+    action: str  # move|gather|rest|sleep|eat|craft|sell|buy|use_item|build
+    dx: Optional[int] = None
+    dy: Optional[int] = None
+    craft_item: Optional[str] = None
+    sell_item: Optional[str] = None
+    sell_qty: Optional[int] = None
+    buy_item: Optional[str] = None
+    buy_qty: Optional[int] = None
+    use_item: Optional[str] = None
+    build_furniture: Optional[str] = None
+
+
 class NPCAction(BaseModel):
     """Flexible NPC action schema. Only relevant fields are used per action type."""
     # Thought FIRST — required inner monologue (ReAct pattern)
@@ -76,9 +91,17 @@ class NPCAction(BaseModel):
     # Core
     action: str  # move|gather|talk|trade|rest|think|interrupt|eat|sleep|exchange|buy_food
                  # craft|sell|buy|use_item|propose_trade|accept_trade|reject_trade|counter_trade
+                 # macros (engine runs them over several ticks):
+                 # move_to|move_to_nearest|gather_until|go_sell
     # move
     dx: Optional[int] = None
     dy: Optional[int] = None
+    # move_to
+    target_x: Optional[int] = None
+    target_y: Optional[int] = None
+    # move_to_nearest (resource / furniture / "exchange") / gather_until
+    resource: Optional[str] = None
+    until_qty: Optional[int] = None
     # talk / interrupt
     message: Optional[str] = None
     target_id: Optional[str] = None
@@ -109,6 +132,8 @@ class NPCAction(BaseModel):
     build_furniture: Optional[str] = None  # bed | table | chair
     # long-term plan tracking (internal monologue)
     plan: Optional[str] = None
+    # follow-up primitive actions, executed one per cycle without another call
+    queue: Optional[list[QueuedAction]] = None
 
 
 class GodAction(BaseModel):
@@ -157,8 +182,9 @@ _LAYER_WORLD_RULES = """【世界】{width}×{height}格 | 地块:草/森/岩/
 _ACTION_CHEATSHEET = """【可用行动】返回JSON，thought字段必填！
 基础: move(dx,dy) | gather | rest | sleep | eat | think(note)
 社交: talk(message,target_id) | interrupt(message,target_id)
+多步(引擎自动逐格执行，被搭话/收到提案/体力低时中断): move_to(target_x,target_y) | move_to_nearest(resource) | gather_until(resource,until_qty) | go_sell(sell_item,sell_qty)
 {extra_actions}
-每次只返回一个JSON动作。thought=你的内心想法(必填)。"""
+每次返回一个JSON动作；可在queue里附带最多{queue_max}个后续基础动作(move/gather/rest/sleep/eat/craft/sell/buy/use_item/build)，之后逐个自动执行，收到新消息或动作失败时作废。thought=你的内心想法(必填)。"""
 
 # Extra action lines (dynamically composed)
 _EXTRA_EXCHANGE = "交易所: sell(sell_item,sell_qty) | buy(buy_item,buy_qty) | exchange(exchange_item,exchange_qty) | buy_food(quantity)"
@@ -189,6 +215,10 @@ _CTX_VISION = """=== 视野(5×5) ===
 {vision_grid}
 """
 
+_CTX_NAV = """=== 导航(最短步数) ===
+{nav_lines}
+"""
+
 _CTX_MARKET = """=== 市场价格 ===
 {market_table}
 """
@@ -247,51 +277,17 @@ NPC状态:
 
 # ── Vision grid builder ────────────────────────────────────────────────────────
 
-_TILE_CHARS = {
-    "grass": "·", "water": "≈", "rock": "▲", "forest": "♣", "town": "⌂",
-}
-_RESOURCE_CHARS = {
-    "wood": "W", "stone": "S", "ore": "O", "food": "F", "herb": "H",
-}
+_VISION_LEGEND = "图例: @=你 P=玩家 E=交易所 W=木 S=石 O=矿 F=食 H=草药 ♣=森 ▲=岩 ⌂=城 ·=草 B=床 T=桌 C=椅"
 
 
 def build_vision_grid(npc, world) -> str:
+    """Slice the NPC's vision window out of the world's maintained glyph layer."""
     radius = config.NPC_VISION_RADIUS
-    lines = []
-    for dy in range(-radius, radius + 1):
-        row = []
-        for dx in range(-radius, radius + 1):
-            tx, ty = npc.x + dx, npc.y + dy
-            if not (0 <= tx < world.width and 0 <= ty < world.height):
-                row.append("X")
-                continue
-            tile = world.get_tile(tx, ty)
-            if tile is None:
-                row.append("?")
-                continue
-            ch = _TILE_CHARS.get(tile.tile_type.value, "?")
-            if tile.resource and tile.resource.quantity > 0:
-                ch = _RESOURCE_CHARS.get(tile.resource.resource_type.value, ch)
-            if tile.npc_ids:
-                npc_here = world.get_npc(tile.npc_ids[0])
-                if npc_here:
-                    ch = npc_here.name[0].upper()
-            if tile.player_here:
-                ch = "P"
-            if dx == 0 and dy == 0:
-                ch = "@"
-            if tile.is_exchange:
-                ch = "£" if (dx == 0 and dy == 0) else "E"
-            elif tile.furniture == "bed":
-                ch = "B"
-            elif tile.furniture == "table":
-                ch = "T"
-            elif tile.furniture == "chair":
-                ch = "C"
-            row.append(ch)
-        lines.append(" ".join(row))
-    legend = "图例: @=你 P=玩家 E=交易所 W=木 S=石 O=矿 F=食 H=草药 ♣=森 ▲=岩 ⌂=城 ·=草 B=床 T=桌 C=椅"
-    return "\n".join(lines) + "\n" + legend
+    rows = world.glyphs.window(npc.x, npc.y, radius)
+    tile = world.get_tile(npc.x, npc.y)
+    center = fixture_glyph(tile) if tile else ""
+    rows[radius][radius] = "£" if center == "E" else (center or "@")
+    return "\n".join(" ".join(row) for row in rows) + "\n" + _VISION_LEGEND
 
 
 # ── Market price table builder ─────────────────────────────────────────────────
@@ -476,19 +472,17 @@ def build_npc_system_prompt(
         extra_lines.append(_EXTRA_BUILD.format(build_options=" ".join(build_parts)))
 
     extra_str = "\n".join(extra_lines) if extra_lines else ""
-    prompt += _ACTION_CHEATSHEET.format(extra_actions=extra_str)
+    prompt += _ACTION_CHEATSHEET.format(
+        extra_actions=extra_str, queue_max=config.NPC_ACTION_QUEUE_MAX,
+    )
 
     # ── Proposals (urgent — must respond this turn) ────────────────────
-    proposals = getattr(npc, "pending_proposals", [])
+    proposals = world.proposals.pending(npc.npc_id)
     if proposals:
         prop_lines = []
         for p in proposals:
             from_id = p.get("from_id", "")
-            if from_id == "player":
-                from_name = world.player.name if world.player else "玩家"
-            else:
-                from_npc = world.get_npc(from_id)
-                from_name = from_npc.name if from_npc else from_id
+            from_name = world.display_name(from_id)
             prop_lines.append(
                 f"  来自{from_name}({from_id}): {p['offer_qty']}{p['offer_item']}↔{p['request_qty']}{p['request_item']} (第{p.get('round',1)}轮)"
             )
@@ -501,15 +495,58 @@ def build_npc_system_prompt(
     return prompt
 
 
-def build_npc_context(npc, world, rag_memories: str = "") -> tuple[str, bool, bool, int]:
-    """Return (context_str, is_social_mode).
+_NAV_RESOURCES = ("wood", "stone", "ore", "food", "herb")
+
+
+def build_nav_hints(npc, world) -> str:
+    """Shortest-path hints to the exchange and the nearest tile of each resource."""
+    from engine.pathfinding import EXCHANGE, direction_name
+
+    paths = world.paths
+    if paths is None:
+        return "（无）"
+    lines = []
+    dist = paths.distance(EXCHANGE, npc.x, npc.y)
+    if dist == 0:
+        lines.append("交易所: 就在脚下")
+    elif dist is not None:
+        dx, dy = paths.step_toward(EXCHANGE, npc.x, npc.y)
+        ex, ey = paths.nearest(EXCHANGE, npc.x, npc.y)
+        lines.append(
+            f"交易所: {direction_name(ex - npc.x, ey - npc.y)}{dist}步 下一步(dx={dx},dy={dy})"
+        )
+
+    parts = []
+    for res in _NAV_RESOURCES:
+        target = paths.nearest(res, npc.x, npc.y)
+        if target is None:
+            continue
+        d = paths.distance(res, npc.x, npc.y)
+        where = "脚下" if d == 0 else f"{direction_name(target[0] - npc.x, target[1] - npc.y)}{d}步"
+        parts.append(f"{res}({target[0]},{target[1]}){where}")
+    if parts:
+        lines.append("最近资源: " + " ".join(parts))
+    return "\n".join(lines) or "（无）"
+
+
+def build_npc_context(
+    npc, world, rag_memories: str = "", frame=None,
+) -> tuple[str, bool, bool, int]:
+    """Return (context_str, is_social_mode, at_exchange, nearby_count).
 
     Dynamic injection rules:
     - Market table: only shown when NPC is at the exchange tile
     - Nearby section + inbox: only shown when there are nearby characters / messages
     - Recent events: trimmed to 5 (down from 8) to save tokens
     - Goal/plan: injected from NPC.goal / NPC.plan set by the strategic layer
+
+    World-global sections are sliced from `frame` (an ObservationFrame shared
+    by every NPC this tick); one is captured on the fly when not supplied.
     """
+    if frame is None:
+        from agents.observation import ObservationFrame
+        frame = ObservationFrame.capture(world)
+
     tile = world.get_tile(npc.x, npc.y)
     tile_type = tile.tile_type.value if tile else "unknown"
     at_exchange = bool(tile and tile.is_exchange)
@@ -519,55 +556,29 @@ def build_npc_context(npc, world, rag_memories: str = "") -> tuple[str, bool, bo
         r = tile.resource
         resource_info = f"{r.resource_type.value} x{r.quantity}/{r.max_quantity}"
 
-    exchange_hint = ""
-    if at_exchange:
-        prices = world.market.prices
-        hint_parts = []
-        for item in ("wood", "stone", "ore", "food", "herb"):
-            mp = prices.get(item)
-            if mp:
-                hint_parts.append(f"{item}={mp.current:.1f}金")
-        exchange_hint = f"★ 你正站在交易所！当前卖价参考: {', '.join(hint_parts[:5])}\n"
+    exchange_hint = frame.exchange_hint if at_exchange else ""
 
     vision_grid = build_vision_grid(npc, world)
 
     notes_str = "\n".join(f"- {n}" for n in npc.memory.personal_notes) or "（暂无）"
     inbox_str = "\n".join(f"- {m}" for m in npc.memory.inbox) or "（无新消息）"
     # Trim to 5 most recent events (saves ~50-80 tokens vs 8)
-    recent = world.recent_events[-5:] if world.recent_events else []
-    recent_str = "\n".join(f"- {e}" for e in recent) or "（无）"
+    recent_str = frame.recent_events_text
     rag_str = rag_memories if rag_memories else "（暂无相关记忆）"
 
     nearby = world.get_nearby_npcs_for_npc(npc, config.NPC_HEARING_RADIUS)
 
     # Player proximity check
     player_nearby = []
-    if world.player:
-        pdist = abs(world.player.x - npc.x) + abs(world.player.y - npc.y)
-        if pdist <= config.NPC_HEARING_RADIUS:
-            inv = world.player.inventory
-            p_equipped = world.player.equipped or "空"
-            player_nearby.append(
-                f"- {world.player.name}(player) @ ({world.player.x},{world.player.y}) "
-                f"背包:木{inv.wood}/石{inv.stone}/矿{inv.ore}/食{inv.food}/金{inv.gold:.0f} "
-                f"体力:{world.player.energy} 装备:{p_equipped} "
-                f"背包:{inv.total_items()}/{config.INVENTORY_MAX_SLOTS}格"
-            )
+    if world.player_within(npc.x, npc.y, config.NPC_HEARING_RADIUS) and frame.player_line:
+        player_nearby.append(frame.player_line)
 
     has_social = bool(nearby or npc.memory.inbox or player_nearby)
     nearby_count = len(nearby) + len(player_nearby)
 
-    nearby_str_parts = []
-    for n in nearby:
-        inv = n.inventory
-        prof = getattr(n, "profile", None)
-        title = f"[{prof.title}]" if prof and prof.title else ""
-        nearby_str_parts.append(
-            f"- {n.name}{title}({n.npc_id}) @ ({n.x},{n.y}) "
-            f"背包:木{inv.wood}/石{inv.stone}/矿{inv.ore}/食{inv.food}"
-            f"/草药{inv.herb}/金{inv.gold:.0f} 体力:{n.energy} "
-            f"提案:{len(getattr(n,'pending_proposals',[]))}"
-        )
+    nearby_str_parts = [
+        frame.npc_lines[n.npc_id] for n in nearby if n.npc_id in frame.npc_lines
+    ]
     nearby_str_parts += player_nearby
     nearby_str = "\n".join(nearby_str_parts) or "（无）"
 
@@ -602,10 +613,11 @@ def build_npc_context(npc, world, rag_memories: str = "") -> tuple[str, bool, bo
         ctx += _CTX_STRATEGY.format(goal=npc.goal or "（制定中）", plan_steps=plan_steps)
 
     ctx += _CTX_VISION.format(vision_grid=vision_grid)
+    ctx += _CTX_NAV.format(nav_lines=build_nav_hints(npc, world))
 
     # Market table: only inject when at exchange (saves ~150 tokens most of the time)
     if at_exchange:
-        ctx += _CTX_MARKET.format(market_table=_build_market_table(world))
+        ctx += _CTX_MARKET.format(market_table=frame.market_table)
 
     if has_social:
         ctx += _CTX_NEARBY.format(radius=config.NPC_HEARING_RADIUS, nearby_npcs=nearby_str)
@@ -636,12 +648,15 @@ def build_strategy_system_prompt(npc, world) -> str:
     )
 
 
-def build_strategy_context(npc, world) -> str:
+def build_strategy_context(npc, world, frame=None) -> str:
     """Build the lightweight context for the Level-1 strategic planning call.
 
     Includes current inventory/status, nearby resources summary, nearby characters,
     and a brief market snapshot — no full vision grid or module descriptions.
     """
+    if frame is None:
+        from agents.observation import ObservationFrame
+        frame = ObservationFrame.capture(world)
     inv = npc.inventory
     tile = world.get_tile(npc.x, npc.y)
     tile_info = tile.tile_type.value if tile else "?"
@@ -662,13 +677,12 @@ def build_strategy_context(npc, world) -> str:
     res_str = " ".join(f"{k}:{v}" for k, v in nearby_res.items()) or "无"
 
     nearby = world.get_nearby_npcs_for_npc(npc, config.NPC_HEARING_RADIUS)
-    nearby_str = ", ".join(f"{n.name}(金{n.inventory.gold:.0f})" for n in nearby) or "无"
+    nearby_str = ", ".join(
+        frame.npc_gold_tags.get(n.npc_id, n.name) for n in nearby
+    ) or "无"
 
     # Market summary: just current prices in one line
-    market_str = " ".join(
-        f"{item}={mp.current:.1f}{mp.trend}"
-        for item, mp in list(world.market.prices.items())[:6]
-    )
+    market_str = frame.market_line
 
     old_plan = ""
     if npc.goal:
@@ -690,7 +704,7 @@ def build_strategy_context(npc, world) -> str:
         f"当前情绪: {npc.mood or '未设定'}\n"
         f"{old_plan}"
         f"\n近期事件:\n"
-        + "\n".join(f"- {e}" for e in world.recent_events[-4:])
+        + frame.strategy_events_text
         + "\n\n请制定新的行动计划，返回JSON:"
     )
 
@@ -709,7 +723,7 @@ def build_god_context(god, world) -> str:
         )
     npc_summary = "\n".join(npc_lines) or "（无NPC）"
 
-    recent = world.recent_events[-10:] if world.recent_events else []
+    recent = world.recent_events.summaries(10)
     recent_str = "\n".join(f"- {e}" for e in recent) or "（无）"
 
     pending = god.pending_commands
@@ -0,0 +1,60 @@
+"""Offline rule-based NPC agent (no LLM).
+
+Drop-in for `NPCAgent.process` in headless runs and benchmarks: it reads the
+same NPC / world state and returns the same action dicts, leaning on the
+engine's macro actions so one decision covers many ticks.
+"""
+from __future__ import annotations
+
+import random
+from typing import Optional
+
+import config
+from agents.observation import ObservationFrame
+from engine.world import NPC, ResourceType, World
+
+_GATHERABLE = [r.value for r in ResourceType]
+_SELLABLE = ("wood", "stone", "ore", "herb", "rope", "potion", "tool", "bread")
+
+
+class RuleNPCAgent:
+    def __init__(self, seed: int = 0):
+        self._rng = random.Random(seed)
+
+    async def process(
+        self, npc: NPC, world: World, frame: Optional[ObservationFrame] = None,
+    ) -> dict:
+        # A decision consumes the inbox, as an execution call does
+        npc.memory.clear_inbox()
+        inv = npc.inventory
+
+        proposal = world.proposals.oldest(npc.npc_id)
+        if proposal:
+            return {"action": "reject_trade", "proposal_from": proposal["from_id"],
+                    "thought": "现在不想交易"}
+
+        if npc.energy < 30:
+            if inv.food > 0:
+                return {"action": "eat", "thought": "有点饿了"}
+            if inv.bread > 0:
+                return {"action": "use_item", "use_item": "bread", "thought": "吃块面包"}
+            if inv.potion > 0:
+                return {"action": "use_item", "use_item": "potion", "thought": "喝瓶药水"}
+            if npc.energy < config.MACRO_MIN_ENERGY or world.time.phase == "night":
+                return {"action": "sleep", "thought": "太累了，睡一觉"}
+            return {"action": "gather_until", "resource": "food", "until_qty": 3,
+                    "thought": "得去找点吃的"}
+
+        if not inv.has_space(2):
+            item = max(_SELLABLE, key=inv.get)
+            if inv.get(item) > 0:
+                return {"action": "go_sell", "sell_item": item, "thought": f"背包满了，去卖{item}"}
+
+        for item, recipe in config.CRAFTING_RECIPES.items():
+            if all(inv.get(mat) >= qty for mat, qty in recipe.items()) and inv.has_space(2):
+                return {"action": "craft", "craft_item": item, "thought": f"材料够了，做个{item}"}
+
+        resource = self._rng.choice(_GATHERABLE)
+        return {"action": "gather_until", "resource": resource,
+                "until_qty": inv.get(resource) + self._rng.randint(3, 8),
+                "thought": f"去采些{resource}"}
@@ -25,6 +25,18 @@ MARKET_VOLATILITY: float = 0.15      # max random price swing ±%
 MARKET_SMOOTHING: float = 0.3        # price responsiveness (0=frozen, 1=instant)
 MARKET_PRICE_MIN_RATIO: float = 0.3  # floor = base × 0.3
 MARKET_PRICE_MAX_RATIO: float = 3.0  # ceiling = base × 3.0
+# Exchange sell / buy orders clear in one batch per tick; net order flow moves the price
+MARKET_IMPACT_PER_UNIT: float = 0.02  # clearing price shift per unit of (bought - sold)
+MARKET_IMPACT_MAX: float = 0.3        # cap on one batch's price shift (±30%)
+MARKET_HISTORY_SIZE: int = 256       # raw price samples kept per item (ring buffer)
+MARKET_HISTORY_BROADCAST: int = 30   # most recent samples sent with every world_state
+# OHLC candles kept per resolution (game hour / day / season)
+MARKET_CANDLES: dict = {"hour": 168, "day": 112, "season": 16}
+MARKET_LOW_FOOD: int = 3             # NPCs holding less food than this raise food demand
+MARKET_LOW_ENERGY: int = 40          # NPCs below this energy raise potion / bread demand
+# Verify the running supply/demand counters against a full recount on every
+# market update and raise on mismatch (slow; for tests and debugging)
+MARKET_CHECK_LEDGER: bool = os.getenv("MARKET_CHECK_LEDGER", "false").lower() == "true"
 
 # ── Inventory ─────────────────────────────────────────────────────────────────
 
@@ -77,11 +89,38 @@ LOCAL_LLM_BASE_URL: str = os.getenv("LOCAL_LLM_BASE_URL", "http://localhost:1143
 LOCAL_LLM_MODEL: str = os.getenv("LOCAL_LLM_MODEL", "llama3")
 
 # World
-WORLD_WIDTH: int = 20
-WORLD_HEIGHT: int = 20
+WORLD_WIDTH: int = int(os.getenv("WORLD_WIDTH", "20"))
+WORLD_HEIGHT: int = int(os.getenv("WORLD_HEIGHT", "20"))
+WORLD_SEED: int = int(os.getenv("WORLD_SEED", "42"))
+CHUNK_SIZE: int = 32              # tiles per chunk side; larger maps are generated lazily
+CHUNK_SWEEP_INTERVAL: int = 20    # ticks between idle-chunk eviction sweeps
+CHUNK_EVICT_AFTER: int = 3        # untouched sweeps before an empty chunk is paged to disk
+CHUNK_SAVE_DIR: str = os.getenv("CHUNK_SAVE_DIR", os.path.join("saves", "chunks"))
+
+# Replayable action log (engine/action_log.py): one file per server session
+ACTION_LOG_ENABLED: bool = os.getenv("ACTION_LOG_ENABLED", "true").lower() == "true"
+ACTION_LOG_DIR: str = os.getenv("ACTION_LOG_DIR", os.path.join("saves", "actions"))
+
+# Checkpoints: full simulation state, written on save / shutdown / every N ticks
+CHECKPOINT_ENABLED: bool = os.getenv("CHECKPOINT_ENABLED", "true").lower() == "true"
+CHECKPOINT_PATH: str = os.getenv("CHECKPOINT_PATH", os.path.join("saves", "checkpoint.ahck"))
+CHECKPOINT_INTERVAL_TICKS: int = int(os.getenv("CHECKPOINT_INTERVAL_TICKS", "48"))  # 0 = off
+CHECKPOINT_RESTORE: bool = os.getenv("CHECKPOINT_RESTORE", "true").lower() == "true"  # resume at startup
+
+# Durable event log (rag/event_log.py): rotated NDJSON segments under RAG_SAVE_DIR/events
+EVENT_LOG_ENABLED: bool = os.getenv("EVENT_LOG_ENABLED", "true").lower() == "true"
+EVENT_LOG_SEGMENT_BYTES: int = 8 * 1024 * 1024   # seal (gzip) the active segment past this size
+EVENT_LOG_INDEX_EVERY: int = 256                 # lines per index block / gzip member
+EVENT_LOG_KEEP_SEGMENTS: int = int(os.getenv("EVENT_LOG_KEEP_SEGMENTS", "0"))  # sealed segments kept, 0 = all
+EVENT_LOG_PAGE_MAX: int = 1000                   # max events per /api/events page
+
+# EventBus subscribers (game/events.py): each has its own task and bounded queue
+EVENT_SUB_QUEUE_MAX: int = 4096    # queued events per subscriber; the oldest is dropped when full
+EVENT_SUB_BATCH_MAX: int = 256     # events handed to a subscriber per call
 
 # Timing (seconds) — all hot-modifiable via settings panel
 WORLD_TICK_SECONDS: float = float(os.getenv("WORLD_TICK_SECONDS", "3.0"))
+COMMAND_DRAIN_SECONDS: float = float(os.getenv("COMMAND_DRAIN_SECONDS", "0.1"))  # sub-tick command batch interval
 NPC_MIN_THINK_SECONDS: float = float(os.getenv("NPC_MIN_THINK_SECONDS", "5.0"))
 NPC_MAX_THINK_SECONDS: float = float(os.getenv("NPC_MAX_THINK_SECONDS", "10.0"))
 GOD_MIN_THINK_SECONDS: float = float(os.getenv("GOD_MIN_THINK_SECONDS", "20.0"))
@@ -90,11 +129,16 @@ GOD_MAX_THINK_SECONDS: float = float(os.getenv("GOD_MAX_THINK_SECONDS", "40.0"))
 # Agent memory
 HISTORY_MAX_TURNS: int = 20   # max conversation history turns per NPC
 NOTES_MAX_COUNT: int = 10     # max personal notes per NPC
+NPC_INBOX_MAX: int = 12       # inbox entries kept between decisions (lowest priority evicted first)
+NPC_INBOX_LINE_MAX: int = 120  # characters per inbox entry (longer ones are clipped)
+RECENT_EVENTS_MAX: int = 30   # world-wide recent events kept for prompts and the god context
 
 # NPC perception — hot-modifiable
 NPC_HEARING_RADIUS: int = int(os.getenv("NPC_HEARING_RADIUS", "5"))
 NPC_ADJACENT_RADIUS: int = 1  # for trade/interact
+TRADE_PROPOSAL_TTL: int = 10  # ticks a trade proposal stays open before it expires
 NPC_VISION_RADIUS: int = 2    # tiles each direction → 5×5 visible area
+SPATIAL_CELL_SIZE: int = 8    # bucket size (tiles) of the proximity spatial index
 
 # Token tracking
 DEFAULT_TOKEN_LIMIT: int = 200_000
@@ -110,6 +154,19 @@ LLM_MAX_TOKENS: int = 2048
 # when the tick counter crosses this threshold.
 NPC_STRATEGY_INTERVAL: int = 20
 
+# Build NPC prompts in a worker thread (from the frozen per-tick WorldView)
+# instead of on the event loop.
+PROMPT_BUILD_IN_THREAD: bool = os.getenv("PROMPT_BUILD_IN_THREAD", "false").lower() == "true"
+
+# Macro actions (move_to / move_to_nearest / gather_until / go_sell) run one
+# step per world tick inside the engine, without an LLM call per step.
+MACRO_MIN_ENERGY: int = 15   # abort a running macro when energy drops below this
+MACRO_MAX_STEPS: int = 60    # hard cap on engine-executed steps per macro
+
+# Action queues: one execution call may return up to this many follow-up
+# primitive actions, popped one per brain cycle without another LLM call.
+NPC_ACTION_QUEUE_MAX: int = 4
+
 # Town & Exchange
 TOWN_X: int = 9            # town area top-left corner X
 TOWN_Y: int = 9            # town area top-left corner Y
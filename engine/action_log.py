@@ -0,0 +1,118 @@
+"""Append-only binary log of every world mutation, for deterministic replay.
+
+Every change to the world goes through `WorldManager`: a world tick (time,
+passive effects, macro steps, market update) or an applied NPC / player / god
+action or direct god command.  With a log attached, `WorldManager` appends one
+record per such call *before* applying it, and reseeds its RNG from a seed
+stored in each tick record, so `engine.replay` can rebuild the exact same
+world from the header's world seed by re-applying the records in order.
+
+File layout: the 6-byte magic, then records of
+
+    kind: u8 | tick: u32 | length: u32 | payload (length bytes)
+
+Tick records carry the tick's RNG seed as a u32; NPC records carry the npc id
+(u8 length + UTF-8) followed by the action as compact JSON; every other kind
+is compact JSON.  Records are buffered and flushed once per tick.
+"""
+from __future__ import annotations
+
+import json
+import struct
+from typing import BinaryIO, Iterator, NamedTuple, Optional
+
+MAGIC = b"AHLOG\x01"
+
+# Record kinds
+HEADER = 0     # {"version", "seed", "width", "height", "start_tick"}
+TICK = 1       # u32 RNG seed; record tick is the tick being entered
+NPC = 2        # npc id + action dict
+PLAYER = 3     # action dict
+GOD = 4        # action dict (LLM god)
+COMMAND = 5    # direct god command dict (browser UI)
+
+KIND_NAMES = {HEADER: "header", TICK: "tick", NPC: "npc", PLAYER: "player",
+              GOD: "god", COMMAND: "command"}
+
+_RECORD = struct.Struct("<BII")
+_SEED = struct.Struct("<I")
+
+
+class LogRecord(NamedTuple):
+    kind: int
+    tick: int
+    actor: Optional[str]      # npc id for NPC records
+    data: object              # seed (TICK) or decoded dict
+
+
+def _dumps(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ActionLog:
+    """Writer side: `WorldManager.action_log` points at one of these."""
+
+    def __init__(self, path: str, seed: int, width: int, height: int, start_tick: int = 0):
+        self.path = path
+        self.records = 0
+        self._fh: Optional[BinaryIO] = open(path, "wb")
+        self._fh.write(MAGIC)
+        self._write(HEADER, start_tick, _dumps({
+            "version": 1, "seed": seed, "width": width, "height": height,
+            "start_tick": start_tick,
+        }))
+
+    def _write(self, kind: int, tick: int, payload: bytes):
+        if self._fh is None:
+            return
+        self._fh.write(_RECORD.pack(kind, tick, len(payload)))
+        self._fh.write(payload)
+        self.records += 1
+
+    def tick(self, tick: int, seed: int):
+        self._write(TICK, tick, _SEED.pack(seed))
+
+    def npc(self, tick: int, npc_id: str, action: dict):
+        actor = npc_id.encode("utf-8")
+        self._write(NPC, tick, bytes([len(actor)]) + actor + _dumps(action))
+
+    def player(self, tick: int, action: dict):
+        self._write(PLAYER, tick, _dumps(action))
+
+    def god(self, tick: int, action: dict):
+        self._write(GOD, tick, _dumps(action))
+
+    def command(self, tick: int, cmd: dict):
+        self._write(COMMAND, tick, _dumps(cmd))
+
+    def flush(self):
+        if self._fh is not None:
+            self._fh.flush()
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+def read_log(path: str) -> Iterator[LogRecord]:
+    """Decode records in file order; a truncated trailing record is ignored."""
+    with open(path, "rb") as fh:
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: not an action log")
+        while True:
+            head = fh.read(_RECORD.size)
+            if len(head) < _RECORD.size:
+                return
+            kind, tick, length = _RECORD.unpack(head)
+            payload = fh.read(length)
+            if len(payload) < length:
+                return   # crashed mid-write
+            if kind == TICK:
+                yield LogRecord(kind, tick, None, _SEED.unpack(payload)[0])
+            elif kind == NPC:
+                n = payload[0]
+                actor = payload[1:1 + n].decode("utf-8")
+                yield LogRecord(kind, tick, actor, json.loads(payload[1 + n:]))
+            else:
+                yield LogRecord(kind, tick, None, json.loads(payload))
@@ -0,0 +1,116 @@
+"""Versioned binary checkpoints of the running simulation.
+
+A checkpoint file is a short header (magic + format version) followed by a
+zlib-compressed pickle of a plain dict.  The world part holds only the state
+the engine owns — loaded chunk layers, evicted chunks, entities
+(NPC memories, plans, macros and action queues included), time, weather,
+market, open trade proposals and recent events.  Derived structures (tile
+views, the entity registry, spatial index, glyph layer, path fields) are
+rebuilt on restore, so loading a checkpoint is a pickle load plus a few
+index builds.
+
+Callers add their own sections (agents, token totals, RNG states) next to
+`"world"`; see `GameLoop.checkpoint_state` / `restore_checkpoint`.
+
+Evicted chunks are copied into the checkpoint as their saved .npz bytes:
+the files in the chunk save directory are rewritten by every later
+eviction, so a restored world must not read them.  Restored evicted chunks
+load from those bytes when first touched.
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import struct
+import zlib
+
+import config
+from engine.world import World, make_tiles, new_chunk_store
+
+MAGIC = b"AHCKPT"
+VERSION = 8
+
+_HEADER = struct.Struct("<6sH")
+
+
+# ── World ─────────────────────────────────────────────────────────────────────
+
+def capture_world(world: World) -> dict:
+    """Plain, picklable parts of `world` (pickle them before the world changes)."""
+    chunks = world.chunks
+    return {
+        "width": world.width,
+        "height": world.height,
+        "seed": world.seed,
+        "chunk_size": chunks.chunk_size,
+        "stores": [chunk.store for chunk in chunks.loaded()],
+        "evicted": chunks.evicted_totals(),
+        "evicted_data": chunks.evicted_data(),
+        "weather": world.weather,
+        "time": world.time,
+        "npcs": world.npcs,
+        "god": world.god,
+        "player": world.player,
+        "recent_events": world.recent_events,
+        "market": world.market,
+        "proposals": world.proposals,
+    }
+
+
+def restore_world(parts: dict, chunk_dir: str = config.CHUNK_SAVE_DIR) -> World:
+    """Rebuild a World (and its derived indexes) from `capture_world` output."""
+    if parts["chunk_size"] != config.CHUNK_SIZE:
+        raise ValueError(
+            f"checkpoint uses CHUNK_SIZE={parts['chunk_size']}, config has {config.CHUNK_SIZE}"
+        )
+    chunks = new_chunk_store(parts["seed"], parts["width"], parts["height"], chunk_dir)
+    for store in parts["stores"]:
+        store.occupancy[:] = 0          # recounted from NPC positions below
+        chunks.adopt(store, make_tiles(store))
+    chunks.adopt_evicted(parts["evicted"], parts["evicted_data"])
+
+    for npc in parts["npcs"]:
+        npc.is_processing = False
+        tile = chunks.get_tile(npc.x, npc.y)
+        if tile:
+            tile.enter(npc.npc_id)
+    parts["god"].is_processing = False
+
+    return World(
+        width=parts["width"], height=parts["height"], seed=parts["seed"], chunks=chunks,
+        weather=parts["weather"], time=parts["time"],
+        npcs=parts["npcs"], god=parts["god"], player=parts["player"],
+        recent_events=parts["recent_events"], market=parts["market"],
+        proposals=parts["proposals"],
+    )
+
+
+# ── File format ───────────────────────────────────────────────────────────────
+
+def encode(state: dict) -> bytes:
+    """Pickle a checkpoint dict.  Cheap; do it while the state is consistent."""
+    return pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def write_checkpoint(path: str, payload: bytes):
+    """Compress an `encode`d payload and replace `path` atomically (thread-safe)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION))
+        f.write(zlib.compress(payload, 1))
+    os.replace(tmp, path)
+
+
+def read_checkpoint(path: str) -> dict:
+    """Load a checkpoint dict written by `write_checkpoint`."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ValueError(f"{path}: truncated checkpoint")
+    magic, version = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: not a checkpoint file")
+    if version != VERSION:
+        raise ValueError(f"{path}: checkpoint format v{version}, expected v{VERSION}")
+    return pickle.loads(zlib.decompress(data[_HEADER.size:]))
@@ -0,0 +1,265 @@
+"""Chunked world storage: fixed-size TileStore chunks, generated on demand.
+
+The map is split into `CHUNK_SIZE`×`CHUNK_SIZE` chunks.  A chunk is generated
+(from the world seed and its coordinates) the first time any of its tiles is
+touched, and chunks nobody has touched for a few sweeps — and that hold no
+NPC or player — are written to disk and dropped from memory.  Each store
+pages into its own temporary directory under `save_dir`, so several live
+worlds (the server, headless runs, replays) never overwrite each other's
+chunks; the directory is removed by `close()` or when the store is
+garbage-collected.  Memory and
+startup time therefore follow the explored area, not the nominal map size.
+
+Small maps (≤ one chunk per side) are a single eagerly built chunk.
+"""
+from __future__ import annotations
+
+import io
+import logging
+import os
+import shutil
+import tempfile
+import weakref
+from typing import Callable, Iterator, Optional
+
+import config
+from engine.tilestore import TileStore
+
+logger = logging.getLogger(__name__)
+
+ChunkKey = tuple[int, int]
+
+
+class Chunk:
+    __slots__ = ("key", "store", "tiles", "idle_sweeps")
+
+    def __init__(self, key: ChunkKey, store: TileStore, tiles: list):
+        self.key = key
+        self.store = store
+        self.tiles = tiles       # [local_y][local_x] -> Tile view
+        self.idle_sweeps = 0
+
+
+class ChunkStore:
+    """Owns every loaded chunk and pages idle ones to `save_dir`.
+
+    `generate(store, tiles, key)` fills a fresh chunk; `make_tiles(store)`
+    builds its Tile views.  Listeners registered with `on_load` / `on_evict`
+    are called with the chunk key so derived layers (glyphs) can follow.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        make_tiles: Callable[[TileStore], list],
+        generate: Optional[Callable[[TileStore, list, ChunkKey], None]] = None,
+        chunk_size: int = config.CHUNK_SIZE,
+        save_dir: str = config.CHUNK_SAVE_DIR,
+    ):
+        self.width = width
+        self.height = height
+        self.chunk_size = max(1, chunk_size)
+        self.save_dir = save_dir           # parent of this store's private page directory
+        self._page_dir: Optional[str] = None   # created on the first eviction
+        self._cleanup: Optional[weakref.finalize] = None
+        self._make_tiles = make_tiles
+        self._generate = generate
+        self._loaded: dict[ChunkKey, Chunk] = {}
+        self._touched: set[ChunkKey] = set()
+        self._evicted: dict[ChunkKey, dict[int, int]] = {}   # key -> resource totals
+        # evicted chunks restored from a checkpoint: key -> .npz bytes, used instead
+        # of the (possibly newer) file in save_dir until the chunk is loaded
+        self._evicted_data: dict[ChunkKey, bytes] = {}
+        # running on-map quantity per resource code over loaded and evicted chunks;
+        # loaded stores update it in place on every resource write
+        self._totals: dict[int, int] = {}
+        self._load_listeners: list[Callable[[ChunkKey], None]] = []
+        self._evict_listeners: list[Callable[[ChunkKey], None]] = []
+
+    # ── Geometry ──────────────────────────────────────────────────────────────
+
+    def key_of(self, x: int, y: int) -> ChunkKey:
+        return x // self.chunk_size, y // self.chunk_size
+
+    def bounds(self, key: ChunkKey) -> tuple[int, int, int, int]:
+        """(x0, y0, width, height) of a chunk, clipped to the map."""
+        x0, y0 = key[0] * self.chunk_size, key[1] * self.chunk_size
+        return (
+            x0, y0,
+            min(self.chunk_size, self.width - x0),
+            min(self.chunk_size, self.height - y0),
+        )
+
+    # ── Listeners ─────────────────────────────────────────────────────────────
+
+    def on_load(self, fn: Callable[[ChunkKey], None]):
+        self._load_listeners.append(fn)
+
+    def on_evict(self, fn: Callable[[ChunkKey], None]):
+        self._evict_listeners.append(fn)
+
+    # ── Access ────────────────────────────────────────────────────────────────
+
+    def get_tile(self, x: int, y: int):
+        """Tile view at (x, y), loading / generating its chunk if needed."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        key = (x // self.chunk_size, y // self.chunk_size)
+        chunk = self._loaded.get(key) or self._load(key)
+        self._touched.add(key)
+        return chunk.tiles[y - chunk.store.y0][x - chunk.store.x0]
+
+    def peek_tile(self, x: int, y: int):
+        """Tile view at (x, y) only if its chunk is already in memory."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        chunk = self._loaded.get(self.key_of(x, y))
+        if chunk is None:
+            return None
+        return chunk.tiles[y - chunk.store.y0][x - chunk.store.x0]
+
+    def chunk(self, key: ChunkKey) -> Chunk:
+        self._touched.add(key)
+        return self._loaded.get(key) or self._load(key)
+
+    def is_loaded(self, key: ChunkKey) -> bool:
+        return key in self._loaded
+
+    def loaded(self) -> list[Chunk]:
+        return list(self._loaded.values())
+
+    def iter_tiles(self) -> Iterator:
+        """Every tile of every loaded chunk (row-major within a chunk)."""
+        for chunk in self._loaded.values():
+            for row in chunk.tiles:
+                yield from row
+
+    def adopt(self, store: TileStore, tiles: list):
+        """Register an already-built chunk (used for eagerly generated maps)."""
+        key = self.key_of(store.x0, store.y0)
+        self._attach(store)
+        self._loaded[key] = Chunk(key, store, tiles)
+        for fn in self._load_listeners:
+            fn(key)
+
+    # ── Whole-map passes ──────────────────────────────────────────────────────
+
+    def regrow(self, amount: int, resource_code: Optional[int] = None) -> list[tuple[int, int]]:
+        """Regrow resources in loaded chunks; evicted chunks are frozen until reloaded."""
+        emptied: list[tuple[int, int]] = []
+        for chunk in self._loaded.values():
+            emptied.extend(chunk.store.regrow(amount, resource_code))
+        return emptied
+
+    def evicted_totals(self) -> dict[ChunkKey, dict[int, int]]:
+        return {key: dict(totals) for key, totals in self._evicted.items()}
+
+    def evicted_data(self) -> dict[ChunkKey, bytes]:
+        """Saved .npz bytes of every evicted chunk, as of now (for checkpoints)."""
+        data = {}
+        for key in self._evicted:
+            blob = self._evicted_data.get(key)
+            if blob is None:
+                with open(self._path(key), "rb") as f:
+                    blob = f.read()
+            data[key] = blob
+        return data
+
+    def adopt_evicted(
+        self,
+        evicted: dict[ChunkKey, dict[int, int]],
+        data: Optional[dict[ChunkKey, bytes]] = None,
+    ):
+        """Register paged-out chunks with their resource totals.
+
+        With `data` (from `evicted_data`) the chunks load from those bytes;
+        otherwise from their files in `save_dir`.
+        """
+        for key, totals in evicted.items():
+            self._evicted[key] = dict(totals)
+            self._add_totals(totals, 1)
+            if data is not None:
+                self._evicted_data[key] = data[key]
+
+    def resource_totals(self) -> dict[int, int]:
+        """On-map quantity per resource code (running totals, O(resource types))."""
+        return {code: qty for code, qty in self._totals.items() if qty}
+
+    def count_resource_totals(self) -> dict[int, int]:
+        """Same as `resource_totals`, recounted from every loaded layer."""
+        totals: dict[int, int] = {}
+        sources = [c.store.resource_totals() for c in self._loaded.values()]
+        sources.extend(self._evicted.values())
+        for source in sources:
+            for code, qty in source.items():
+                totals[code] = totals.get(code, 0) + qty
+        return {code: qty for code, qty in totals.items() if qty}
+
+    def _add_totals(self, totals: dict[int, int], sign: int):
+        for code, qty in totals.items():
+            self._totals[code] = self._totals.get(code, 0) + sign * qty
+
+    def _attach(self, store: TileStore):
+        """Count a freshly generated or loaded store and let it keep the totals current."""
+        self._add_totals(store.resource_totals(), 1)
+        store.totals = self._totals
+
+    # ── Loading & eviction ────────────────────────────────────────────────────
+
+    def _path(self, key: ChunkKey) -> str:
+        if self._page_dir is None:
+            os.makedirs(self.save_dir, exist_ok=True)
+            self._page_dir = tempfile.mkdtemp(prefix="world_", dir=self.save_dir)
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self._page_dir, True)
+        return os.path.join(self._page_dir, f"chunk_{key[0]}_{key[1]}.npz")
+
+    def close(self):
+        """Delete this store's page directory (evicted chunks can no longer be reloaded)."""
+        if self._cleanup is not None:
+            self._cleanup()
+            self._cleanup = None
+            self._page_dir = None
+
+    def _load(self, key: ChunkKey) -> Chunk:
+        if key in self._evicted:
+            blob = self._evicted_data.pop(key, None)
+            store = TileStore.load(io.BytesIO(blob) if blob is not None else self._path(key))
+            self._add_totals(self._evicted.pop(key), -1)
+            tiles = self._make_tiles(store)
+        else:
+            x0, y0, w, h = self.bounds(key)
+            store = TileStore(w, h, x0, y0)
+            tiles = self._make_tiles(store)
+            if self._generate is not None:
+                self._generate(store, tiles, key)
+        self._attach(store)
+        chunk = Chunk(key, store, tiles)
+        self._loaded[key] = chunk
+        for fn in self._load_listeners:
+            fn(key)
+        return chunk
+
+    def sweep(self, evict_after: int = config.CHUNK_EVICT_AFTER) -> list[ChunkKey]:
+        """Age untouched chunks and write the long-idle, unoccupied ones to disk."""
+        evicted = []
+        for key, chunk in list(self._loaded.items()):
+            if key in self._touched:
+                chunk.idle_sweeps = 0
+                continue
+            chunk.idle_sweeps += 1
+            if chunk.idle_sweeps >= evict_after and not chunk.store.is_occupied():
+                self._evict(chunk)
+                evicted.append(key)
+        self._touched.clear()
+        if evicted:
+            logger.debug(f"evicted {len(evicted)} chunks, {len(self._loaded)} loaded")
+        return evicted
+
+    def _evict(self, chunk: Chunk):
+        chunk.store.save(self._path(chunk.key))
+        self._evicted[chunk.key] = chunk.store.resource_totals()
+        chunk.store.totals = None
+        del self._loaded[chunk.key]
+        for fn in self._evict_listeners:
+            fn(chunk.key)
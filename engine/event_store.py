@@ -0,0 +1,77 @@
+"""Ring buffer of the world's most recent events.
+
+`World.recent_events` keeps the last RECENT_EVENTS_MAX dispatched
+`WorldEvent`s in a bounded deque, so recording one is O(1).  Each event
+renders its summary once, when the EventBus dispatches it, and caches it;
+readers pull what they need without re-rendering:
+
+  * `summaries(n)` — the last n summary lines (prompt builders, god context);
+  * `query(...)`   — events filtered by tick range, actor and type.
+
+Events are not mutated after dispatch, so `snapshot()` shares them.
+"""
+from __future__ import annotations
+
+from collections import deque
+from itertools import islice
+from typing import Iterator, Optional
+
+import config
+
+
+class EventStore:
+    def __init__(self, capacity: int = config.RECENT_EVENTS_MAX):
+        self._events: deque = deque(maxlen=capacity)
+        self.version = 0                  # bumped on every add
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __iter__(self) -> Iterator:
+        """Events, oldest first."""
+        return iter(self._events)
+
+    def add(self, event):
+        self._events.append(event)
+        self.version += 1
+
+    def latest(self, n: int) -> list:
+        """The last `n` events, oldest first."""
+        if n <= 0:
+            return []
+        return list(islice(reversed(self._events), n))[::-1]
+
+    def summaries(self, n: int) -> list[str]:
+        """Cached summary lines of the last `n` events, oldest first."""
+        return [e.summary for e in self.latest(n)]
+
+    def query(
+        self,
+        since_tick: Optional[int] = None,
+        until_tick: Optional[int] = None,
+        actor_id: Optional[str] = None,
+        types=None,
+        limit: Optional[int] = None,
+    ) -> list:
+        """Events in [since_tick, until_tick] by `actor_id` of `types`; the newest `limit`, oldest first."""
+        matched = []
+        for e in reversed(self._events):
+            if since_tick is not None and e.tick < since_tick:
+                break                     # events are recorded in tick order
+            if until_tick is not None and e.tick > until_tick:
+                continue
+            if actor_id is not None and e.actor_id != actor_id:
+                continue
+            if types is not None and e.event_type not in types:
+                continue
+            matched.append(e)
+            if limit is not None and len(matched) >= limit:
+                break
+        matched.reverse()
+        return matched
+
+    def snapshot(self) -> "EventStore":
+        snap = EventStore.__new__(EventStore)
+        snap._events = deque(self._events, maxlen=self._events.maxlen)
+        snap.version = self.version
+        return snap
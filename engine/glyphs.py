@@ -0,0 +1,161 @@
+"""Character-layer view of the map: one display glyph per tile.
+
+The layer is maintained incrementally by WorldManager (move, gather, build,
+spawn, regrowth) so that NPC vision windows are plain row slices instead of
+a per-tile walk with actor lookups.  Glyphs are kept per loaded chunk.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from engine.world import Tile, World
+
+TILE_CHARS = {
+    "grass": "·", "water": "≈", "rock": "▲", "forest": "♣", "town": "⌂",
+}
+RESOURCE_CHARS = {
+    "wood": "W", "stone": "S", "ore": "O", "food": "F", "herb": "H",
+}
+FURNITURE_CHARS = {"bed": "B", "table": "T", "chair": "C"}
+
+OUT_OF_BOUNDS = "X"
+
+
+def fixture_glyph(tile: "Tile") -> str:
+    """Glyph of the exchange / furniture on a tile ('' if none).
+
+    Fixtures are drawn on top of everything, including the viewer itself.
+    """
+    if tile.is_exchange:
+        return "E"
+    return FURNITURE_CHARS.get(tile.furniture or "", "")
+
+
+class GlyphLayer:
+    """Per-chunk row-major glyph grids: fixture > player > first NPC > resource > terrain.
+
+    Glyphs exist only for loaded chunks; the layer follows the world's
+    ChunkStore load / evict notifications.
+    """
+
+    def __init__(self, world: "World"):
+        self.width = world.width
+        self.height = world.height
+        self._world = world
+        self._chunk_size = world.chunks.chunk_size
+        self._chunks: dict[tuple[int, int], list[list[str]]] = {}
+        # per-chunk stamp of the last write, so snapshots can share unchanged chunks
+        self._stamps: dict[tuple[int, int], int] = {}
+        self._stamp = 0
+
+    @classmethod
+    def build(cls, world: "World") -> "GlyphLayer":
+        layer = cls(world)
+        for chunk in world.chunks.loaded():
+            layer.build_chunk(chunk.key)
+        world.chunks.on_load(layer.build_chunk)
+        world.chunks.on_evict(layer.drop_chunk)
+        return layer
+
+    def build_chunk(self, key: tuple[int, int]):
+        x0, y0, w, h = self._world.chunks.bounds(key)
+        self._chunks[key] = [["?"] * w for _ in range(h)]
+        for y in range(y0, y0 + h):
+            for x in range(x0, x0 + w):
+                self.refresh(self._world, x, y)
+
+    def drop_chunk(self, key: tuple[int, int]):
+        self._chunks.pop(key, None)
+        self._stamps.pop(key, None)
+
+    def refresh(self, world: "World", x: int, y: int):
+        """Recompute the glyph of a single tile from current world state."""
+        rows = self._chunks.get((x // self._chunk_size, y // self._chunk_size))
+        tile = world.chunks.peek_tile(x, y)
+        if rows is None or tile is None:
+            return
+        ch = fixture_glyph(tile)
+        if not ch:
+            if tile.player_here:
+                ch = "P"
+            elif tile.npc_ids and (npc := world.get_npc(tile.npc_ids[0])):
+                ch = npc.name[0].upper()
+            elif tile.resource and tile.resource.quantity > 0:
+                ch = RESOURCE_CHARS.get(tile.resource.resource_type.value, "?")
+            else:
+                ch = TILE_CHARS.get(tile.tile_type.value, "?")
+        rows[y % self._chunk_size][x % self._chunk_size] = ch
+        self._stamp += 1
+        self._stamps[(x // self._chunk_size, y // self._chunk_size)] = self._stamp
+
+    def _rows(self, key: tuple[int, int]) -> list[list[str]]:
+        rows = self._chunks.get(key)
+        if rows is None:
+            self._world.chunks.chunk(key)   # load notification builds the glyphs
+            rows = self._chunks[key]
+        return rows
+
+    def window(self, cx: int, cy: int, radius: int) -> list[list[str]]:
+        """Return the (2r+1)² window centred on (cx, cy), padded with 'X'.
+
+        Each row is stitched from per-chunk row slices; chunks the window
+        reaches into are loaded on demand.
+        """
+        size = 2 * radius + 1
+        cs = self._chunk_size
+        x_start, x_end = cx - radius, cx + radius + 1
+        out = []
+        for ty in range(cy - radius, cy + radius + 1):
+            if not 0 <= ty < self.height:
+                out.append([OUT_OF_BOUNDS] * size)
+                continue
+            row: list[str] = []
+            x = x_start
+            while x < x_end:
+                if x < 0:
+                    stop = min(x_end, 0)
+                    row += [OUT_OF_BOUNDS] * (stop - x)
+                elif x >= self.width:
+                    stop = x_end
+                    row += [OUT_OF_BOUNDS] * (stop - x)
+                else:
+                    key = (x // cs, ty // cs)
+                    kx0 = key[0] * cs
+                    stop = min(x_end, kx0 + cs, self.width)
+                    row += self._rows(key)[ty - key[1] * cs][x - kx0:stop - kx0]
+                x = stop
+            out.append(row)
+        return out
+
+    def snapshot(self, previous: Optional["GlyphSnapshot"] = None) -> "GlyphSnapshot":
+        """Frozen copy of the loaded glyphs; chunks unchanged since `previous` are shared."""
+        shared = previous._chunks if previous is not None else {}
+        chunks = {}
+        for key, rows in self._chunks.items():
+            stamp = self._stamps.get(key, 0)
+            old = shared.get(key)
+            if old is not None and old[0] == stamp:
+                chunks[key] = old
+            else:
+                chunks[key] = (stamp, tuple(tuple(row) for row in rows))
+        return GlyphSnapshot(self.width, self.height, self._chunk_size, chunks)
+
+
+class GlyphSnapshot(GlyphLayer):
+    """Read-only GlyphLayer (see `GlyphLayer.snapshot`); `window` never loads chunks."""
+
+    def __init__(self, width: int, height: int, chunk_size: int, chunks: dict):
+        self.width = width
+        self.height = height
+        self._chunk_size = chunk_size
+        self._chunks = chunks          # key -> (stamp, rows)
+
+    def refresh(self, world: "World", x: int, y: int):
+        raise TypeError("GlyphSnapshot is read-only")
+
+    def _rows(self, key: tuple[int, int]):
+        entry = self._chunks.get(key)
+        if entry is None:              # not loaded when the snapshot was taken
+            return ((OUT_OF_BOUNDS,) * self._chunk_size,) * self._chunk_size
+        return entry[1]
@@ -0,0 +1,116 @@
+"""Bounded NPC inbox: prioritised, coalescing, read in sequence order.
+
+Events reach an NPC's inbox between two of its decisions.  A slow thinker
+in a busy area would otherwise collect dozens of "X 移动到 (a,b)" lines, all
+of which end up in its next prompt.  The inbox therefore
+
+  * holds at most NPC_INBOX_MAX entries, each clipped to NPC_INBOX_LINE_MAX
+    characters, so the prompt section it renders stays bounded;
+  * coalesces entries that share a key (one per actor for movement) into a
+    single summary: the latest text plus how many events it stands for;
+  * evicts by priority when full — the lowest-priority, oldest entry goes
+    first, and an incoming entry below everything held is dropped.
+
+Every write stamps the entry with a fresh sequence number.  An agent that
+built its prompt from a snapshot consumes only entries up to the snapshot's
+`last_seq`, so an entry updated after the snapshot (a later move) stays
+unread.  Entries are immutable; `copy()` shares them.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+import config
+
+# Priorities (higher survives longer)
+LOW = 0        # movement, gathering, resting …
+NORMAL = 1     # weather, god commentary, market, crafting …
+HIGH = 2       # talk and trade
+
+
+@dataclass(frozen=True, slots=True)
+class InboxEntry:
+    seq: int
+    priority: int
+    text: str
+    key: Any = None          # coalescing key (e.g. ("move", actor_id)) or None
+    count: int = 1           # events this entry summarises
+    event: Any = None        # source WorldEvent, when there is one
+
+    def render(self) -> str:
+        if self.count > 1:
+            return f"{self.text}（共{self.count}次）"
+        return self.text
+
+
+class Inbox:
+    def __init__(self, capacity: int = config.NPC_INBOX_MAX):
+        self.capacity = capacity
+        self._entries: dict[int, InboxEntry] = {}   # seq -> entry, oldest first
+        self._keyed: dict[Any, int] = {}            # coalescing key -> seq
+        self.last_seq = 0
+        self.dropped = 0                            # entries evicted or refused since created
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[str]:
+        """Rendered messages, oldest first."""
+        return (entry.render() for entry in self._entries.values())
+
+    def __repr__(self) -> str:
+        return f"Inbox({list(self)!r})"
+
+    def entries(self) -> list[InboxEntry]:
+        return list(self._entries.values())
+
+    def add(self, text: str, priority: int = NORMAL, key: Any = None, event: Any = None):
+        if len(text) > config.NPC_INBOX_LINE_MAX:
+            text = text[:config.NPC_INBOX_LINE_MAX - 1] + "…"
+        count = 1
+        if key is not None:
+            old_seq = self._keyed.pop(key, None)
+            if old_seq is not None:
+                old = self._entries.pop(old_seq)
+                count += old.count
+                priority = max(priority, old.priority)
+        if len(self._entries) >= self.capacity:
+            victim = min(self._entries.values(), key=lambda e: (e.priority, e.seq))
+            self.dropped += 1
+            if victim.priority > priority:
+                return
+            self._remove(victim)
+        self.last_seq += 1
+        self._entries[self.last_seq] = InboxEntry(self.last_seq, priority, text, key, count, event)
+        if key is not None:
+            self._keyed[key] = self.last_seq
+
+    def has_news(self, after_seq: int, min_priority: int = NORMAL) -> bool:
+        """Whether an entry of at least `min_priority` was written after `after_seq`."""
+        return any(
+            entry.seq > after_seq and entry.priority >= min_priority
+            for entry in self._entries.values()
+        )
+
+    def consume(self, upto_seq: int):
+        """Drop entries written at or before `upto_seq` (what an agent has just read)."""
+        for seq in [s for s in self._entries if s <= upto_seq]:
+            self._remove(self._entries[seq])
+
+    def clear(self):
+        self._entries.clear()
+        self._keyed.clear()
+
+    def copy(self) -> "Inbox":
+        snap = Inbox(self.capacity)
+        snap._entries = dict(self._entries)
+        snap._keyed = dict(self._keyed)
+        snap.last_seq = self.last_seq
+        snap.dropped = self.dropped
+        return snap
+
+    def _remove(self, entry: InboxEntry):
+        del self._entries[entry.seq]
+        if entry.key is not None and self._keyed.get(entry.key) == entry.seq:
+            del self._keyed[entry.key]
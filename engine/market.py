@@ -0,0 +1,350 @@
+"""Market bookkeeping: running supply/demand inputs and bounded price history.
+
+Market supply is the on-map quantity of each item plus what NPCs carry;
+demand grows with the number of NPCs low on food or energy.  Rather than
+walking every tile and NPC at each update, both are kept as counters:
+
+  * on-map quantities — `ChunkStore` totals, updated by every TileStore
+    resource write (gather, regrowth, spawns, chunk generation);
+  * NPC holdings and the low-food / low-energy head counts — this ledger,
+    updated by the Inventory item setters and the NPC energy setter, so
+    gather, craft, sell, buy, trade and eating all flow through it.
+
+A market update is therefore O(items).  `recount` rebuilds the same numbers
+the slow way; `verify_ledger` compares the two (see config.MARKET_CHECK_LEDGER).
+
+`OrderBook` collects exchange sell / buy orders during a tick;
+`WorldManager.clear_orders` fills them all at one `clearing_price` per item
+at the tick boundary, shifted by the batch's net volume.
+
+`PriceHistory` keeps every item's price samples in a fixed-size NumPy ring
+and rolls them up into OHLC candles per game hour, day and season, each in
+its own ring, so a long session keeps trend data at bounded memory.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+import config
+from config_narrative import DAYS_PER_SEASON
+
+RESOLUTIONS = ("hour", "day", "season")
+
+
+class MarketLedger:
+    """Counters over the NPCs attached to one World."""
+
+    def __init__(self):
+        self.held: dict[str, int] = {item: 0 for item in config.MARKET_BASE_PRICES}
+        self.low_food = 0      # NPCs with food < MARKET_LOW_FOOD
+        self.low_energy = 0    # NPCs with energy < MARKET_LOW_ENERGY
+
+    # ── Membership ────────────────────────────────────────────────────────────
+
+    def attach(self, npc):
+        """Start counting `npc`; its inventory and energy report changes from now on."""
+        npc._ledger = self
+        npc.inventory._ledger = self
+        self._add(npc, 1)
+
+    def detach(self, npc):
+        if npc._ledger is not self:
+            return
+        self._add(npc, -1)
+        npc._ledger = None
+        npc.inventory._ledger = None
+
+    def _add(self, npc, sign: int):
+        inv = npc.inventory
+        for item in self.held:
+            self.held[item] += sign * inv.get(item)
+        self.low_food += sign * (inv.food < config.MARKET_LOW_FOOD)
+        self.low_energy += sign * (npc.energy < config.MARKET_LOW_ENERGY)
+
+    # ── Change notifications ──────────────────────────────────────────────────
+
+    def item_changed(self, item: str, old: int, new: int):
+        if item in self.held:
+            self.held[item] += new - old
+        if item == "food":
+            low = config.MARKET_LOW_FOOD
+            self.low_food += (new < low) - (old < low)
+
+    def energy_changed(self, old: int, new: int):
+        low = config.MARKET_LOW_ENERGY
+        self.low_energy += (new < low) - (old < low)
+
+    # ── Market inputs ─────────────────────────────────────────────────────────
+
+    def supply(self, on_map: dict[str, int]) -> dict[str, float]:
+        """Item -> on-map quantity (`World.resource_supply()`) plus NPC holdings."""
+        return {item: float(on_map.get(item, 0) + held) for item, held in self.held.items()}
+
+    def demand(self) -> dict[str, float]:
+        return _demand(self.low_food, self.low_energy)
+
+
+def _demand(low_food: int, low_energy: int) -> dict[str, float]:
+    demand = {item: 1.0 for item in config.MARKET_BASE_PRICES}
+    demand["food"] = demand.get("food", 1.0) + 2.0 * low_food            # low food → demand food
+    demand["potion"] = demand.get("potion", 1.0) + 1.5 * low_energy      # low energy → potions / bread
+    demand["bread"] = demand.get("bread", 1.0) + 1.0 * low_energy
+    return demand
+
+
+def recount(world) -> tuple[dict[str, float], dict[str, float]]:
+    """(supply, demand) computed from scratch by walking every chunk and NPC."""
+    supply: dict[str, float] = {item: 0.0 for item in config.MARKET_BASE_PRICES}
+    for rt, qty in world.count_resource_supply().items():
+        if rt in supply:
+            supply[rt] += qty
+    for npc in world.npcs:
+        for item in supply:
+            supply[item] += npc.inventory.get(item)
+    low_food = sum(npc.inventory.food < config.MARKET_LOW_FOOD for npc in world.npcs)
+    low_energy = sum(npc.energy < config.MARKET_LOW_ENERGY for npc in world.npcs)
+    return supply, _demand(low_food, low_energy)
+
+
+def verify_ledger(world) -> list[str]:
+    """Differences between the running counters and a full recount (empty when consistent)."""
+    ledger = world.market_ledger
+    counted = recount(world)
+    running = (ledger.supply(world.resource_supply()), ledger.demand())
+    problems = []
+    for label, fast, slow in zip(("supply", "demand"), running, counted):
+        for item in slow:
+            if fast.get(item) != slow[item]:
+                problems.append(f"{label}[{item}]: running {fast.get(item)} != recount {slow[item]}")
+    return problems
+
+
+# ── Order book ────────────────────────────────────────────────────────────────
+
+SELL = "sell"
+BUY = "buy"
+
+
+@dataclass
+class Order:
+    seq: int
+    actor_id: str
+    side: str                  # SELL | BUY
+    item: str
+    qty: int                   # sell: items taken into escrow; buy: units wanted
+    escrow: float = 0.0        # buy: gold taken into escrow at the submission price
+
+
+class OrderBook:
+    """Exchange orders waiting for the next batch clearing."""
+
+    def __init__(self):
+        self.orders: list[Order] = []
+        self._seq = 0
+        self.last_clearing: dict[str, dict] = {}   # item -> {tick, price, sold, bought}
+
+    def __len__(self) -> int:
+        return len(self.orders)
+
+    def submit(self, actor_id: str, side: str, item: str, qty: int, escrow: float = 0.0) -> Order:
+        order = Order(self._seq, actor_id, side, item, qty, escrow)
+        self._seq += 1
+        self.orders.append(order)
+        return order
+
+    def take(self) -> dict[str, list[Order]]:
+        """Remove every pending order, grouped by item in submission order."""
+        by_item: dict[str, list[Order]] = {}
+        for order in self.orders:
+            by_item.setdefault(order.item, []).append(order)
+        self.orders = []
+        return by_item
+
+    def pending(self, actor_id: str) -> list[Order]:
+        return [o for o in self.orders if o.actor_id == actor_id]
+
+
+def clearing_price(current: float, min_p: float, max_p: float, sold: int, bought: int) -> float:
+    """One batch's price: `current` shifted by net order flow, capped and clamped."""
+    impact = config.MARKET_IMPACT_PER_UNIT * (bought - sold)
+    impact = max(-config.MARKET_IMPACT_MAX, min(config.MARKET_IMPACT_MAX, impact))
+    return round(max(min_p, min(max_p, current * (1 + impact))), 2)
+
+
+def affordable(escrow: float, price: float, qty: int) -> int:
+    """Most units (≤ qty) whose cost, rounded like every gold amount, fits in `escrow`."""
+    n = min(qty, int(escrow / price))
+    while n < qty and round((n + 1) * price, 1) <= escrow:
+        n += 1
+    while n > 0 and round(n * price, 1) > escrow:
+        n -= 1
+    return n
+
+
+# ── Price history ─────────────────────────────────────────────────────────────
+
+def bucket_of(resolution: str, day: int, hour: float) -> int:
+    """Candle index of a game time at `resolution` (hours / days since day 1, or season)."""
+    if resolution == "hour":
+        return (day - 1) * 24 + int(hour)
+    if resolution == "day":
+        return day
+    return (day - 1) // DAYS_PER_SEASON
+
+
+def bucket_days(resolution: str, bucket: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """(first day, last day) of each candle index."""
+    if resolution == "hour":
+        day = bucket // 24 + 1
+        return day, day
+    if resolution == "day":
+        return bucket, bucket
+    return bucket * DAYS_PER_SEASON + 1, (bucket + 1) * DAYS_PER_SEASON
+
+
+class _Ring:
+    """Slot bookkeeping for a fixed-capacity ring; subclasses own the arrays."""
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self.count = 0
+        self._last = -1          # slot of the newest row
+
+    def _push(self) -> int:
+        self._last = (self._last + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return self._last
+
+    def _order(self) -> np.ndarray:
+        """Slots from oldest to newest."""
+        return (np.arange(self.count) + self._last + 1 - self.count) % self.capacity
+
+
+class CandleSeries(_Ring):
+    """OHLC candles of every item at one resolution."""
+
+    def __init__(self, resolution: str, capacity: int, n_items: int):
+        super().__init__(capacity)
+        self.resolution = resolution
+        self.bucket = np.zeros(self.capacity, dtype=np.int64)
+        self.ohlc = np.zeros((self.capacity, 4, n_items))    # open, high, low, close
+
+    def add(self, bucket: int, prices: np.ndarray):
+        if self.count and self.bucket[self._last] == bucket:
+            candle = self.ohlc[self._last]
+            np.maximum(candle[1], prices, out=candle[1])
+            np.minimum(candle[2], prices, out=candle[2])
+            candle[3] = prices
+            return
+        slot = self._push()
+        self.bucket[slot] = bucket
+        self.ohlc[slot] = prices
+
+
+class PriceHistory(_Ring):
+    """Bounded per-item price samples plus hour / day / season OHLC rollups."""
+
+    def __init__(
+        self,
+        items,
+        capacity: int = config.MARKET_HISTORY_SIZE,
+        candles: Optional[dict] = None,
+    ):
+        super().__init__(capacity)
+        self.items = tuple(items)
+        self._column = {item: i for i, item in enumerate(self.items)}
+        self.tick = np.zeros(self.capacity, dtype=np.int64)
+        self.day = np.zeros(self.capacity, dtype=np.int32)
+        self.prices = np.zeros((self.capacity, len(self.items)))
+        candles = config.MARKET_CANDLES if candles is None else candles
+        self.candles = {
+            res: CandleSeries(res, candles[res], len(self.items))
+            for res in RESOLUTIONS if candles.get(res)
+        }
+        self.version = 0         # bumped per sample; WorldView snapshots compare it
+        self._recent: tuple = (-1, 0, {})
+
+    def record(self, tick: int, day: int, hour: float, prices: dict):
+        """Append one sample of every item's price (missing items repeat their last price)."""
+        last = self.prices[self._last] if self.count else None
+        row = np.array([
+            prices[item] if item in prices else (last[i] if last is not None else 0.0)
+            for i, item in enumerate(self.items)
+        ])
+        slot = self._push()
+        self.tick[slot] = tick
+        self.day[slot] = day
+        self.prices[slot] = row
+        for res, series in self.candles.items():
+            series.add(bucket_of(res, day, hour), row)
+        self.version += 1
+
+    def series(self, item: str, n: Optional[int] = None) -> list[float]:
+        """The last `n` (default: all retained) samples of one item, oldest first."""
+        col = self._column.get(item)
+        if col is None:
+            return []
+        order = self._order()
+        if n is not None:
+            order = order[-n:] if n > 0 else order[:0]
+        return self.prices[order, col].tolist()
+
+    def recent(self, n: int = config.MARKET_HISTORY_BROADCAST) -> dict[str, list[float]]:
+        """{item: last `n` samples} — cached until the next sample (sent every broadcast)."""
+        version, size, cached = self._recent
+        if version != self.version or size != n:
+            cached = {item: self.series(item, n) for item in self.items}
+            self._recent = (self.version, n, cached)
+        return cached
+
+    def query(self, resolution: str = "tick", days: Optional[int] = None, today: int = 0) -> dict:
+        """Samples (`tick`) or OHLC candles covering the last `days` game days up to `today`."""
+        cutoff = today - days + 1 if days is not None else None
+        if resolution == "tick":
+            order = self._order()
+            if cutoff is not None:
+                order = order[self.day[order] >= cutoff]
+            return {
+                "resolution": resolution,
+                "tick": self.tick[order].tolist(),
+                "day": self.day[order].tolist(),
+                "items": {item: self.prices[order, i].round(2).tolist() for i, item in enumerate(self.items)},
+            }
+        series = self.candles.get(resolution)
+        if series is None:
+            raise ValueError(f"unknown resolution: {resolution}")
+        order = series._order()
+        first, last = bucket_days(resolution, series.bucket[order])
+        if cutoff is not None:
+            keep = last >= cutoff
+            order, first = order[keep], first[keep]
+        ohlc = series.ohlc[order].round(2)
+        out = {"resolution": resolution, "day": first.tolist()}
+        if resolution == "hour":
+            out["hour"] = (series.bucket[order] % 24).tolist()
+        out["items"] = {
+            item: {
+                "open": ohlc[:, 0, i].tolist(),
+                "high": ohlc[:, 1, i].tolist(),
+                "low": ohlc[:, 2, i].tolist(),
+                "close": ohlc[:, 3, i].tolist(),
+            }
+            for i, item in enumerate(self.items)
+        }
+        return out
+
+    def snapshot(self) -> "PriceHistory":
+        """Detached copy (arrays copied) for WorldView."""
+        snap = PriceHistory.__new__(PriceHistory)
+        snap.__dict__.update(self.__dict__)
+        snap.tick, snap.day, snap.prices = self.tick.copy(), self.day.copy(), self.prices.copy()
+        snap.candles = {}
+        for res, series in self.candles.items():
+            copy = CandleSeries.__new__(CandleSeries)
+            copy.__dict__.update(series.__dict__)
+            copy.bucket, copy.ohlc = series.bucket.copy(), series.ohlc.copy()
+            snap.candles[res] = copy
+        return snap
@@ -0,0 +1,265 @@
+"""Pathfinding service: cached BFS flow fields plus A* for arbitrary targets.
+
+Movement is 8-directional (dx, dy ∈ {-1, 0, 1}) and water is impassable, the
+same rules `WorldManager._do_move` enforces, so one step of a path is one
+`move` action.
+
+Flow fields answer "which way to the nearest X" for a fixed set of target
+kinds — the exchange, each resource type (tiles with quantity > 0) and each
+furniture type.  A field is a distance grid over the loaded part of the map,
+computed by a vectorized multi-source BFS the first time it is asked for and
+cached until a tile it depends on changes: `World.tile_changed` forwards every
+tile update here, and a field is dropped only if that tile's passability or
+target membership differs from what the field was built with.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+from engine.world import RESOURCE_CODES, TILE_CODES, ResourceType, TileType
+
+if TYPE_CHECKING:
+    from engine.world import Tile, World
+
+EXCHANGE = "exchange"
+
+# 8 neighbour steps; straight moves first so ties prefer them
+STEPS = [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+_WATER = TILE_CODES[TileType.WATER]
+_RESOURCE_KINDS = {r.value: RESOURCE_CODES[r] for r in ResourceType}
+
+DIRECTION_NAMES = {
+    (0, -1): "北", (0, 1): "南", (1, 0): "东", (-1, 0): "西",
+    (1, -1): "东北", (-1, -1): "西北", (1, 1): "东南", (-1, 1): "西南",
+}
+
+
+def direction_name(dx: int, dy: int) -> str:
+    """Compass name of a (dx, dy) offset; y grows southwards."""
+    return DIRECTION_NAMES.get(((dx > 0) - (dx < 0), (dy > 0) - (dy < 0)), "原地")
+
+
+class FlowField:
+    """Distance-to-nearest-target grid over the rectangle at (x0, y0)."""
+
+    __slots__ = ("kind", "x0", "y0", "dist", "passable", "targets")
+
+    def __init__(self, kind: str, x0: int, y0: int, passable: np.ndarray, targets: np.ndarray):
+        self.kind = kind
+        self.x0 = x0
+        self.y0 = y0
+        self.passable = passable
+        self.targets = targets & passable
+        self.dist = _bfs(self.targets, passable)
+
+    def contains(self, x: int, y: int) -> bool:
+        h, w = self.dist.shape
+        return 0 <= x - self.x0 < w and 0 <= y - self.y0 < h
+
+    def distance(self, x: int, y: int) -> Optional[int]:
+        if not self.contains(x, y):
+            return None
+        d = int(self.dist[y - self.y0, x - self.x0])
+        return d if d >= 0 else None
+
+    def step(self, x: int, y: int) -> Optional[tuple[int, int]]:
+        """Next (dx, dy) downhill from (x, y); None at a target or if unreachable."""
+        d = self.distance(x, y)
+        if not d:
+            return None
+        for dx, dy in STEPS:
+            nd = self.distance(x + dx, y + dy)
+            if nd is not None and nd < d:
+                return dx, dy
+        return None
+
+    def nearest(self, x: int, y: int) -> Optional[tuple[int, int]]:
+        """Coordinates of the target reached by following the field from (x, y)."""
+        if self.distance(x, y) is None:
+            return None
+        while (s := self.step(x, y)) is not None:
+            x, y = x + s[0], y + s[1]
+        return x, y
+
+
+def _bfs(sources: np.ndarray, passable: np.ndarray) -> np.ndarray:
+    """Multi-source 8-neighbour BFS by repeated frontier dilation (-1 = unreachable)."""
+    dist = np.full(passable.shape, -1, dtype=np.int32)
+    dist[sources] = 0
+    reached = sources.copy()
+    frontier = sources
+    d = 0
+    while frontier.any():
+        d += 1
+        grown = np.zeros_like(frontier)
+        grown[1:, :] |= frontier[:-1, :]
+        grown[:-1, :] |= frontier[1:, :]
+        grown[:, 1:] |= frontier[:, :-1]
+        grown[:, :-1] |= frontier[:, 1:]
+        grown[1:, 1:] |= frontier[:-1, :-1]
+        grown[1:, :-1] |= frontier[:-1, 1:]
+        grown[:-1, 1:] |= frontier[1:, :-1]
+        grown[:-1, :-1] |= frontier[1:, 1:]
+        grown &= passable & ~reached
+        dist[grown] = d
+        reached |= grown
+        frontier = grown
+    return dist
+
+
+class PathService:
+    """Per-world cache of flow fields and an A* search over `World.get_tile`."""
+
+    def __init__(self, world: "World"):
+        self._world = world
+        self._fields: dict[str, FlowField] = {}
+        # Loading / evicting a chunk changes the field domain
+        world.chunks.on_load(self._drop_all)
+        world.chunks.on_evict(self._drop_all)
+
+    def _drop_all(self, _key=None):
+        self._fields.clear()
+
+    # ── Flow fields ───────────────────────────────────────────────────────────
+
+    def field(self, kind: str) -> Optional[FlowField]:
+        """Flow field to the nearest `kind` ("exchange", a resource or furniture name)."""
+        f = self._fields.get(kind)
+        if f is None:
+            f = self._build(kind)
+            if f is not None:
+                self._fields[kind] = f
+        return f
+
+    def distance(self, kind: str, x: int, y: int) -> Optional[int]:
+        f = self.field(kind)
+        return f.distance(x, y) if f else None
+
+    def step_toward(self, kind: str, x: int, y: int) -> Optional[tuple[int, int]]:
+        f = self.field(kind)
+        return f.step(x, y) if f else None
+
+    def nearest(self, kind: str, x: int, y: int) -> Optional[tuple[int, int]]:
+        f = self.field(kind)
+        return f.nearest(x, y) if f else None
+
+    def _build(self, kind: str) -> Optional[FlowField]:
+        chunks = self._world.chunks.loaded()
+        if not chunks:
+            return None
+        x0 = min(c.store.x0 for c in chunks)
+        y0 = min(c.store.y0 for c in chunks)
+        x1 = max(c.store.x0 + c.store.width for c in chunks)
+        y1 = max(c.store.y0 + c.store.height for c in chunks)
+        passable = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+        targets = np.zeros_like(passable)
+        for c in chunks:
+            s = c.store
+            window = (slice(s.y0 - y0, s.y0 - y0 + s.height), slice(s.x0 - x0, s.x0 - x0 + s.width))
+            passable[window] = s.tile_type != _WATER
+            if kind == EXCHANGE:
+                targets[window] = s.exchange
+            elif kind in _RESOURCE_KINDS:
+                targets[window] = (s.resource_type == _RESOURCE_KINDS[kind]) & (s.quantity > 0)
+            elif kind in s.furniture_names:
+                targets[window] = s.furniture == s.furniture_names.index(kind)
+        return FlowField(kind, x0, y0, passable, targets)
+
+    def tile_changed(self, x: int, y: int):
+        """Drop cached fields whose view of tile (x, y) is now out of date."""
+        if not self._fields:
+            return
+        tile = self._world.chunks.peek_tile(x, y)
+        if tile is None:
+            return
+        passable = tile.tile_type != TileType.WATER
+        for kind, f in list(self._fields.items()):
+            if not f.contains(x, y):
+                continue
+            lx, ly = x - f.x0, y - f.y0
+            if f.passable[ly, lx] != passable or f.targets[ly, lx] != (passable and _is_target(tile, kind)):
+                del self._fields[kind]
+
+    def snapshot(self, kinds) -> "PathSnapshot":
+        """Read-only distance queries for `kinds`; fields are immutable, so they are shared."""
+        return PathSnapshot({kind: self.field(kind) for kind in kinds})
+
+    # ── A* ────────────────────────────────────────────────────────────────────
+
+    def find_path(
+        self, sx: int, sy: int, tx: int, ty: int, max_nodes: int = 20000,
+    ) -> Optional[list[tuple[int, int]]]:
+        """Shortest list of (dx, dy) steps from (sx, sy) to (tx, ty), or None.
+
+        A* with the Chebyshev distance as heuristic (exact for 8-way moves on
+        open ground); gives up after expanding `max_nodes` tiles.
+        """
+        world = self._world
+        goal = world.get_tile(tx, ty)
+        if goal is None or goal.tile_type == TileType.WATER:
+            return None
+        if (sx, sy) == (tx, ty):
+            return []
+
+        def h(x: int, y: int) -> int:
+            return max(abs(tx - x), abs(ty - y))
+
+        came_from: dict[tuple[int, int], tuple[int, int]] = {}
+        g = {(sx, sy): 0}
+        open_heap = [(h(sx, sy), 0, sx, sy)]
+        expanded = 0
+        while open_heap and expanded < max_nodes:
+            _, cost, x, y = heapq.heappop(open_heap)
+            if cost > g.get((x, y), cost):
+                continue
+            if (x, y) == (tx, ty):
+                steps = []
+                while (x, y) != (sx, sy):
+                    px, py = came_from[(x, y)]
+                    steps.append((x - px, y - py))
+                    x, y = px, py
+                steps.reverse()
+                return steps
+            expanded += 1
+            for dx, dy in STEPS:
+                nx, ny = x + dx, y + dy
+                ncost = cost + 1
+                if ncost >= g.get((nx, ny), ncost + 1):
+                    continue
+                tile = world.get_tile(nx, ny)
+                if tile is None or tile.tile_type == TileType.WATER:
+                    continue
+                g[(nx, ny)] = ncost
+                came_from[(nx, ny)] = (x, y)
+                heapq.heappush(open_heap, (ncost + h(nx, ny), ncost, nx, ny))
+        return None
+
+
+class PathSnapshot:
+    """Flow-field queries frozen at one moment (see `PathService.snapshot`).
+
+    Kinds that were not captured answer None, like a map without that target.
+    """
+
+    def __init__(self, fields: dict[str, Optional[FlowField]]):
+        self._fields = fields
+
+    def field(self, kind: str) -> Optional[FlowField]:
+        return self._fields.get(kind)
+
+    distance = PathService.distance
+    step_toward = PathService.step_toward
+    nearest = PathService.nearest
+
+
+def _is_target(tile: "Tile", kind: str) -> bool:
+    if kind == EXCHANGE:
+        return tile.is_exchange
+    if kind in _RESOURCE_KINDS:
+        r = tile.resource
+        return bool(r and r.quantity > 0 and r.resource_type.value == kind)
+    return tile.furniture == kind
@@ -0,0 +1,108 @@
+"""World-level registry of open trade proposals.
+
+A proposal is a plain dict (from_id, to_id, offer/request item and qty, tick,
+round) stamped with a registry `id` and an `expires` tick.  The registry
+indexes every open proposal three ways:
+
+  * by id;
+  * by recipient, oldest first — what prompts and agents list;
+  * by (recipient, sender) — what accept / reject / counter look up;
+
+plus a min-heap of (expires, id).  `expire(tick)` pops only the proposals
+that are due, so expiry costs O(expired · log n) instead of rebuilding every
+NPC's list each tick.  Proposals answered before they expire leave a stale
+heap entry behind; it is skipped when it reaches the top.
+
+Proposal dicts are never mutated once added, so `snapshot()` can share them.
+"""
+from __future__ import annotations
+
+import heapq
+from typing import Optional
+
+import config
+
+
+class ProposalRegistry:
+    def __init__(self):
+        self._by_id: dict[int, dict] = {}
+        self._by_recipient: dict[str, dict[int, dict]] = {}
+        self._by_pair: dict[tuple[str, str], dict[int, dict]] = {}
+        self._heap: list[tuple[int, int]] = []    # (expires, id)
+        self._next_id = 1
+        self.version = 0                          # bumped on every add / remove
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def add(self, to_id: str, proposal: dict, tick: int) -> dict:
+        """Register `proposal` for `to_id`; it expires TRADE_PROPOSAL_TTL ticks after `tick`."""
+        pid = self._next_id
+        self._next_id += 1
+        proposal = dict(proposal, id=pid, to_id=to_id, expires=tick + config.TRADE_PROPOSAL_TTL)
+        self._by_id[pid] = proposal
+        self._by_recipient.setdefault(to_id, {})[pid] = proposal
+        self._by_pair.setdefault((to_id, proposal["from_id"]), {})[pid] = proposal
+        heapq.heappush(self._heap, (proposal["expires"], pid))
+        self.version += 1
+        return proposal
+
+    def get(self, pid: int) -> Optional[dict]:
+        return self._by_id.get(pid)
+
+    def remove(self, proposal: dict) -> bool:
+        """Close a proposal (answered or expired); False if it was no longer open."""
+        pid = proposal["id"]
+        if self._by_id.pop(pid, None) is None:
+            return False
+        _unlink(self._by_recipient, proposal["to_id"], pid)
+        _unlink(self._by_pair, (proposal["to_id"], proposal["from_id"]), pid)
+        self.version += 1
+        return True
+
+    def pending(self, to_id: str) -> list[dict]:
+        """Open proposals addressed to `to_id`, oldest first."""
+        return list(self._by_recipient.get(to_id, {}).values())
+
+    def count(self, to_id: str) -> int:
+        return len(self._by_recipient.get(to_id, ()))
+
+    def find(self, to_id: str, from_id: str) -> Optional[dict]:
+        """Oldest open proposal from `from_id` to `to_id`."""
+        bucket = self._by_pair.get((to_id, from_id))
+        return next(iter(bucket.values())) if bucket else None
+
+    def oldest(self, to_id: str) -> Optional[dict]:
+        bucket = self._by_recipient.get(to_id)
+        return next(iter(bucket.values())) if bucket else None
+
+    def expire(self, tick: int) -> list[dict]:
+        """Close and return every proposal whose `expires` tick is before `tick`."""
+        expired = []
+        heap = self._heap
+        while heap and heap[0][0] < tick:
+            _, pid = heapq.heappop(heap)
+            proposal = self._by_id.get(pid)
+            if proposal is not None:
+                self.remove(proposal)
+                expired.append(proposal)
+        return expired
+
+    def snapshot(self) -> "ProposalRegistry":
+        """Read-only copy for world views (indexes copied, proposal dicts shared, no heap)."""
+        snap = ProposalRegistry.__new__(ProposalRegistry)
+        snap._by_id = dict(self._by_id)
+        snap._by_recipient = {k: dict(v) for k, v in self._by_recipient.items()}
+        snap._by_pair = {k: dict(v) for k, v in self._by_pair.items()}
+        snap._heap = []
+        snap._next_id = self._next_id
+        snap.version = self.version
+        return snap
+
+
+def _unlink(index: dict, key, pid: int):
+    bucket = index.get(key)
+    if bucket is not None:
+        bucket.pop(pid, None)
+        if not bucket:
+            del index[key]
@@ -0,0 +1,90 @@
+"""Grid-bucketed spatial index for NPC / player proximity queries."""
+from __future__ import annotations
+
+import config
+
+
+class SpatialIndex:
+    """Uniform-grid spatial hash of entity positions.
+
+    Entities are bucketed into `cell_size`×`cell_size` cells; a Manhattan
+    range query only visits the cells overlapping the query diamond's
+    bounding box, so proximity checks cost O(entities nearby) instead of
+    O(all entities). Results are returned in insertion order, matching the
+    iteration order of `World.npcs`.
+    """
+
+    def __init__(self, cell_size: int = config.SPATIAL_CELL_SIZE):
+        self.cell_size = max(1, cell_size)
+        self._cells: dict[tuple[int, int], dict[str, object]] = {}
+        self._where: dict[str, tuple[int, int]] = {}   # id -> (x, y)
+        self._seq: dict[str, int] = {}                 # id -> insertion order
+        self._next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._where
+
+    def _cell(self, x: int, y: int) -> tuple[int, int]:
+        return x // self.cell_size, y // self.cell_size
+
+    def insert(self, entity_id: str, obj: object, x: int, y: int):
+        if entity_id in self._where:
+            self.remove(entity_id)
+        self._where[entity_id] = (x, y)
+        self._seq[entity_id] = self._next_seq
+        self._next_seq += 1
+        self._cells.setdefault(self._cell(x, y), {})[entity_id] = obj
+
+    def move(self, entity_id: str, x: int, y: int):
+        old = self._where.get(entity_id)
+        if old is None:
+            return
+        self._where[entity_id] = (x, y)
+        old_cell, new_cell = self._cell(*old), self._cell(x, y)
+        if old_cell == new_cell:
+            return
+        bucket = self._cells[old_cell]
+        obj = bucket.pop(entity_id)
+        if not bucket:
+            del self._cells[old_cell]
+        self._cells.setdefault(new_cell, {})[entity_id] = obj
+
+    def remove(self, entity_id: str):
+        pos = self._where.pop(entity_id, None)
+        self._seq.pop(entity_id, None)
+        if pos is None:
+            return
+        cell = self._cell(*pos)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.pop(entity_id, None)
+            if not bucket:
+                del self._cells[cell]
+
+    def query(self, x: int, y: int, radius: int) -> list:
+        """Return entities within Manhattan distance `radius` of (x, y)."""
+        cx0, cy0 = self._cell(x - radius, y - radius)
+        cx1, cy1 = self._cell(x + radius, y + radius)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self._cells):
+            # Query window larger than the occupied area: scan occupied cells
+            buckets = [
+                b for (cx, cy), b in self._cells.items()
+                if cx0 <= cx <= cx1 and cy0 <= cy <= cy1
+            ]
+        else:
+            buckets = [
+                b for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1)
+                if (b := self._cells.get((cx, cy)))
+            ]
+        hits = []
+        where = self._where
+        for bucket in buckets:
+            for eid, obj in bucket.items():
+                ex, ey = where[eid]
+                if abs(ex - x) + abs(ey - y) <= radius:
+                    hits.append((self._seq[eid], obj))
+        hits.sort(key=lambda h: h[0])
+        return [obj for _, obj in hits]
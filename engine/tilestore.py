@@ -0,0 +1,182 @@
+"""Struct-of-arrays tile storage: one NumPy layer per tile attribute.
+
+`World.get_tile` keeps handing out `Tile` objects for existing callers, but
+those are thin views onto the layers below.  Whole-map passes (resource
+regrowth, market supply counting) run as vectorized array operations instead
+of a Python loop over every tile.  A store covers one rectangular chunk of the
+map whose top-left tile is (x0, y0); all coordinates passed to its methods are
+local to the chunk.
+
+Layers hold small integer codes; the enum <-> code tables live next to the
+`Tile` view in engine.world so this module stays free of model imports.
+"""
+from __future__ import annotations
+
+import json
+from typing import Optional
+
+import numpy as np
+
+NO_RESOURCE = -1
+NO_FURNITURE = 0
+
+
+class TileStore:
+    def __init__(self, width: int, height: int, x0: int = 0, y0: int = 0):
+        self.width = width
+        self.height = height
+        self.x0 = x0
+        self.y0 = y0
+        shape = (height, width)
+        self.tile_type = np.zeros(shape, dtype=np.uint8)                   # TileType code
+        self.resource_type = np.full(shape, NO_RESOURCE, dtype=np.int8)    # ResourceType code
+        self.quantity = np.zeros(shape, dtype=np.int32)
+        self.max_quantity = np.zeros(shape, dtype=np.int32)
+        self.furniture = np.zeros(shape, dtype=np.uint8)                   # index into furniture_names
+        self.occupancy = np.zeros(shape, dtype=np.uint16)                  # NPCs standing on the tile
+        self.exchange = np.zeros(shape, dtype=bool)
+        self.player = np.zeros(shape, dtype=bool)
+        self.furniture_names: list[Optional[str]] = [None]
+        # local (x, y) of resources below max_quantity — the only tiles regrowth visits
+        self.regrowing: set[tuple[int, int]] = set()
+        # bumped on every write so WorldView snapshots can share unchanged stores
+        self.version = 0
+        # running on-map quantity per resource code, shared by every store of a
+        # ChunkStore and kept in step by the resource writes below (None: untracked)
+        self.totals: Optional[dict[int, int]] = None
+
+    def is_occupied(self) -> bool:
+        """True while any NPC or the player stands inside this store."""
+        return bool(self.occupancy.any() or self.player.any())
+
+    # ── Furniture codes ───────────────────────────────────────────────────────
+
+    def furniture_code(self, name: Optional[str]) -> int:
+        if not name:
+            return NO_FURNITURE
+        try:
+            return self.furniture_names.index(name)
+        except ValueError:
+            self.furniture_names.append(name)
+            return len(self.furniture_names) - 1
+
+    def furniture_name(self, code: int) -> Optional[str]:
+        return self.furniture_names[code]
+
+    # ── Resources ─────────────────────────────────────────────────────────────
+
+    def set_resource(self, x: int, y: int, code: int, quantity: int, max_quantity: int):
+        self._count(int(self.resource_type[y, x]), -int(self.quantity[y, x]))
+        self.resource_type[y, x] = code
+        self.quantity[y, x] = quantity
+        self.max_quantity[y, x] = max_quantity
+        self._count(code, quantity)
+        self._track(x, y)
+
+    def clear_resource(self, x: int, y: int):
+        self.set_resource(x, y, NO_RESOURCE, 0, 0)
+
+    def set_resource_type(self, x: int, y: int, code: int):
+        self.set_resource(x, y, code, int(self.quantity[y, x]), int(self.max_quantity[y, x]))
+
+    def set_quantity(self, x: int, y: int, quantity: int):
+        self._count(int(self.resource_type[y, x]), quantity - int(self.quantity[y, x]))
+        self.quantity[y, x] = quantity
+        self._track(x, y)
+
+    def set_max_quantity(self, x: int, y: int, max_quantity: int):
+        self.max_quantity[y, x] = max_quantity
+        self._track(x, y)
+
+    def _count(self, code: int, delta: int):
+        if self.totals is not None and code != NO_RESOURCE and delta:
+            self.totals[code] = self.totals.get(code, 0) + delta
+
+    def _track(self, x: int, y: int):
+        self.version += 1
+        if (self.resource_type[y, x] != NO_RESOURCE
+                and self.quantity[y, x] < self.max_quantity[y, x]):
+            self.regrowing.add((x, y))
+
+    def rebuild_regrowing(self):
+        below = (self.resource_type != NO_RESOURCE) & (self.quantity < self.max_quantity)
+        ys, xs = np.nonzero(below)
+        self.regrowing = set(zip(xs.tolist(), ys.tolist()))
+
+    def regrow(self, amount: int, resource_code: Optional[int] = None) -> list[tuple[int, int]]:
+        """Add `amount` to every resource below its max (optionally one type only).
+
+        Only tiles in the `regrowing` set are visited, so the cost scales with
+        the number of harvested tiles rather than the map area.  Returns the
+        world (x, y) of tiles that were empty before regrowing, i.e. whose
+        resource just became visible again.
+        """
+        if not self.regrowing:
+            return []
+        xs, ys = np.array(sorted(self.regrowing), dtype=np.intp).T
+        rtype = self.resource_type[ys, xs]
+        qty = self.quantity[ys, xs]
+        max_qty = self.max_quantity[ys, xs]
+
+        mask = (rtype != NO_RESOURCE) & (qty < max_qty)
+        if resource_code is not None:
+            mask &= rtype == resource_code
+        was_empty = mask & (qty == 0)
+        new_qty = np.where(mask, np.minimum(qty + amount, max_qty), qty)
+        self.quantity[ys, xs] = new_qty
+        if mask.any():
+            self.version += 1
+            if self.totals is not None:
+                grown = np.bincount(rtype[mask].astype(np.intp), weights=(new_qty - qty)[mask])
+                for code, delta in enumerate(grown):
+                    self._count(code, int(delta))
+        qty = new_qty
+
+        done = (rtype == NO_RESOURCE) | (qty >= max_qty)
+        self.regrowing.difference_update(zip(xs[done].tolist(), ys[done].tolist()))
+        return list(zip((xs[was_empty] + self.x0).tolist(), (ys[was_empty] + self.y0).tolist()))
+
+    def resource_totals(self) -> dict[int, int]:
+        """Total on-map quantity per resource code, recounted from the layers."""
+        has = self.resource_type != NO_RESOURCE
+        sums = np.bincount(self.resource_type[has].astype(np.intp), weights=self.quantity[has])
+        return {code: int(total) for code, total in enumerate(sums)}
+
+    def frozen(self) -> "TileStore":
+        """Read-only copy of every layer (writes raise), for WorldView snapshots."""
+        snap = TileStore.__new__(TileStore)
+        snap.__dict__.update(self.__dict__)
+        for name in self._LAYERS + ("occupancy", "player"):
+            layer = getattr(self, name).copy()
+            layer.flags.writeable = False
+            setattr(snap, name, layer)
+        snap.furniture_names = tuple(self.furniture_names)
+        snap.regrowing = frozenset(self.regrowing)
+        snap.totals = None
+        return snap
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    _LAYERS = ("tile_type", "resource_type", "quantity", "max_quantity", "furniture", "exchange")
+
+    def save(self, path: str):
+        """Write the static layers to a compressed .npz (occupancy is not saved)."""
+        np.savez_compressed(
+            path,
+            origin=np.array([self.x0, self.y0]),
+            furniture_names=np.array(json.dumps(self.furniture_names)),
+            **{name: getattr(self, name) for name in self._LAYERS},
+        )
+
+    @classmethod
+    def load(cls, path) -> "TileStore":
+        """Read a store written by `save` (a path or a binary file object)."""
+        with np.load(path) as data:
+            height, width = data["tile_type"].shape
+            x0, y0 = (int(v) for v in data["origin"])
+            store = cls(width, height, x0, y0)
+            for name in cls._LAYERS:
+                getattr(store, name)[...] = data[name]
+            store.furniture_names = json.loads(str(data["furniture_names"]))
+        store.rebuild_regrowing()
+        return store
@@ -4,9 +4,20 @@ from __future__ import annotations
 import random
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
 import config
+from engine.event_store import EventStore
+from engine.glyphs import GlyphLayer
+from engine.inbox import NORMAL, Inbox
+from engine.market import MarketLedger, OrderBook, PriceHistory
+from engine.proposals import ProposalRegistry
+from engine.chunks import ChunkStore
+from engine.spatial import SpatialIndex
+from engine.tilestore import NO_RESOURCE, TileStore
+
+if TYPE_CHECKING:
+    from engine.pathfinding import PathService
 
 
 class TileType(str, Enum):
@@ -31,23 +42,154 @@ class ResourceType(str, Enum):
     HERB = "herb"    # gatherable from forest tiles
 
 
-@dataclass
+# Enum <-> layer-code tables for the TileStore
+TILE_TYPES: list[TileType] = list(TileType)          # code 0 = grass
+TILE_CODES = {t: i for i, t in enumerate(TILE_TYPES)}
+RESOURCE_TYPES: list[ResourceType] = list(ResourceType)
+RESOURCE_CODES = {r: i for i, r in enumerate(RESOURCE_TYPES)}
+
+
+@dataclass(slots=True)
 class Resource:
+    """Detached resource value; assign to `tile.resource` to store it."""
     resource_type: ResourceType
     quantity: int
     max_quantity: int
 
 
-@dataclass
+class ResourceView:
+    """Live view of the resource layers of one tile (what `tile.resource` returns)."""
+
+    __slots__ = ("_store", "_lx", "_ly")
+
+    def __init__(self, store: TileStore, lx: int, ly: int):
+        self._store = store
+        self._lx = lx
+        self._ly = ly
+
+    @property
+    def resource_type(self) -> ResourceType:
+        return RESOURCE_TYPES[self._store.resource_type[self._ly, self._lx]]
+
+    @resource_type.setter
+    def resource_type(self, value: ResourceType):
+        self._store.set_resource_type(self._lx, self._ly, RESOURCE_CODES[value])
+
+    @property
+    def quantity(self) -> int:
+        return int(self._store.quantity[self._ly, self._lx])
+
+    @quantity.setter
+    def quantity(self, value: int):
+        self._store.set_quantity(self._lx, self._ly, value)
+
+    @property
+    def max_quantity(self) -> int:
+        return int(self._store.max_quantity[self._ly, self._lx])
+
+    @max_quantity.setter
+    def max_quantity(self, value: int):
+        self._store.set_max_quantity(self._lx, self._ly, value)
+
+
+_NO_NPCS: tuple = ()
+
+
 class Tile:
-    x: int
-    y: int
-    tile_type: TileType
-    resource: Optional[Resource] = None
-    npc_ids: list = field(default_factory=list)
-    is_exchange: bool = False   # marks the exchange building tile
-    player_here: bool = False   # player occupies this tile
-    furniture: Optional[str] = None  # "bed" | "table" | "chair" | None
+    """View of one cell of a chunk's TileStore.
+
+    Attribute reads/writes go straight to the array layers (writes bump
+    `store.version`); only the NPC id list lives on the view itself.  `x`/`y` are world coordinates.  Empty
+    tiles share one immutable `npc_ids`; a list is allocated on first entry.
+    """
+
+    __slots__ = ("store", "x", "y", "_lx", "_ly", "npc_ids")
+
+    def __init__(self, store: TileStore, x: int, y: int):
+        self.store = store
+        self.x = x
+        self.y = y
+        self._lx = x - store.x0
+        self._ly = y - store.y0
+        self.npc_ids = _NO_NPCS
+
+    def enter(self, npc_id: str):
+        """Record an NPC standing on this tile (keeps the occupancy layer in sync)."""
+        if self.npc_ids is _NO_NPCS:
+            self.npc_ids = [npc_id]
+        else:
+            self.npc_ids.append(npc_id)
+        self.store.occupancy[self._ly, self._lx] += 1
+        self.store.version += 1
+
+    def leave(self, npc_id: str):
+        if npc_id in self.npc_ids:
+            self.npc_ids.remove(npc_id)
+            if not self.npc_ids:
+                self.npc_ids = _NO_NPCS
+            self.store.occupancy[self._ly, self._lx] -= 1
+            self.store.version += 1
+
+    @property
+    def tile_type(self) -> TileType:
+        return TILE_TYPES[self.store.tile_type[self._ly, self._lx]]
+
+    @tile_type.setter
+    def tile_type(self, value: TileType):
+        self.store.tile_type[self._ly, self._lx] = TILE_CODES[value]
+        self.store.version += 1
+
+    @property
+    def resource(self) -> Optional[ResourceView]:
+        if self.store.resource_type[self._ly, self._lx] == NO_RESOURCE:
+            return None
+        return ResourceView(self.store, self._lx, self._ly)
+
+    @resource.setter
+    def resource(self, value):
+        if value is None:
+            self.store.clear_resource(self._lx, self._ly)
+        else:
+            self.store.set_resource(
+                self._lx, self._ly, RESOURCE_CODES[value.resource_type],
+                value.quantity, value.max_quantity,
+            )
+
+    @property
+    def is_exchange(self) -> bool:   # marks the exchange building tile
+        return bool(self.store.exchange[self._ly, self._lx])
+
+    @is_exchange.setter
+    def is_exchange(self, value: bool):
+        self.store.exchange[self._ly, self._lx] = value
+        self.store.version += 1
+
+    @property
+    def player_here(self) -> bool:   # player occupies this tile
+        return bool(self.store.player[self._ly, self._lx])
+
+    @player_here.setter
+    def player_here(self, value: bool):
+        self.store.player[self._ly, self._lx] = value
+        self.store.version += 1
+
+    @property
+    def furniture(self) -> Optional[str]:   # "bed" | "table" | "chair" | None
+        return self.store.furniture_name(self.store.furniture[self._ly, self._lx])
+
+    @furniture.setter
+    def furniture(self, value: Optional[str]):
+        self.store.furniture[self._ly, self._lx] = self.store.furniture_code(value)
+        self.store.version += 1
+
+
+def make_tiles(store: TileStore) -> list[list[Tile]]:
+    """Row-major grid of Tile views over `store` (indexed [local_y][local_x])."""
+    x0, y0 = store.x0, store.y0
+    return [
+        [Tile(store, x0 + lx, y0 + ly) for lx in range(store.width)]
+        for ly in range(store.height)
+    ]
 
 
 @dataclass
@@ -81,36 +223,82 @@ class WorldTime:
             self.day += 1
 
 
-@dataclass
+# Items that occupy inventory slots (gold is currency and takes no slot)
+SLOT_ITEMS = ("wood", "stone", "ore", "food", "herb", "rope", "potion", "tool", "bread")
+INVENTORY_ITEMS = SLOT_ITEMS + ("gold",)
+
+
+def _slot_item(name: str) -> property:
+    """Inventory count that keeps the cached slot total in step on every write."""
+    attr = "_" + name
+
+    def fget(self) -> int:
+        return getattr(self, attr)
+
+    def fset(self, value: int):
+        old = getattr(self, attr)
+        self._slots += value - old
+        setattr(self, attr, value)
+        if self._ledger is not None:
+            self._ledger.item_changed(name, old, value)
+
+    return property(fget, fset)
+
+
 class Inventory:
+    """Item counts with a cached occupied-slot total (gold excluded).
+
+    An NPC's inventory also reports item changes to the world's MarketLedger.
+    """
+
+    __slots__ = tuple("_" + name for name in SLOT_ITEMS) + ("gold", "_slots", "_ledger")
+
     # Raw resources
-    wood: int = 0
-    stone: int = 0
-    ore: int = 0
-    food: int = 0
-    herb: int = 0
+    wood = _slot_item("wood")
+    stone = _slot_item("stone")
+    ore = _slot_item("ore")
+    food = _slot_item("food")
+    herb = _slot_item("herb")
     # Crafted items
-    rope: int = 0
-    potion: int = 0
-    tool: int = 0
-    bread: int = 0
-    # Currency
-    gold: int = 0
+    rope = _slot_item("rope")
+    potion = _slot_item("potion")
+    tool = _slot_item("tool")
+    bread = _slot_item("bread")
+
+    def __init__(self, gold: int = 0, **items: int):
+        self._slots = 0
+        self._ledger = None      # MarketLedger while owned by an NPC in a World
+        for name in SLOT_ITEMS:
+            setattr(self, "_" + name, 0)
+        # Currency
+        self.gold = gold
+        for name, value in items.items():
+            if name not in SLOT_ITEMS:
+                raise TypeError(f"unknown inventory item: {name}")
+            setattr(self, name, value)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v}" for k, v in self.to_dict().items())
+        return f"Inventory({fields})"
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Inventory):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
 
     def get(self, item: str) -> int:
-        return getattr(self, item, 0)
+        return getattr(self, item) if item in INVENTORY_ITEMS else 0
 
     def set(self, item: str, value: int):
-        if hasattr(self, item):
+        if item in INVENTORY_ITEMS:
             setattr(self, item, max(0, value))
 
     def total_items(self) -> int:
         """Count of all items that occupy inventory slots (gold excluded)."""
-        return self.wood + self.stone + self.ore + self.food + self.herb + \
-               self.rope + self.potion + self.tool + self.bread
+        return self._slots
 
     def has_space(self, qty: int = 1) -> bool:
-        return self.total_items() + qty <= config.INVENTORY_MAX_SLOTS
+        return self._slots + qty <= config.INVENTORY_MAX_SLOTS
 
     def to_dict(self) -> dict:
         return {
@@ -127,7 +315,7 @@ class AgentMemory:
     # List of {"role": "user"/"model", "text": str}
     conversation_history: list = field(default_factory=list)
     personal_notes: list = field(default_factory=list)
-    inbox: list = field(default_factory=list)   # events received since last cycle
+    inbox: Inbox = field(default_factory=Inbox)   # events received since last cycle (engine/inbox.py)
     max_history_turns: int = config.HISTORY_MAX_TURNS
     max_notes: int = config.NOTES_MAX_COUNT
 
@@ -145,8 +333,12 @@ class AgentMemory:
     def clear_inbox(self):
         self.inbox.clear()
 
-    def add_to_inbox(self, event_summary: str):
-        self.inbox.append(event_summary)
+    def consume_inbox(self, upto_seq: int):
+        """Drop the messages an agent has just read (its snapshot's `inbox.last_seq`)."""
+        self.inbox.consume(upto_seq)
+
+    def add_to_inbox(self, event_summary: str, priority: int = NORMAL, key=None, event=None):
+        self.inbox.add(event_summary, priority, key, event)
 
 
 # ── NPC Profile (background card) ─────────────────────────────────────────────
@@ -220,8 +412,11 @@ class MarketPrice:
 @dataclass
 class MarketState:
     prices: dict = field(default_factory=dict)   # item -> MarketPrice
-    history: dict = field(default_factory=dict)  # item -> list[float]
+    history: PriceHistory = field(   # price samples + OHLC rollups (engine/market.py)
+        default_factory=lambda: PriceHistory(config.MARKET_BASE_PRICES)
+    )
     last_update_tick: int = 0
+    orders: OrderBook = field(default_factory=OrderBook)   # cleared every tick
 
 
 def _make_market() -> MarketState:
@@ -233,7 +428,11 @@ def _make_market() -> MarketState:
         state.prices[item] = MarketPrice(
             item=item, base=base, current=base, min_p=min_p, max_p=max_p,
         )
-        state.history[item] = [base]
+    start = WorldTime()
+    state.history.record(
+        start.tick, start.day, start.hour,
+        {item: mp.current for item, mp in state.prices.items()},
+    )
     return state
 
 
@@ -254,7 +453,6 @@ class NPC:
     energy: int = 100
     last_thought: str = ""
     profile: Optional[NPCProfile] = None
-    pending_proposals: list = field(default_factory=list)  # incoming trade proposals
     equipped: Optional[str] = None  # "tool" | "rope" | None (single equipment slot)
 
     # ── Hierarchical decision-making (Level-1 Strategic layer) ─────────────
@@ -266,6 +464,31 @@ class NPC:
     last_action_result: str = ""       # natural-language result of the last action
     mood: str = ""                     # current emotional state (set by strategic layer)
 
+    # ── Engine-executed macro action (move_to / gather_until / go_sell …) ──
+    macro: Optional[dict] = None       # active macro action + progress, None when idle
+    action_queue: list = field(default_factory=list)  # queued primitive action dicts
+    queue_inbox_seq: int = 0           # inbox seq the action queue was planned against
+
+    _ledger = None                     # MarketLedger while in a World (not a field)
+
+
+def _npc_energy() -> property:
+    """NPC energy that reports low-energy threshold crossings to the MarketLedger."""
+
+    def fget(self) -> int:
+        return self._energy
+
+    def fset(self, value: int):
+        if self._ledger is not None:
+            self._ledger.energy_changed(self._energy, value)
+        self._energy = value
+
+    return property(fget, fset)
+
+
+# Installed after @dataclass so `energy` keeps its field default
+NPC.energy = _npc_energy()
+
 
 @dataclass
 class Player:
@@ -294,41 +517,200 @@ class GodEntity:
     pending_commands: list = field(default_factory=list)
 
 
+GOD_ID = "god"
+_DEFAULT_NAMES = {"player": "玩家", GOD_ID: "上帝"}
+
+
 @dataclass
 class World:
     width: int = config.WORLD_WIDTH
     height: int = config.WORLD_HEIGHT
-    tiles: list = field(default_factory=list)
+    seed: int = config.WORLD_SEED         # generator seed for chunks not yet built
+    chunks: Optional[ChunkStore] = None   # chunked tile layers (see engine/chunks.py)
     weather: WeatherType = WeatherType.SUNNY
     time: WorldTime = field(default_factory=WorldTime)
     npcs: list = field(default_factory=list)
     god: GodEntity = field(default_factory=GodEntity)
     player: Optional[Player] = None
-    recent_events: list = field(default_factory=list)
+    recent_events: EventStore = field(default_factory=EventStore)  # last RECENT_EVENTS_MAX events
     market: MarketState = field(default_factory=_make_market)
+    glyphs: Optional[GlyphLayer] = None   # maintained one-glyph-per-tile layer
+    spatial: SpatialIndex = field(default_factory=SpatialIndex)  # NPC + player positions
+    paths: Optional["PathService"] = None  # flow fields + A* (engine/pathfinding.py)
+    market_ledger: MarketLedger = field(default_factory=MarketLedger, repr=False)  # running supply/demand
+    proposals: ProposalRegistry = field(default_factory=ProposalRegistry, repr=False)  # open trade proposals
+    _entities: dict = field(default_factory=dict, repr=False)  # id -> NPC / Player / GodEntity
+    _names: dict = field(default_factory=dict, repr=False)     # id -> cached display name
+
+    def __post_init__(self):
+        self._entities[GOD_ID] = self.god
+        for npc in self.npcs:
+            self._entities[npc.npc_id] = npc
+            self.spatial.insert(npc.npc_id, npc, npc.x, npc.y)
+            self.market_ledger.attach(npc)
+        if self.player:
+            self._entities[self.player.player_id] = self.player
+            self.spatial.insert(self.player.player_id, self.player, self.player.x, self.player.y)
+        if self.glyphs is None and self.chunks is not None:
+            self.glyphs = GlyphLayer.build(self)
+        if self.paths is None and self.chunks is not None:
+            from engine.pathfinding import PathService
+            self.paths = PathService(self)
+
+    # ── Entity registry ───────────────────────────────────────────────────────
+
+    def get_entity(self, entity_id: str):
+        """Return the NPC, Player or GodEntity registered under `entity_id`."""
+        return self._entities.get(entity_id)
+
+    def display_name(self, entity_id: str) -> str:
+        """Cached human-readable name for an actor id (falls back to the id)."""
+        name = self._names.get(entity_id)
+        if name is None:
+            entity = self._entities.get(entity_id)
+            if entity is not None:
+                name = getattr(entity, "name", None) or _DEFAULT_NAMES.get(entity_id, entity_id)
+            else:
+                name = _DEFAULT_NAMES.get(entity_id, entity_id)
+            self._names[entity_id] = name
+        return name
+
+    def rename(self, entity_id: str, name: str):
+        """Change an entity's name and refresh everything derived from it."""
+        entity = self._entities.get(entity_id)
+        if entity is None or not hasattr(entity, "name"):
+            return
+        entity.name = name
+        self.refresh_entity(entity_id)
+
+    def refresh_entity(self, entity_id: str):
+        """Invalidate cached name / glyph after an entity's identity changed."""
+        self._names.pop(entity_id, None)
+        entity = self._entities.get(entity_id)
+        if entity is not None and hasattr(entity, "x"):
+            self.refresh_glyph(entity.x, entity.y)
+
+    def add_npc(self, npc: NPC):
+        """Place a new NPC in the world and index it."""
+        self.remove_npc(npc.npc_id)
+        self.npcs.append(npc)
+        self._entities[npc.npc_id] = npc
+        self._names.pop(npc.npc_id, None)
+        self.market_ledger.attach(npc)
+        tile = self.get_tile(npc.x, npc.y)
+        if tile:
+            tile.enter(npc.npc_id)
+        self.spatial.insert(npc.npc_id, npc, npc.x, npc.y)
+        self.refresh_glyph(npc.x, npc.y)
+
+    def remove_npc(self, npc_id: str) -> Optional[NPC]:
+        """Take an NPC out of the world and every index; returns it if found."""
+        npc = self.get_npc(npc_id)
+        if npc is None:
+            return None
+        self.npcs.remove(npc)
+        del self._entities[npc_id]
+        self._names.pop(npc_id, None)
+        self.market_ledger.detach(npc)
+        tile = self.get_tile(npc.x, npc.y)
+        if tile:
+            tile.leave(npc_id)
+        self.spatial.remove(npc_id)
+        self.refresh_glyph(npc.x, npc.y)
+        return npc
+
+    def refresh_glyph(self, x: int, y: int):
+        """Re-render the glyph of one tile after its occupants changed."""
+        if self.glyphs is not None:
+            self.glyphs.refresh(self, x, y)
+
+    def tile_changed(self, x: int, y: int):
+        """Notify derived layers that a tile's terrain, resource or furniture changed."""
+        self.refresh_glyph(x, y)
+        if self.paths is not None:
+            self.paths.tile_changed(x, y)
+
+    def regrow_resources(self, amount: int, resource_type: Optional[ResourceType] = None):
+        """Regrow every harvested (below-max) resource on the map."""
+        code = RESOURCE_CODES[resource_type] if resource_type is not None else None
+        for x, y in self.chunks.regrow(amount, code):
+            self.tile_changed(x, y)
+
+    def resource_supply(self) -> dict[str, int]:
+        """On-map quantity per resource type value (e.g. {"wood": 123}), from running totals."""
+        return {
+            RESOURCE_TYPES[code].value: total
+            for code, total in self.chunks.resource_totals().items()
+        }
+
+    def count_resource_supply(self) -> dict[str, int]:
+        """`resource_supply` recounted from the tile layers (consistency checks)."""
+        return {
+            RESOURCE_TYPES[code].value: total
+            for code, total in self.chunks.count_resource_totals().items()
+        }
 
     def get_tile(self, x: int, y: int) -> Optional[Tile]:
-        if 0 <= x < self.width and 0 <= y < self.height:
-            return self.tiles[y][x]
-        return None
+        return self.chunks.get_tile(x, y)
+
+    def iter_tiles(self):
+        """Every tile currently in memory (the explored part of a large map)."""
+        return self.chunks.iter_tiles()
 
     def get_npc(self, npc_id: str) -> Optional[NPC]:
-        return next((n for n in self.npcs if n.npc_id == npc_id), None)
+        entity = self._entities.get(npc_id)
+        return entity if isinstance(entity, NPC) else None
 
     def get_nearby_npcs(self, x: int, y: int, radius: int) -> list:
-        return [n for n in self.npcs if abs(n.x - x) + abs(n.y - y) <= radius]
+        return [
+            n for n in self.spatial.query(x, y, radius)
+            if n is not self.player
+        ]
 
     def get_nearby_npcs_for_npc(self, npc: NPC, radius: int) -> list:
         return [
-            n for n in self.npcs
-            if n.npc_id != npc.npc_id
-            and abs(n.x - npc.x) + abs(n.y - npc.y) <= radius
+            n for n in self.spatial.query(npc.x, npc.y, radius)
+            if n is not npc and n is not self.player
         ]
 
-    def add_event(self, summary: str):
-        self.recent_events.append(summary)
-        if len(self.recent_events) > 30:
-            self.recent_events.pop(0)
+    def player_within(self, x: int, y: int, radius: int) -> bool:
+        p = self.player
+        return p is not None and abs(p.x - x) + abs(p.y - y) <= radius
+
+    def move_npc(self, npc: NPC, new_x: int, new_y: int):
+        """Relocate an NPC, keeping tile occupancy, glyphs and the spatial index in sync."""
+        old_x, old_y = npc.x, npc.y
+        old_tile = self.get_tile(old_x, old_y)
+        if old_tile:
+            old_tile.leave(npc.npc_id)
+        npc.x, npc.y = new_x, new_y
+        new_tile = self.get_tile(new_x, new_y)
+        if new_tile:
+            new_tile.enter(npc.npc_id)
+        self.spatial.move(npc.npc_id, new_x, new_y)
+        self.refresh_glyph(old_x, old_y)
+        self.refresh_glyph(new_x, new_y)
+
+    def move_player(self, new_x: int, new_y: int):
+        """Relocate the player (tile flag, glyphs, spatial index)."""
+        player = self.player
+        if player is None:
+            return
+        old_x, old_y = player.x, player.y
+        old_tile = self.get_tile(old_x, old_y)
+        if old_tile:
+            old_tile.player_here = False
+        player.x, player.y = new_x, new_y
+        new_tile = self.get_tile(new_x, new_y)
+        if new_tile:
+            new_tile.player_here = True
+        self.spatial.move(player.player_id, new_x, new_y)
+        self.refresh_glyph(old_x, old_y)
+        self.refresh_glyph(new_x, new_y)
+
+    def add_event(self, event):
+        """Record a dispatched (already rendered) WorldEvent in the recent-event ring."""
+        self.recent_events.add(event)
 
 
 # ── Default NPC Profiles ──────────────────────────────────────────────────────
@@ -535,41 +917,16 @@ def _place_cluster(tiles, width, height, tile_type: TileType, cx: int, cy: int,
                         tiles[ny][nx].tile_type = tile_type
 
 
-def create_world(seed: int = 42) -> World:
-    rng = random.Random(seed)
-    width, height = config.WORLD_WIDTH, config.WORLD_HEIGHT
+# NPC & player spawn points (9个角色的出生点)
+_NPC_SPAWNS = [
+    (5, 5), (6, 5), (10, 10), (14, 5),   # 核心：禾、穗、山、棠
+    (8, 14), (14, 14), (3, 10), (17, 10), # 日常：旷、木、岚婆、石
+    (5, 14),                               # 特殊：商人
+]
 
-    # Initialize all grass
-    tiles: list[list[Tile]] = [
-        [Tile(x=x, y=y, tile_type=TileType.GRASS) for x in range(width)]
-        for y in range(height)
-    ]
 
-    # Rock clusters (4 patches near corners)
-    for rcx, rcy in [(3, 3), (16, 3), (3, 16), (16, 16)]:
-        _place_cluster(tiles, width, height, TileType.ROCK, rcx, rcy, rng.randint(2, 3))
-
-    # Forest patches (avoid town area 8-12)
-    forests_placed = 0
-    forest_attempts = 0
-    while forests_placed < 8 and forest_attempts < 50:
-        forest_attempts += 1
-        fcx = rng.randint(1, width - 2)
-        fcy = rng.randint(1, height - 2)
-        if 7 <= fcx <= 13 and 7 <= fcy <= 13:
-            continue
-        _place_cluster(tiles, width, height, TileType.FOREST, fcx, fcy, rng.randint(1, 3))
-        forests_placed += 1
-
-    # Town area: 3×3 at (9,9)–(11,11)
-    for ty in range(9, 12):
-        for tx in range(9, 12):
-            tiles[ty][tx].tile_type = TileType.TOWN
-            tiles[ty][tx].resource = None
-
-    tiles[config.EXCHANGE_Y][config.EXCHANGE_X].is_exchange = True
-
-    # Resources on tiles
+def _seed_resources(tiles, rng: random.Random):
+    """Per-tile resource pass: wood/herb on forest, stone/ore on rock."""
     for row in tiles:
         for tile in row:
             if tile.tile_type == TileType.FOREST:
@@ -589,9 +946,11 @@ def create_world(seed: int = 42) -> World:
                         qty = rng.randint(4, 10)
                         tile.resource = Resource(ResourceType.STONE, qty, 10)
 
-    # Food bushes on grass (~10 spots)
+
+def _place_food(tiles, width: int, height: int, count: int, rng: random.Random):
+    """Scatter food bushes on empty grass."""
     food_placed, food_attempts = 0, 0
-    while food_placed < 10 and food_attempts < 200:
+    while food_placed < count and food_attempts < count * 20:
         food_attempts += 1
         fx = rng.randint(0, width - 1)
         fy = rng.randint(0, height - 1)
@@ -600,13 +959,44 @@ def create_world(seed: int = 42) -> World:
             t.resource = Resource(ResourceType.FOOD, rng.randint(2, 5), 5)
             food_placed += 1
 
-    # Clear NPC & player spawn points (9个角色的出生点)
-    npc_spawns = [
-        (5, 5), (6, 5), (10, 10), (14, 5),   # 核心：禾、穗、山、棠
-        (8, 14), (14, 14), (3, 10), (17, 10), # 日常：旷、木、岚婆、石
-        (5, 14),                               # 特殊：商人
-    ]
-    for sx, sy in npc_spawns:
+
+def _classic_map(rng: random.Random, width: int, height: int) -> ChunkStore:
+    """Hand-tuned 20×20 village layout, built eagerly as a single chunk."""
+    store = TileStore(width, height)
+    tiles = make_tiles(store)
+
+    # Rock clusters (4 patches near corners)
+    for rcx, rcy in [(3, 3), (16, 3), (3, 16), (16, 16)]:
+        _place_cluster(tiles, width, height, TileType.ROCK, rcx, rcy, rng.randint(2, 3))
+
+    # Forest patches (avoid town area 8-12)
+    forests_placed = 0
+    forest_attempts = 0
+    while forests_placed < 8 and forest_attempts < 50:
+        forest_attempts += 1
+        fcx = rng.randint(1, width - 2)
+        fcy = rng.randint(1, height - 2)
+        if 7 <= fcx <= 13 and 7 <= fcy <= 13:
+            continue
+        _place_cluster(tiles, width, height, TileType.FOREST, fcx, fcy, rng.randint(1, 3))
+        forests_placed += 1
+
+    # Town area: 3×3 at (9,9)–(11,11)
+    for ty in range(9, 12):
+        for tx in range(9, 12):
+            tiles[ty][tx].tile_type = TileType.TOWN
+            tiles[ty][tx].resource = None
+
+    tiles[config.EXCHANGE_Y][config.EXCHANGE_X].is_exchange = True
+
+    # Resources on tiles
+    _seed_resources(tiles, rng)
+
+    # Food bushes on grass (~10 spots)
+    _place_food(tiles, width, height, 10, rng)
+
+    # Clear NPC & player spawn points
+    for sx, sy in _NPC_SPAWNS:
         if 0 <= sx < width and 0 <= sy < height:
             tiles[sy][sx].tile_type = TileType.GRASS
             tiles[sy][sx].resource = None
@@ -617,6 +1007,64 @@ def create_world(seed: int = 42) -> World:
             tiles[py][px].tile_type = TileType.GRASS
         tiles[py][px].resource = None
 
+    chunks = ChunkStore(width, height, make_tiles)
+    chunks.adopt(store, tiles)
+    return chunks
+
+
+def _place_settlement(chunks: ChunkStore):
+    """Stamp the town, the exchange and clear spawn points onto a generated map."""
+    ex, ey = config.EXCHANGE_X, config.EXCHANGE_Y
+    for ty in range(ey - 1, ey + 2):
+        for tx in range(ex - 1, ex + 2):
+            tile = chunks.get_tile(tx, ty)
+            if tile:
+                tile.tile_type = TileType.TOWN
+                tile.resource = None
+    exchange = chunks.get_tile(ex, ey)
+    if exchange:
+        exchange.is_exchange = True
+
+    for sx, sy in _NPC_SPAWNS + [(config.PLAYER_START_X, config.PLAYER_START_Y)]:
+        tile = chunks.get_tile(sx, sy)
+        if tile:
+            if tile.tile_type != TileType.TOWN:
+                tile.tile_type = TileType.GRASS
+            tile.resource = None
+
+
+def new_chunk_store(
+    seed: int, width: int, height: int, chunk_dir: str = config.CHUNK_SAVE_DIR,
+) -> ChunkStore:
+    """Empty ChunkStore for a map of this size; large maps generate chunks from `seed`."""
+    if width <= config.CHUNK_SIZE and height <= config.CHUNK_SIZE:
+        return ChunkStore(width, height, make_tiles)
+    from engine.worldgen import generate_chunk
+    return ChunkStore(
+        width, height, make_tiles,
+        generate=lambda store, tiles, key: generate_chunk(seed, store, tiles, key),
+        save_dir=chunk_dir,
+    )
+
+
+def create_world(
+    seed: int = config.WORLD_SEED,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    chunk_dir: str = config.CHUNK_SAVE_DIR,
+) -> World:
+    """Build the starting world; size defaults to WORLD_WIDTH × WORLD_HEIGHT."""
+    rng = random.Random(seed)
+    width = width or config.WORLD_WIDTH
+    height = height or config.WORLD_HEIGHT
+
+    if width <= config.CHUNK_SIZE and height <= config.CHUNK_SIZE:
+        chunks = _classic_map(rng, width, height)
+    else:
+        # Large maps: noise-based chunks generated on first access
+        chunks = new_chunk_store(seed, width, height, chunk_dir)
+        _place_settlement(chunks)
+
     # 创建NPC档案和实体（4核心 + 4日常 + 1特殊 = 9个角色）
     profiles = _default_profiles()
     profile_map = {p.npc_id: p for p in profiles}
@@ -645,16 +1093,19 @@ def create_world(seed: int = 42) -> World:
         npcs.append(npc)
 
     for npc in npcs:
-        tiles[npc.y][npc.x].npc_ids.append(npc.npc_id)
+        tile = chunks.get_tile(npc.x, npc.y)
+        if tile:
+            tile.enter(npc.npc_id)
 
     player = None
     if config.PLAYER_ENABLED:
         player = Player()
-        if 0 <= player.x < width and 0 <= player.y < height:
-            tiles[player.y][player.x].player_here = True
+        tile = chunks.get_tile(player.x, player.y)
+        if tile:
+            tile.player_here = True
 
     return World(
-        width=width, height=height, tiles=tiles,
+        width=width, height=height, seed=seed, chunks=chunks,
         npcs=npcs, god=GodEntity(), player=player,
         market=_make_market(),
     )
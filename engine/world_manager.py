@@ -5,6 +5,10 @@ import random
 from typing import Optional
 
 import config
+from engine.market import BUY, SELL, Order, affordable, clearing_price, verify_ledger
+from engine.action_log import ActionLog
+from engine.inbox import HIGH
+from engine.pathfinding import EXCHANGE
 from engine.world import (
     GodEntity, Inventory, NPC, Player, Resource, ResourceType,
     TileType, WeatherType, World, MarketPrice,
@@ -12,10 +16,108 @@ from engine.world import (
 from game.events import EventBus, EventType, WorldEvent
 
 
+# Parametric actions the engine executes step by step across world ticks
+MACRO_ACTIONS = ("move_to", "move_to_nearest", "gather_until", "go_sell")
+
+# Primitive actions an execution call may queue behind its main action
+QUEUEABLE_ACTIONS = (
+    "move", "gather", "rest", "sleep", "eat", "craft", "sell", "buy", "use_item", "build",
+)
+
+
+def check_npc_action(npc: NPC, action: dict, world: World) -> str:
+    """Why a queued primitive action cannot run right now; "" when it can.
+
+    Mirrors the guards of the matching `_do_*` handler so a stale queue is
+    dropped before it silently no-ops.
+    """
+    action_type = action.get("action", "")
+    if action_type not in QUEUEABLE_ACTIONS:
+        return f"{action_type} 不能排队执行"
+    inv = npc.inventory
+    tile = world.get_tile(npc.x, npc.y)
+
+    if action_type == "move":
+        dx = max(-1, min(1, int(action.get("dx", 0) or 0)))
+        dy = max(-1, min(1, int(action.get("dy", 0) or 0)))
+        dest = world.get_tile(npc.x + dx, npc.y + dy)
+        if not dest or dest.tile_type == TileType.WATER:
+            return f"({npc.x + dx},{npc.y + dy})无法通行"
+    elif action_type == "gather":
+        if not tile or not tile.resource or tile.resource.quantity <= 0:
+            return "这里没有可采集的资源"
+        if tile.tile_type == TileType.TOWN or not inv.has_space(1):
+            return "无法在这里采集"
+    elif action_type == "eat":
+        if inv.food <= 0:
+            return "没有食物可以吃"
+    elif action_type == "craft":
+        recipe = config.CRAFTING_RECIPES.get(action.get("craft_item", ""))
+        if not recipe or any(inv.get(m) < n for m, n in recipe.items()):
+            return "材料不足，无法制造"
+    elif action_type in ("sell", "buy"):
+        if not tile or not tile.is_exchange:
+            return "不在交易所"
+        if action_type == "sell" and inv.get(action.get("sell_item", "")) <= 0:
+            return f"没有{action.get('sell_item', '')}可以卖"
+        if action_type == "buy":
+            mp = world.market.prices.get(action.get("buy_item", ""))
+            if not mp or inv.gold < mp.current:
+                return "金币不足或无此商品"
+    elif action_type == "use_item":
+        if inv.get(action.get("use_item", "")) <= 0:
+            return f"没有{action.get('use_item', '')}可以使用"
+    elif action_type == "build":
+        recipe = config.FURNITURE_RECIPES.get(action.get("build_furniture", ""))
+        if not recipe or not tile or tile.furniture:
+            return "这里不能建造"
+        if any(inv.get(m) < n for m, n in recipe.items()):
+            return "材料不足，无法建造"
+    return ""
+
+
 class WorldManager:
     def __init__(self, event_bus: EventBus):
         self.event_bus = event_bus
         self._rng = random.Random()
+        # Draws the per-tick seed that `_rng` is reset to; logged for replay
+        self._seed_rng = random.Random()
+        self.action_log: Optional[ActionLog] = None
+        # Bumped by every tick / applied action; WorldView snapshots compare it
+        self.revision = 0
+
+    def rng_state(self) -> tuple:
+        """Both RNG states, for checkpoints."""
+        return self._rng.getstate(), self._seed_rng.getstate()
+
+    def set_rng_state(self, state: tuple):
+        self._rng.setstate(state[0])
+        self._seed_rng.setstate(state[1])
+
+    # ── World tick ─────────────────────────────────────────────────────────────
+
+    def tick(self, world: World, seed: Optional[int] = None) -> list[WorldEvent]:
+        """Advance one world tick: time, passive effects, macro steps, exchange orders, market.
+
+        `seed` (replay only) overrides the freshly drawn per-tick RNG seed.
+        """
+        if seed is None:
+            seed = self._seed_rng.getrandbits(32)
+        self._rng.seed(seed)
+        self.revision += 1
+        world.time.advance()
+        tick = world.time.tick
+        if self.action_log:
+            self.action_log.tick(tick, seed)
+
+        self.apply_passive(world)
+        events = self.advance_macros(world)
+        events.extend(self.clear_orders(world))
+        if tick % config.MARKET_UPDATE_INTERVAL == 0:
+            events.append(self.update_market(world))
+        if self.action_log:
+            self.action_log.flush()
+        return events
 
     # ── Market update ──────────────────────────────────────────────────────────
 
@@ -24,31 +126,15 @@ class WorldManager:
         tick = world.time.tick
         market = world.market
 
-        # Count supply on the map + in NPC inventories
-        supply: dict[str, float] = {item: 0.0 for item in config.MARKET_BASE_PRICES}
-        for row in world.tiles:
-            for tile in row:
-                if tile.resource:
-                    rt = tile.resource.resource_type.value
-                    if rt in supply:
-                        supply[rt] += tile.resource.quantity
-
-        for npc in world.npcs:
-            inv = npc.inventory
-            for item in supply:
-                supply[item] += inv.get(item)
-
-        # Demand proxy: how many NPCs are low on each resource
-        demand: dict[str, float] = {item: 1.0 for item in config.MARKET_BASE_PRICES}
-        for npc in world.npcs:
-            inv = npc.inventory
-            # Low food → demand food more
-            if inv.food < 3:
-                demand["food"] = demand.get("food", 1.0) + 2.0
-            # Low energy → demand potions / bread
-            if npc.energy < 40:
-                demand["potion"] = demand.get("potion", 1.0) + 1.5
-                demand["bread"] = demand.get("bread", 1.0) + 1.0
+        # Supply (on-map + NPC inventories) and demand (NPCs low on food / energy)
+        # come from running counters, so an update is O(items)
+        if config.MARKET_CHECK_LEDGER:
+            problems = verify_ledger(world)
+            if problems:
+                raise RuntimeError("market ledger out of sync: " + "; ".join(problems))
+        ledger = world.market_ledger
+        supply = ledger.supply(world.resource_supply())
+        demand = ledger.demand()
 
         # Weather modifier
         weather = world.weather
@@ -75,12 +161,11 @@ class WorldManager:
             )
             mp.current = new_current
 
-            # Record history (keep last 30)
-            hist = market.history.setdefault(item, [])
-            hist.append(new_current)
-            if len(hist) > 30:
-                hist.pop(0)
-
+        # Record history (bounded ring + hour / day / season candles)
+        market.history.record(
+            tick, world.time.day, world.time.hour,
+            {item: mp.current for item, mp in market.prices.items()},
+        )
         market.last_update_tick = tick
 
         return WorldEvent(
@@ -115,11 +200,8 @@ class WorldManager:
                 npc.inventory.food -= 1
                 npc.energy = min(100, npc.energy + config.FOOD_ENERGY_RESTORE)
 
-            # Expire pending proposals older than 10 ticks
-            npc.pending_proposals = [
-                p for p in npc.pending_proposals
-                if tick - p.get("tick", 0) <= 10
-            ]
+        # Expire trade proposals older than TRADE_PROPOSAL_TTL ticks
+        world.proposals.expire(tick)
 
         # Energy drain for player too
         if world.player:
@@ -131,26 +213,15 @@ class WorldManager:
 
         # Resource regrowth (slow, every 10 ticks)
         if tick % 10 == 0:
-            for row in world.tiles:
-                for tile in row:
-                    if tile.resource and tile.resource.quantity < tile.resource.max_quantity:
-                        regrow = 2 if world.weather == WeatherType.RAINY else 1
-                        tile.resource.quantity = min(
-                            tile.resource.max_quantity,
-                            tile.resource.quantity + regrow,
-                        )
+            world.regrow_resources(2 if world.weather == WeatherType.RAINY else 1)
 
         # Food bush regrowth (slower, every 15 ticks)
         if tick % 15 == 0:
-            for row in world.tiles:
-                for tile in row:
-                    if (tile.resource and
-                            tile.resource.resource_type == ResourceType.FOOD and
-                            tile.resource.quantity < tile.resource.max_quantity):
-                        tile.resource.quantity = min(
-                            tile.resource.max_quantity,
-                            tile.resource.quantity + 1,
-                        )
+            world.regrow_resources(1, ResourceType.FOOD)
+
+        # Page idle, unoccupied chunks of large maps out to disk
+        if tick % config.CHUNK_SWEEP_INTERVAL == 0:
+            world.chunks.sweep()
 
     # ── NPC actions ───────────────────────────────────────────────────────────
 
@@ -159,13 +230,23 @@ class WorldManager:
         action_type = action.get("action", "idle")
         events: list[WorldEvent] = []
         tick = world.time.tick
+        self.revision += 1
+        if self.action_log:
+            self.action_log.npc(tick, npc.npc_id, action)
 
         # Store thought if provided
         thought = action.get("thought", "").strip()
         if thought:
             npc.last_thought = thought
 
-        if action_type == "move":
+        # A fresh decision supersedes whatever macro was still running
+        if npc.macro and action_type not in MACRO_ACTIONS:
+            npc.macro = None
+
+        if action_type in MACRO_ACTIONS:
+            events.extend(self._start_macro(npc, action, world, tick))
+
+        elif action_type == "move":
             events.extend(self._do_move(npc, action, world, tick))
 
         elif action_type == "gather":
@@ -254,13 +335,7 @@ class WorldManager:
         if not new_tile or new_tile.tile_type == TileType.WATER:
             return []
 
-        # Remove from old tile
-        old_tile = world.get_tile(npc.x, npc.y)
-        if old_tile and npc.npc_id in old_tile.npc_ids:
-            old_tile.npc_ids.remove(npc.npc_id)
-
-        npc.x, npc.y = new_x, new_y
-        new_tile.npc_ids.append(npc.npc_id)
+        world.move_npc(npc, new_x, new_y)
 
         energy_cost = 3 if world.weather == WeatherType.STORM else 2
         if npc.equipped == "rope":
@@ -302,6 +377,8 @@ class WorldManager:
         if amount <= 0:
             return []
         tile.resource.quantity -= amount
+        if tile.resource.quantity == 0:
+            world.tile_changed(tile.x, tile.y)
 
         if rtype == ResourceType.FOOD:
             npc.inventory.food = npc.inventory.food + amount
@@ -354,6 +431,7 @@ class WorldManager:
             t_npc = world.get_npc(target_id) if target_id else None
             if t_npc:
                 target_name = t_npc.name
+                self._interrupt_macro(t_npc, f"{npc.name}在跟你说话")
         npc.last_action_result = f"对{target_name}说了话"
 
         # If talking to player, push to dialogue_queue for reply UI
@@ -366,7 +444,6 @@ class WorldManager:
                 "tick": tick,
                 "reply_options": None,  # filled by GodAgent async
             })
-            world._pending_dialogue_option_gen = True
 
         return [WorldEvent(
             event_type=EventType.NPC_SPOKE,
@@ -601,50 +678,52 @@ class WorldManager:
         )]
 
     def _do_sell(self, npc: NPC, action: dict, world: World, tick: int) -> list[WorldEvent]:
-        """Sell items at market price (must be at exchange)."""
-        tile = world.get_tile(npc.x, npc.y)
-        if not tile or not tile.is_exchange:
-            return []
-
+        """Place a sell order at the exchange; it fills when the tick's orders clear."""
         item = action.get("sell_item", "").strip()
         qty = int(action.get("sell_qty", 0) or 0)
-        if not item or qty <= 0:
-            return []
+        if world.market.prices.get(item) is None:
+            return self._sell_at_rate(npc, item, qty, world, tick)
+        self._place_sell(npc, item, qty, world)
+        return []
 
+    def _place_sell(self, npc, item: str, qty: int, world: World) -> bool:
+        """Move up to `qty` of `item` into escrow as a sell order (must be at exchange)."""
+        tile = world.get_tile(npc.x, npc.y)
+        if not tile or not tile.is_exchange or not item or qty <= 0:
+            return False
         npc_has = npc.inventory.get(item)
         qty = min(qty, npc_has)
         if qty <= 0:
-            return []
+            return False
 
-        # Use market price if available, else fall back to legacy exchange rates
-        mp = world.market.prices.get(item)
-        if mp:
-            price = mp.current
-        else:
-            rates = {"wood": config.EXCHANGE_RATE_WOOD, "stone": config.EXCHANGE_RATE_STONE,
-                     "ore": config.EXCHANGE_RATE_ORE}
-            price = rates.get(item, 1.0)
-
-        gold_earned = round(qty * price, 1)
+        actor_id = getattr(npc, "npc_id", getattr(npc, "player_id", "unknown"))
         npc.inventory.set(item, npc_has - qty)
-        npc.inventory.gold = round(npc.inventory.gold + gold_earned, 1)
+        world.market.orders.submit(actor_id, SELL, item, qty)
         npc.last_action = "sell"
-        npc.last_action_result = f"以{price:.1f}金/个卖出了{qty}个{item}，获得{gold_earned:.0f}金"
-        actor_id = getattr(npc, "npc_id", getattr(npc, "player_id", "unknown"))
-        evt = EventType.PLAYER_SOLD if actor_id == "player" else EventType.NPC_SOLD
+        npc.last_action_result = (
+            f"挂单卖出{qty}个{item}（参考价{world.market.prices[item].current:.1f}金/个），本回合结束时成交"
+        )
+        return True
 
-        return [WorldEvent(
-            event_type=evt,
-            tick=tick,
-            actor_id=actor_id,
-            origin_x=npc.x,
-            origin_y=npc.y,
-            radius=4,
-            payload={"item": item, "qty": qty, "gold": gold_earned, "price": price},
-        )]
+    def _sell_at_rate(self, npc, item: str, qty: int, world: World, tick: int) -> list[WorldEvent]:
+        """Items without a market price sell at once at the legacy exchange rates."""
+        tile = world.get_tile(npc.x, npc.y)
+        if not tile or not tile.is_exchange or not item or qty <= 0:
+            return []
+        npc_has = npc.inventory.get(item)
+        qty = min(qty, npc_has)
+        if qty <= 0:
+            return []
+
+        rates = {"wood": config.EXCHANGE_RATE_WOOD, "stone": config.EXCHANGE_RATE_STONE,
+                 "ore": config.EXCHANGE_RATE_ORE}
+        price = rates.get(item, 1.0)
+        npc.inventory.set(item, npc_has - qty)
+        npc.last_action = "sell"
+        return self._settle_sell(npc, item, qty, price, tick)
 
     def _do_buy(self, npc: NPC, action: dict, world: World, tick: int) -> list[WorldEvent]:
-        """Buy items at market price (must be at exchange)."""
+        """Place a buy order at the exchange; it fills when the tick's orders clear."""
         tile = world.get_tile(npc.x, npc.y)
         if not tile or not tile.is_exchange:
             return []
@@ -661,36 +740,102 @@ class WorldManager:
                 return self._do_buy_food(npc, {"quantity": qty}, world, tick)
             return []
 
-        total_cost = round(qty * mp.current, 1)
-        if npc.inventory.gold < total_cost:
-            # Buy as many as affordable
+        escrow = round(qty * mp.current, 1)
+        if npc.inventory.gold < escrow:
+            # Order as many as affordable
             qty = int(npc.inventory.gold / mp.current)
-            total_cost = round(qty * mp.current, 1)
+            escrow = round(qty * mp.current, 1)
         if qty <= 0:
             return []
 
-        # Capacity check
+        # Capacity check (checked again when the order fills)
         if not npc.inventory.has_space(qty):
             qty = config.INVENTORY_MAX_SLOTS - npc.inventory.total_items()
-            total_cost = round(qty * mp.current, 1)
+            escrow = round(qty * mp.current, 1)
         if qty <= 0:
             return []
 
-        npc.inventory.gold = round(npc.inventory.gold - total_cost, 1)
-        npc.inventory.set(item, npc.inventory.get(item) + qty)
-        npc.last_action = "buy"
-        npc.last_action_result = f"以{mp.current:.1f}金/个买了{qty}个{item}，花了{total_cost:.0f}金"
         actor_id = getattr(npc, "npc_id", getattr(npc, "player_id", "unknown"))
+        npc.inventory.gold = round(npc.inventory.gold - escrow, 1)
+        world.market.orders.submit(actor_id, BUY, item, qty, escrow)
+        npc.last_action = "buy"
+        npc.last_action_result = (
+            f"挂单买入{qty}个{item}（参考价{mp.current:.1f}金/个，预付{escrow:.1f}金），本回合结束时成交"
+        )
+        return []
+
+    # ── Exchange batch clearing ───────────────────────────────────────────────
+
+    def clear_orders(self, world: World) -> list[WorldEvent]:
+        """Fill every pending exchange order at one clearing price per item.
+
+        The price is the item's current price shifted by the batch's net
+        volume (units bought minus units sold, see `clearing_price`), and
+        becomes the new current price.  Buy orders fill as far as their
+        escrow and free inventory slots allow; the rest is refunded.
+        """
+        book = world.market.orders
+        if not book:
+            return []
+        tick = world.time.tick
+        events: list[WorldEvent] = []
+        for item, orders in book.take().items():
+            mp = world.market.prices[item]
+            sold = sum(o.qty for o in orders if o.side == SELL)
+            bought = sum(o.qty for o in orders if o.side == BUY)
+            price = clearing_price(mp.current, mp.min_p, mp.max_p, sold, bought)
+            mp.current = price
+            book.last_clearing[item] = {"tick": tick, "price": price, "sold": sold, "bought": bought}
+            for order in orders:
+                actor = world.get_entity(order.actor_id)
+                if actor is None:
+                    continue    # left the world; escrow is forfeit
+                if order.side == SELL:
+                    events.extend(self._settle_sell(actor, item, order.qty, price, tick))
+                else:
+                    events.extend(self._settle_buy(actor, order, price, tick))
+        return events
+
+    def _settle_sell(self, actor, item: str, qty: int, price: float, tick: int) -> list[WorldEvent]:
+        gold_earned = round(qty * price, 1)
+        actor.inventory.gold = round(actor.inventory.gold + gold_earned, 1)
+        actor.last_action_result = f"以{price:.1f}金/个卖出了{qty}个{item}，获得{gold_earned:.0f}金"
+        actor_id = getattr(actor, "npc_id", getattr(actor, "player_id", "unknown"))
+        evt = EventType.PLAYER_SOLD if actor_id == "player" else EventType.NPC_SOLD
+
+        return [WorldEvent(
+            event_type=evt,
+            tick=tick,
+            actor_id=actor_id,
+            origin_x=actor.x,
+            origin_y=actor.y,
+            radius=4,
+            payload={"item": item, "qty": qty, "gold": gold_earned, "price": price},
+        )]
+
+    def _settle_buy(self, actor, order: Order, price: float, tick: int) -> list[WorldEvent]:
+        item = order.item
+        qty = affordable(order.escrow, price, order.qty)
+        qty = max(0, min(qty, config.INVENTORY_MAX_SLOTS - actor.inventory.total_items()))
+        total_cost = round(qty * price, 1)
+        actor.inventory.gold = round(actor.inventory.gold + order.escrow - total_cost, 1)
+        if qty <= 0:
+            actor.last_action_result = f"买单未成交（{item}成交价{price:.1f}金/个），退回{order.escrow:.1f}金"
+            return []
+
+        actor.inventory.set(item, actor.inventory.get(item) + qty)
+        actor.last_action_result = f"以{price:.1f}金/个买了{qty}个{item}，花了{total_cost:.0f}金"
+        actor_id = getattr(actor, "npc_id", getattr(actor, "player_id", "unknown"))
         evt = EventType.PLAYER_BOUGHT if actor_id == "player" else EventType.NPC_BOUGHT
 
         return [WorldEvent(
             event_type=evt,
             tick=tick,
             actor_id=actor_id,
-            origin_x=npc.x,
-            origin_y=npc.y,
+            origin_x=actor.x,
+            origin_y=actor.y,
             radius=4,
-            payload={"item": item, "qty": qty, "gold": total_cost, "price": mp.current},
+            payload={"item": item, "qty": qty, "gold": total_cost, "price": price},
         )]
 
     def _do_equip_item(self, character, item: str, world: World, tick: int) -> list[WorldEvent]:
@@ -774,7 +919,7 @@ class WorldManager:
         if npc.inventory.get(offer_item) < offer_qty:
             return []
 
-        proposal = {
+        world.proposals.add(target_id, {
             "from_id": npc.npc_id,
             "offer_item": offer_item,
             "offer_qty": offer_qty,
@@ -782,8 +927,8 @@ class WorldManager:
             "request_qty": request_qty,
             "tick": tick,
             "round": 1,
-        }
-        target_npc.pending_proposals.append(proposal)
+        }, tick)
+        self._interrupt_macro(target_npc, f"收到{npc.name}的交易提案")
         npc.last_action = "propose_trade"
         npc.last_action_result = f"向{target_npc.name}提出交易：{offer_qty}{offer_item}换{request_qty}{request_item}"
 
@@ -801,27 +946,27 @@ class WorldManager:
             },
         )]
 
-    def _find_proposal(self, npc: NPC, action: dict) -> Optional[dict]:
+    def _find_proposal(self, npc: NPC, action: dict, world: World) -> Optional[dict]:
         """Find the pending proposal from proposal_from or the oldest one."""
         from_id = action.get("proposal_from", "").strip()
         if from_id:
-            for p in npc.pending_proposals:
-                if p.get("from_id") == from_id:
-                    return p
-        if npc.pending_proposals:
-            return npc.pending_proposals[0]
-        return None
+            proposal = world.proposals.find(npc.npc_id, from_id)
+            if proposal:
+                return proposal
+        return world.proposals.oldest(npc.npc_id)
 
     def _do_accept_trade(self, npc: NPC, action: dict, world: World, tick: int) -> list[WorldEvent]:
         """Accept a pending trade proposal."""
-        proposal = self._find_proposal(npc, action)
+        proposal = self._find_proposal(npc, action, world)
         if not proposal:
+            npc.last_action_result = "没有找到这笔交易提案（可能已被处理）"
             return []
 
         from_id = proposal["from_id"]
         from_npc = world.get_npc(from_id)
         if not from_npc:
-            npc.pending_proposals.remove(proposal)
+            world.proposals.remove(proposal)
+            npc.last_action_result = "提出交易的人已经不在了，交易取消"
             return []
 
         # Verify both parties still have the items
@@ -830,9 +975,14 @@ class WorldManager:
         recv_item = proposal["offer_item"]     # npc receives this
         recv_qty = proposal["offer_qty"]
 
-        if (npc.inventory.get(give_item) < give_qty or
-                from_npc.inventory.get(recv_item) < recv_qty):
-            npc.pending_proposals.remove(proposal)
+        if npc.inventory.get(give_item) < give_qty:
+            world.proposals.remove(proposal)
+            npc.last_action_result = f"交易未能完成：你的{give_item}不足{give_qty}个"
+            return []
+        if from_npc.inventory.get(recv_item) < recv_qty:
+            # e.g. the same goods were already traded to someone else this batch
+            world.proposals.remove(proposal)
+            npc.last_action_result = f"交易未能完成：{from_npc.name}已经没有足够的{recv_item}了"
             return []
 
         # Execute
@@ -841,7 +991,7 @@ class WorldManager:
         from_npc.inventory.set(recv_item, from_npc.inventory.get(recv_item) - recv_qty)
         from_npc.inventory.set(give_item, from_npc.inventory.get(give_item) + give_qty)
 
-        npc.pending_proposals.remove(proposal)
+        world.proposals.remove(proposal)
         npc.last_action = "accept_trade"
         npc.last_action_result = f"接受了{from_npc.name}的交易，给出{give_qty}{give_item}获得{recv_qty}{recv_item}"
         from_npc.last_action = "trade"
@@ -860,13 +1010,13 @@ class WorldManager:
 
     def _do_reject_trade(self, npc: NPC, action: dict, world: World, tick: int) -> list[WorldEvent]:
         """Reject a pending trade proposal and notify proposer."""
-        proposal = self._find_proposal(npc, action)
+        proposal = self._find_proposal(npc, action, world)
         if not proposal:
             return []
 
         from_id = proposal["from_id"]
         from_npc = world.get_npc(from_id)
-        npc.pending_proposals.remove(proposal)
+        world.proposals.remove(proposal)
         npc.last_action = "reject_trade"
         from_name = from_npc.name if from_npc else from_id
         npc.last_action_result = f"拒绝了{from_name}的交易提案"
@@ -876,7 +1026,8 @@ class WorldManager:
             from_npc.memory.add_to_inbox(
                 f"{npc.name} 拒绝了你提出的交易 "
                 f"({proposal['offer_qty']}{proposal['offer_item']}↔"
-                f"{proposal['request_qty']}{proposal['request_item']})"
+                f"{proposal['request_qty']}{proposal['request_item']})",
+                HIGH,
             )
 
         return [WorldEvent(
@@ -891,13 +1042,13 @@ class WorldManager:
 
     def _do_counter_trade(self, npc: NPC, action: dict, world: World, tick: int) -> list[WorldEvent]:
         """Counter a pending proposal with different terms."""
-        proposal = self._find_proposal(npc, action)
+        proposal = self._find_proposal(npc, action, world)
         if not proposal:
             return []
 
         from_id = proposal["from_id"]
         from_npc = world.get_npc(from_id)
-        npc.pending_proposals.remove(proposal)
+        world.proposals.remove(proposal)
 
         offer_item = action.get("offer_item", "")
         offer_qty = int(action.get("offer_qty", 0) or 0)
@@ -917,7 +1068,7 @@ class WorldManager:
 
         # Send counter proposal to original proposer
         if from_npc:
-            counter = {
+            world.proposals.add(from_id, {
                 "from_id": npc.npc_id,
                 "offer_item": offer_item,
                 "offer_qty": offer_qty,
@@ -925,8 +1076,8 @@ class WorldManager:
                 "request_qty": request_qty,
                 "tick": tick,
                 "round": proposal.get("round", 1) + 1,
-            }
-            from_npc.pending_proposals.append(counter)
+            }, tick)
+            self._interrupt_macro(from_npc, f"收到{npc.name}的反提案")
 
         return [WorldEvent(
             event_type=EventType.TRADE_COUNTERED,
@@ -962,6 +1113,7 @@ class WorldManager:
         for mat, qty in recipe.items():
             character.inventory.set(mat, character.inventory.get(mat) - qty)
         tile.furniture = furniture
+        world.tile_changed(tile.x, tile.y)
 
         actor_id = getattr(character, "npc_id", getattr(character, "player_id", "unknown"))
         character.last_action = "build"
@@ -977,6 +1129,175 @@ class WorldManager:
             payload={"furniture": furniture, "x": character.x, "y": character.y},
         )]
 
+    # ── Macro actions (engine-executed, one step per world tick) ──────────────
+
+    def _start_macro(self, npc: NPC, action: dict, world: World, tick: int) -> list[WorldEvent]:
+        """Validate a macro action, store it on the NPC and run its first step."""
+        kind = action["action"]
+        macro: dict = {"action": kind, "steps": 0}
+
+        if kind == "move_to":
+            tx, ty = action.get("target_x"), action.get("target_y")
+            if tx is None or ty is None:
+                npc.last_action_result = "move_to 没有指定目标坐标"
+                return []
+            macro.update(target=(int(tx), int(ty)), path=None)
+
+        elif kind == "move_to_nearest":
+            target = str(action.get("resource") or "").strip()
+            if not target:
+                npc.last_action_result = "move_to_nearest 没有指定目标"
+                return []
+            macro["target"] = target
+
+        elif kind == "gather_until":
+            resource = str(action.get("resource") or "").strip()
+            if not resource:
+                tile = world.get_tile(npc.x, npc.y)
+                if tile and tile.resource:
+                    resource = tile.resource.resource_type.value
+            until_qty = int(action.get("until_qty") or 0)
+            if resource not in {r.value for r in ResourceType} or until_qty <= 0:
+                npc.last_action_result = "gather_until 需要资源类型和目标数量"
+                return []
+            macro.update(resource=resource, until_qty=until_qty)
+
+        elif kind == "go_sell":
+            item = str(action.get("sell_item") or "").strip()
+            if not item or npc.inventory.get(item) <= 0:
+                npc.last_action_result = f"没有{item}可以卖" if item else "go_sell 没有指定物品"
+                return []
+            macro.update(sell_item=item, sell_qty=int(action.get("sell_qty") or 0))
+
+        npc.macro = macro
+        return self._step_macro(npc, world, tick)
+
+    def advance_macros(self, world: World) -> list[WorldEvent]:
+        """Run one step of every NPC's active macro. Called once per world tick."""
+        tick = world.time.tick
+        events: list[WorldEvent] = []
+        for npc in world.npcs:
+            if npc.macro:
+                events.extend(self._step_macro(npc, world, tick))
+        return events
+
+    def _step_macro(self, npc: NPC, world: World, tick: int) -> list[WorldEvent]:
+        macro = npc.macro
+        if npc.energy < config.MACRO_MIN_ENERGY:
+            self._interrupt_macro(npc, f"体力不足({npc.energy})")
+            return []
+        if macro["steps"] >= config.MACRO_MAX_STEPS:
+            self._interrupt_macro(npc, "步数超过上限")
+            return []
+        macro["steps"] += 1
+        step = getattr(self, f"_macro_{macro['action']}")
+        return step(npc, macro, world, tick)
+
+    def _finish_macro(self, npc: NPC, result: str):
+        npc.last_action_result = f"{result}（{npc.macro['action']}完成）"
+        npc.macro = None
+
+    def _interrupt_macro(self, npc: NPC, reason: str):
+        """Abort the NPC's running macro (no-op when none) so its brain takes over."""
+        if not npc.macro:
+            return
+        npc.last_action_result = (
+            f"{npc.macro['action']}在第{npc.macro['steps']}步被打断：{reason}"
+            f"，当前位于({npc.x},{npc.y})"
+        )
+        npc.macro = None
+
+    def _walk_toward(self, npc: NPC, kind: str, world: World, tick: int) -> Optional[list[WorldEvent]]:
+        """One flow-field step toward the nearest `kind`; None if unreachable."""
+        step = world.paths.step_toward(kind, npc.x, npc.y) if world.paths else None
+        if step is None:
+            return None
+        return self._do_move(npc, {"dx": step[0], "dy": step[1]}, world, tick)
+
+    def _macro_move_to(self, npc: NPC, macro: dict, world: World, tick: int) -> list[WorldEvent]:
+        tx, ty = macro["target"]
+        if (npc.x, npc.y) == (tx, ty):
+            self._finish_macro(npc, f"已在({tx},{ty})")
+            return []
+        if not macro["path"]:
+            path = world.paths.find_path(npc.x, npc.y, tx, ty) if world.paths else None
+            if not path:
+                self._interrupt_macro(npc, f"无法到达({tx},{ty})")
+                return []
+            macro["path"] = path
+        dx, dy = macro["path"].pop(0)
+        events = self._do_move(npc, {"dx": dx, "dy": dy}, world, tick)
+        if not events:
+            macro["path"] = None     # blocked: re-plan next tick
+        elif (npc.x, npc.y) == (tx, ty):
+            self._finish_macro(npc, f"到达了({tx},{ty})")
+        return events
+
+    def _macro_move_to_nearest(self, npc: NPC, macro: dict, world: World, tick: int) -> list[WorldEvent]:
+        target = macro["target"]
+        events = self._walk_toward(npc, target, world, tick)
+        if events is None:
+            if world.paths and world.paths.distance(target, npc.x, npc.y) == 0:
+                self._finish_macro(npc, f"已在最近的{target}({npc.x},{npc.y})")
+            else:
+                self._interrupt_macro(npc, f"附近找不到可到达的{target}")
+            return []
+        if world.paths.distance(target, npc.x, npc.y) == 0:
+            self._finish_macro(npc, f"到达了最近的{target}({npc.x},{npc.y})")
+        return events
+
+    def _macro_gather_until(self, npc: NPC, macro: dict, world: World, tick: int) -> list[WorldEvent]:
+        resource, goal = macro["resource"], macro["until_qty"]
+        if npc.inventory.get(resource) >= goal:
+            self._finish_macro(npc, f"{resource}已有{npc.inventory.get(resource)}个")
+            return []
+        if not npc.inventory.has_space(1):
+            self._interrupt_macro(npc, "背包已满")
+            return []
+
+        tile = world.get_tile(npc.x, npc.y)
+        if (tile and tile.tile_type != TileType.TOWN and tile.resource
+                and tile.resource.quantity > 0 and tile.resource.resource_type.value == resource):
+            events = self._do_gather(npc, world, tick)
+            if not events:
+                self._interrupt_macro(npc, "采集失败")
+            elif npc.inventory.get(resource) >= goal:
+                self._finish_macro(npc, f"采集完成，{resource}已有{npc.inventory.get(resource)}个")
+            return events
+
+        events = self._walk_toward(npc, resource, world, tick)
+        if events is None:
+            self._interrupt_macro(npc, f"附近没有可采集的{resource}了")
+            return []
+        return events
+
+    def _macro_go_sell(self, npc: NPC, macro: dict, world: World, tick: int) -> list[WorldEvent]:
+        item = macro["sell_item"]
+        if npc.inventory.get(item) <= 0:
+            self._interrupt_macro(npc, f"身上已经没有{item}")
+            return []
+
+        tile = world.get_tile(npc.x, npc.y)
+        if tile and tile.is_exchange:
+            qty = macro["sell_qty"] or npc.inventory.get(item)
+            if world.market.prices.get(item) is None:
+                events = self._sell_at_rate(npc, item, qty, world, tick)
+                placed = bool(events)
+            else:
+                events = []
+                placed = self._place_sell(npc, item, qty, world)
+            if placed:
+                self._finish_macro(npc, npc.last_action_result)
+            else:
+                self._interrupt_macro(npc, "卖出失败")
+            return events
+
+        events = self._walk_toward(npc, EXCHANGE, world, tick)
+        if events is None:
+            self._interrupt_macro(npc, "找不到通往交易所的路")
+            return []
+        return events
+
     # ── Player actions ─────────────────────────────────────────────────────────
 
     def apply_player_action(self, player: Player, action: dict, world: World) -> list[WorldEvent]:
@@ -984,6 +1305,9 @@ class WorldManager:
         action_type = action.get("action", "idle")
         tick = world.time.tick
         events: list[WorldEvent] = []
+        self.revision += 1
+        if self.action_log:
+            self.action_log.player(tick, action)
 
         if action_type == "move":
             events.extend(self._player_move(player, action, world, tick))
@@ -1045,13 +1369,7 @@ class WorldManager:
         if not new_tile or new_tile.tile_type == TileType.WATER:
             return []
 
-        # Update tile player_here flags
-        old_tile = world.get_tile(player.x, player.y)
-        if old_tile:
-            old_tile.player_here = False
-
-        player.x, player.y = new_x, new_y
-        new_tile.player_here = True
+        world.move_player(new_x, new_y)
 
         energy_cost = 3 if world.weather == WeatherType.STORM else 2
         if player.equipped == "rope":
@@ -1089,6 +1407,8 @@ class WorldManager:
             return []
 
         tile.resource.quantity -= amount
+        if tile.resource.quantity == 0:
+            world.tile_changed(tile.x, tile.y)
 
         if rtype == ResourceType.FOOD:
             player.inventory.food += amount
@@ -1118,7 +1438,8 @@ class WorldManager:
         if target_id:
             target = world.get_npc(target_id)
             if target:
-                target.memory.add_to_inbox(f"[{player.name}对你说] {message}")
+                target.memory.add_to_inbox(f"[{player.name}对你说] {message}", HIGH)
+                self._interrupt_macro(target, f"{player.name}在跟你说话")
 
         return [WorldEvent(
             event_type=EventType.PLAYER_SPOKE,
@@ -1279,16 +1600,17 @@ class WorldManager:
         if player.inventory.get(offer_item) < offer_qty:
             return []
 
-        proposal = {
+        world.proposals.add(target_id, {
             "from_id": "player",
             "offer_item": offer_item, "offer_qty": offer_qty,
             "request_item": request_item, "request_qty": request_qty,
             "tick": tick, "round": 1,
-        }
-        target_npc.pending_proposals.append(proposal)
+        }, tick)
         target_npc.memory.add_to_inbox(
-            f"[{player.name}] 向你提出交易提案: {offer_qty}{offer_item}↔{request_qty}{request_item}"
+            f"[{player.name}] 向你提出交易提案: {offer_qty}{offer_item}↔{request_qty}{request_item}",
+            HIGH,
         )
+        self._interrupt_macro(target_npc, f"收到{player.name}的交易提案")
         return [WorldEvent(
             event_type=EventType.TRADE_PROPOSED,
             tick=tick,
@@ -1307,12 +1629,8 @@ class WorldManager:
         if not target_npc:
             return []
 
-        # Find matching proposal in NPC's pending list directed to player
-        proposal = None
-        for p in target_npc.pending_proposals:
-            if p.get("from_id") == from_id:
-                proposal = p
-                break
+        # Find the matching proposal directed to the player, if the NPC made one
+        proposal = world.proposals.find(player.player_id, from_id)
 
         # Alternatively, treat as direct action: player accepts offer stored in action
         offer_item = action.get("offer_item", "")
@@ -1334,6 +1652,8 @@ class WorldManager:
         target_npc.inventory.set(request_item, target_npc.inventory.get(request_item) + request_qty)
         player.inventory.set(offer_item, player.inventory.get(offer_item) + offer_qty)
         player.inventory.set(request_item, player.inventory.get(request_item) - request_qty)
+        if proposal:
+            world.proposals.remove(proposal)
 
         return [WorldEvent(
             event_type=EventType.TRADE_ACCEPTED,
@@ -1349,8 +1669,11 @@ class WorldManager:
     def _player_reject_trade(self, player: Player, action: dict, world: World, tick: int) -> list[WorldEvent]:
         from_id = action.get("proposal_from", "")
         target_npc = world.get_npc(from_id)
+        proposal = world.proposals.find(player.player_id, from_id)
+        if proposal:
+            world.proposals.remove(proposal)
         if target_npc:
-            target_npc.memory.add_to_inbox(f"[{player.name}] 拒绝了你的交易提案")
+            target_npc.memory.add_to_inbox(f"[{player.name}] 拒绝了你的交易提案", HIGH)
         return [WorldEvent(
             event_type=EventType.TRADE_REJECTED,
             tick=tick,
@@ -1366,7 +1689,8 @@ class WorldManager:
         reply_msg = str(action.get("message", "")).strip()
         npc = world.get_npc(to_npc_id)
         if npc and reply_msg:
-            npc.memory.add_to_inbox(f"[{player.name}] 对你说: {reply_msg}")
+            npc.memory.add_to_inbox(f"[{player.name}] 对你说: {reply_msg}", HIGH)
+            self._interrupt_macro(npc, f"{player.name}在跟你说话")
         # Remove handled dialogue from queue
         player.dialogue_queue = [
             d for d in player.dialogue_queue if d.get("from_id") != to_npc_id
@@ -1384,6 +1708,12 @@ class WorldManager:
     # ── God actions ───────────────────────────────────────────────────────────
 
     def apply_god_action(self, action: dict, world: World) -> list[WorldEvent]:
+        self.revision += 1
+        if self.action_log:
+            self.action_log.god(world.time.tick, action)
+        return self._apply_god_action(action, world)
+
+    def _apply_god_action(self, action: dict, world: World) -> list[WorldEvent]:
         action_type = action.get("action", "")
         tick = world.time.tick
         events: list[WorldEvent] = []
@@ -1422,6 +1752,7 @@ class WorldManager:
                     else:
                         max_qty = 10
                     tile.resource = Resource(rtype, min(qty, max_qty), max_qty)
+                    world.tile_changed(x, y)
                     world.god.last_commentary = commentary
 
                     events.append(WorldEvent(
@@ -1441,6 +1772,9 @@ class WorldManager:
 
     def apply_direct_god_command(self, cmd: dict, world: World) -> list[WorldEvent]:
         """Apply a god command received directly from browser UI (no LLM)."""
+        self.revision += 1
+        if self.action_log:
+            self.action_log.command(world.time.tick, cmd)
         command = cmd.get("command", "")
         action: dict = {}
 
@@ -1461,5 +1795,5 @@ class WorldManager:
             }
 
         if action:
-            return self.apply_god_action(action, world)
+            return self._apply_god_action(action, world)
         return []
@@ -0,0 +1,207 @@
+"""Frozen snapshots of the World for agents to read while the world keeps changing.
+
+`WorldView.capture(world, previous)` copies what prompt builders read — time,
+weather, recent events, market prices, every NPC and the player, the tile
+layers, glyphs and flow fields — into read-only objects exposing the same
+read API as `World` (`get_tile`, `get_npc`, `get_nearby_npcs_for_npc`,
+`player_within`, `display_name`, `glyphs.window`, `paths.distance` …).
+
+Capturing is cheap because unchanged parts are shared with `previous`: a
+chunk's frozen TileStore is reused while its `version` is unchanged, glyph
+rows while their chunk stamp is unchanged, price history until the next
+market update, open trade proposals until one is added or closed, and flow
+fields are immutable.
+Entities are copied shallowly (their inventories, memories, profiles and
+plan lists included), so a capture costs O(entities + changed chunks).
+Copied NPCs and inventories are detached from the world's MarketLedger: a
+write to a snapshot never reaches the live market counters.
+
+Nothing in a view aliases live mutable state, so a view may be handed to a
+worker thread while the event loop keeps mutating the world.
+"""
+from __future__ import annotations
+
+import copy
+import dataclasses
+from typing import Optional
+
+import config
+from engine.glyphs import GlyphSnapshot
+from engine.pathfinding import EXCHANGE, PathSnapshot
+from engine.spatial import SpatialIndex
+from engine.world import (
+    _DEFAULT_NAMES,
+    GOD_ID,
+    NPC,
+    MarketState,
+    Player,
+    ResourceType,
+    Tile,
+    World,
+)
+
+# Flow fields captured with every view (the kinds navigation hints ask for)
+PATH_KINDS = (EXCHANGE,) + tuple(r.value for r in ResourceType)
+
+
+def freeze_npc(npc: NPC) -> NPC:
+    """Detached copy of an NPC: later changes to `npc` do not show through."""
+    snap = copy.copy(npc)
+    snap.inventory = copy.copy(npc.inventory)
+    snap._ledger = snap.inventory._ledger = None
+    if npc.profile is not None:
+        snap.profile = dataclasses.replace(
+            npc.profile,
+            goals=list(npc.profile.goals),
+            relationships=dict(npc.profile.relationships),
+        )
+    snap.memory = copy.copy(npc.memory)
+    snap.memory.conversation_history = list(npc.memory.conversation_history)
+    snap.memory.personal_notes = list(npc.memory.personal_notes)
+    snap.memory.inbox = npc.memory.inbox.copy()
+    snap.plan = list(npc.plan)
+    snap.action_queue = list(npc.action_queue)
+    snap.macro = dict(npc.macro) if npc.macro else None
+    return snap
+
+
+def freeze_player(player: Player) -> Player:
+    snap = copy.copy(player)
+    snap.inventory = copy.copy(player.inventory)
+    snap.inventory._ledger = None
+    snap.inbox = list(player.inbox)
+    snap.dialogue_queue = list(player.dialogue_queue)
+    return snap
+
+
+class WorldView:
+    """Read-only world snapshot; build with `WorldView.capture`."""
+
+    def __init__(
+        self,
+        world: World,
+        revision: int,
+        stores: dict,
+        npcs: tuple,
+        player: Optional[Player],
+        glyphs: GlyphSnapshot,
+        paths: PathSnapshot,
+        history: tuple,
+        proposals: tuple,
+    ):
+        self.revision = revision           # WorldManager.revision at capture time
+        self.width = world.width
+        self.height = world.height
+        self.seed = world.seed
+        self.time = copy.copy(world.time)
+        self.weather = world.weather
+        self.recent_events = world.recent_events.snapshot()
+        self.market = MarketState(
+            prices={item: copy.copy(mp) for item, mp in world.market.prices.items()},
+            history=history[2],
+            last_update_tick=world.market.last_update_tick,
+        )
+        self.proposals = proposals[2]       # read-only ProposalRegistry
+        self.npcs = npcs
+        self.player = player
+        self.glyphs = glyphs
+        self.paths = paths
+        self._chunk_size = world.chunks.chunk_size
+        self._stores = stores              # chunk key -> (live store, version, frozen store)
+        self._history = history            # (live PriceHistory, version, snapshot)
+        self._proposals = proposals        # (live ProposalRegistry, version, snapshot)
+
+        self._entities: dict = {n.npc_id: n for n in npcs}
+        self._names = {GOD_ID: world.display_name(GOD_ID)}
+        self._names.update((n.npc_id, n.name) for n in npcs)
+        self._npc_ids_at: dict[tuple[int, int], list] = {}
+        self.spatial = SpatialIndex()
+        for n in npcs:
+            self._npc_ids_at.setdefault((n.x, n.y), []).append(n.npc_id)
+            self.spatial.insert(n.npc_id, n, n.x, n.y)
+        if player is not None:
+            self._entities[player.player_id] = player
+            self._names[player.player_id] = world.display_name(player.player_id)
+            self.spatial.insert(player.player_id, player, player.x, player.y)
+
+    @classmethod
+    def capture(cls, world: World, previous: Optional["WorldView"] = None, revision: int = 0) -> "WorldView":
+        """Snapshot `world`, sharing every part unchanged since `previous`."""
+        # Load the chunks NPC vision reaches into, as the live glyph window would
+        chunks = world.chunks
+        r = config.NPC_VISION_RADIUS
+        for npc in world.npcs:
+            for key in {
+                chunks.key_of(min(max(x, 0), world.width - 1), min(max(y, 0), world.height - 1))
+                for x in (npc.x - r, npc.x + r) for y in (npc.y - r, npc.y + r)
+            }:
+                if not chunks.is_loaded(key):
+                    chunks.chunk(key)
+
+        shared = previous._stores if previous is not None else {}
+        stores = {}
+        for chunk in chunks.loaded():
+            old = shared.get(chunk.key)
+            if old is not None and old[0] is chunk.store and old[1] == chunk.store.version:
+                stores[chunk.key] = old
+            else:
+                stores[chunk.key] = (chunk.store, chunk.store.version, chunk.store.frozen())
+
+        live = world.market.history
+        history = previous._history if previous is not None else None
+        if history is None or history[0] is not live or history[1] != live.version:
+            history = (live, live.version, live.snapshot())
+
+        live = world.proposals
+        proposals = previous._proposals if previous is not None else None
+        if proposals is None or proposals[0] is not live or proposals[1] != live.version:
+            proposals = (live, live.version, live.snapshot())
+
+        return cls(
+            world, revision, stores,
+            npcs=tuple(freeze_npc(n) for n in world.npcs),
+            player=freeze_player(world.player) if world.player else None,
+            glyphs=world.glyphs.snapshot(previous.glyphs if previous is not None else None),
+            paths=world.paths.snapshot(PATH_KINDS),
+            history=history,
+            proposals=proposals,
+        )
+
+    # ── World read API ────────────────────────────────────────────────────────
+
+    def get_tile(self, x: int, y: int) -> Optional[Tile]:
+        """Read-only Tile over the frozen layers (None off-map or outside loaded chunks)."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        entry = self._stores.get((x // self._chunk_size, y // self._chunk_size))
+        if entry is None:
+            return None
+        tile = Tile(entry[2], x, y)
+        ids = self._npc_ids_at.get((x, y))
+        if ids:
+            tile.npc_ids = tuple(ids)
+        return tile
+
+    def get_entity(self, entity_id: str):
+        return self._entities.get(entity_id)
+
+    def get_npc(self, npc_id: str) -> Optional[NPC]:
+        entity = self._entities.get(npc_id)
+        return entity if isinstance(entity, NPC) else None
+
+    def display_name(self, entity_id: str) -> str:
+        return self._names.get(entity_id) or _DEFAULT_NAMES.get(entity_id, entity_id)
+
+    def get_nearby_npcs(self, x: int, y: int, radius: int) -> list:
+        return [n for n in self.spatial.query(x, y, radius) if n is not self.player]
+
+    def get_nearby_npcs_for_npc(self, npc: NPC, radius: int) -> list:
+        """NPCs near `npc` (the live NPC or any snapshot of it)."""
+        return [
+            n for n in self.spatial.query(npc.x, npc.y, radius)
+            if n is not self.player and n.npc_id != npc.npc_id
+        ]
+
+    def player_within(self, x: int, y: int, radius: int) -> bool:
+        p = self.player
+        return p is not None and abs(p.x - x) + abs(p.y - y) <= radius
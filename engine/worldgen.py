@@ -0,0 +1,122 @@
+"""Vectorized, seedable procedural terrain / resource generation.
+
+Every layer is a pure function of (seed, world x, world y): terrain comes from
+fractal value noise and resource rolls from a per-tile integer hash.  Any
+rectangle of the map — a 32×32 chunk or a whole 1024×1024 world — is
+therefore produced in a handful of NumPy operations, and neighbouring chunks
+line up seamlessly regardless of the order they are generated in.
+
+Biome semantics follow the classic 20×20 village: rock outcrops and forest
+patches on grass, wood/herb in forests, stone/ore on rock, scattered food
+bushes, and a forest-free clearing around the town and exchange (stamped
+afterwards by engine.world._place_settlement).
+"""
+from __future__ import annotations
+
+import numpy as np
+
+import config
+from engine.tilestore import NO_RESOURCE, TileStore
+from engine.world import RESOURCE_CODES, TILE_CODES, ResourceType, TileType
+
+# Noise wavelengths (tiles) and coverage thresholds, tuned to match the
+# rock (~15%) / forest (~20%) coverage of the classic village map.
+ROCK_SCALE = 9.0
+FOREST_SCALE = 7.0
+ROCK_THRESHOLD = 0.66
+FOREST_THRESHOLD = 0.62
+FOOD_CHANCE = 0.025          # ~10 bushes per 20×20 tiles of grass
+TOWN_CLEARING_RADIUS = 3     # no rock/forest this close to the exchange
+
+
+def _hash01(xs: np.ndarray, ys: np.ndarray, seed: int) -> np.ndarray:
+    """Deterministic per-lattice-point uniform floats in [0, 1)."""
+    h = xs.astype(np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    h ^= ys.astype(np.uint64) * np.uint64(0xC2B2AE3D27D4EB4F)
+    h ^= np.uint64((seed * 0x165667B19E3779F9) & 0xFFFFFFFFFFFFFFFF)
+    h ^= h >> np.uint64(31)
+    h = h * np.uint64(0xBF58476D1CE4E5B9)
+    h ^= h >> np.uint64(27)
+    h = h * np.uint64(0x94D049BB133111EB)
+    h ^= h >> np.uint64(33)
+    return (h >> np.uint64(40)).astype(np.float64) / float(1 << 24)
+
+
+def _value_noise(x0: int, y0: int, w: int, h: int, scale: float, seed: int) -> np.ndarray:
+    """Smoothly interpolated lattice noise over the rectangle, shape (h, w)."""
+    fx = (np.arange(x0, x0 + w) + 0.5) / scale
+    fy = (np.arange(y0, y0 + h) + 0.5) / scale
+    ix, iy = np.floor(fx).astype(np.int64), np.floor(fy).astype(np.int64)
+    tx, ty = fx - ix, fy - iy
+    tx = tx * tx * (3 - 2 * tx)
+    ty = ty * ty * (3 - 2 * ty)
+
+    gx, gy = np.meshgrid(ix, iy)
+    v00 = _hash01(gx, gy, seed)
+    v10 = _hash01(gx + 1, gy, seed)
+    v01 = _hash01(gx, gy + 1, seed)
+    v11 = _hash01(gx + 1, gy + 1, seed)
+    top = v00 + (v10 - v00) * tx
+    bottom = v01 + (v11 - v01) * tx
+    return top + (bottom - top) * ty[:, None]
+
+
+def _fractal(x0: int, y0: int, w: int, h: int, scale: float, seed: int) -> np.ndarray:
+    return (0.65 * _value_noise(x0, y0, w, h, scale, seed)
+            + 0.35 * _value_noise(x0, y0, w, h, scale / 2, seed + 1))
+
+
+def _roll_int(u: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    """Map uniforms in [0, 1) to integers in [lo, hi]."""
+    return lo + np.floor(u * (hi - lo + 1)).astype(np.int32)
+
+
+def generate_layers(seed: int, x0: int, y0: int, w: int, h: int) -> dict[str, np.ndarray]:
+    """Terrain and resource layers for the w×h rectangle at (x0, y0)."""
+    xs, ys = np.meshgrid(np.arange(x0, x0 + w), np.arange(y0, y0 + h))
+
+    rock = _fractal(x0, y0, w, h, ROCK_SCALE, seed * 4 + 1) > ROCK_THRESHOLD
+    forest = (_fractal(x0, y0, w, h, FOREST_SCALE, seed * 4 + 2) > FOREST_THRESHOLD) & ~rock
+    clearing = (np.abs(xs - config.EXCHANGE_X) + np.abs(ys - config.EXCHANGE_Y)
+                <= TOWN_CLEARING_RADIUS)
+    rock &= ~clearing
+    forest &= ~clearing
+    grass = ~(rock | forest)
+
+    tile_type = np.full((h, w), TILE_CODES[TileType.GRASS], dtype=np.uint8)
+    tile_type[rock] = TILE_CODES[TileType.ROCK]
+    tile_type[forest] = TILE_CODES[TileType.FOREST]
+
+    roll = _hash01(xs, ys, seed * 4 + 3)
+    kind = _hash01(xs + 7919, ys, seed * 4 + 3)
+    amount = _hash01(xs, ys + 7919, seed * 4 + 3)
+
+    resource_type = np.full((h, w), NO_RESOURCE, dtype=np.int8)
+    quantity = np.zeros((h, w), dtype=np.int32)
+    max_quantity = np.zeros((h, w), dtype=np.int32)
+
+    def place(mask, rtype: ResourceType, lo: int, hi: int, cap: int):
+        resource_type[mask] = RESOURCE_CODES[rtype]
+        quantity[mask] = _roll_int(amount[mask], lo, hi)
+        max_quantity[mask] = cap
+
+    place(forest & (roll < 0.65), ResourceType.WOOD, 4, 10, 10)
+    place(forest & (roll >= 0.65) & (roll < 0.85), ResourceType.HERB, 2, 5, 5)
+    place(rock & (roll < 0.65) & (kind < 0.3), ResourceType.ORE, 1, 5, 5)
+    place(rock & (roll < 0.65) & (kind >= 0.3), ResourceType.STONE, 4, 10, 10)
+    place(grass & (roll < FOOD_CHANCE), ResourceType.FOOD, 2, 5, 5)
+
+    return {
+        "tile_type": tile_type,
+        "resource_type": resource_type,
+        "quantity": quantity,
+        "max_quantity": max_quantity,
+    }
+
+
+def generate_chunk(seed: int, store: TileStore, tiles: list, key: tuple[int, int]):
+    """ChunkStore generator: fill a fresh chunk's layers in bulk."""
+    layers = generate_layers(seed, store.x0, store.y0, store.width, store.height)
+    for name, values in layers.items():
+        getattr(store, name)[...] = values
+    store.rebuild_regrowing()
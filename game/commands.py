@@ -0,0 +1,98 @@
+"""Tick-boundary command queue: the only path by which decisions reach the World.
+
+NPC brains, the god loop and player input do not mutate the world
+themselves.  They submit the action they decided on and await its events;
+`GameLoop.drain_commands` applies everything pending in one batch at every
+tick boundary and on a short sub-tick (COMMAND_DRAIN_SECONDS) in between.
+All of this runs on the event loop, so no lock is needed.
+
+A batch is applied in a deterministic order, independent of arrival time
+(i.e. of LLM latency):
+
+  1. by kind — UI god commands, god actions, player actions, NPC actions;
+  2. within a kind, by actor, in an order reshuffled every tick (crc32 of
+     tick and actor id) so no actor always wins a conflict;
+  3. an actor's own commands in submission order.
+
+Conflicts resolve by that order: when two NPCs gather the last unit of a tile,
+or two acceptances need the same proposer's goods, the first command is
+applied.  The later one fails validation against the updated world, and its
+`last_action_result` tells the agent why.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import zlib
+from dataclasses import dataclass, field
+
+from engine.action_log import COMMAND, GOD, NPC, PLAYER
+
+# Apply order of command kinds within a batch
+KIND_RANK = {COMMAND: 0, GOD: 1, PLAYER: 2, NPC: 3}
+
+
+@dataclass
+class Command:
+    kind: int                  # engine.action_log NPC / PLAYER / GOD / COMMAND
+    actor_id: str
+    action: dict
+    submitted: float           # time.monotonic() at submission
+    seq: int                   # global submission order
+    future: asyncio.Future = field(repr=False)
+
+    def sort_key(self, tick: int) -> tuple:
+        return (
+            KIND_RANK[self.kind],
+            zlib.crc32(f"{tick}:{self.actor_id}".encode()),
+            self.seq,
+        )
+
+
+@dataclass
+class CommandStats:
+    batches: int = 0
+    commands: int = 0
+    cancelled: int = 0         # submitters gave up (e.g. simulation stopped) before the drain
+    max_batch: int = 0
+    wait_total: float = 0.0    # seconds between submission and application
+
+    def snapshot(self) -> dict:
+        return {
+            "batches": self.batches,
+            "commands": self.commands,
+            "cancelled": self.cancelled,
+            "max_batch": self.max_batch,
+            "avg_wait_ms": round(self.wait_total / max(1, self.commands) * 1000, 1),
+        }
+
+
+class CommandQueue:
+    def __init__(self):
+        self._pending: list[Command] = []
+        self._seq = 0
+        self.stats = CommandStats()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def submit(self, kind: int, actor_id: str, action: dict) -> asyncio.Future:
+        """Queue an action; the future resolves to its events once a drain applies it."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(Command(kind, actor_id, action, time.monotonic(), self._seq, future))
+        self._seq += 1
+        return future
+
+    def take_batch(self, tick: int) -> list[Command]:
+        """Remove and return every live pending command, in apply order."""
+        batch, self._pending = self._pending, []
+        live = [cmd for cmd in batch if not cmd.future.done()]
+        self.stats.cancelled += len(batch) - len(live)
+        if live:
+            now = time.monotonic()
+            self.stats.batches += 1
+            self.stats.commands += len(live)
+            self.stats.max_batch = max(self.stats.max_batch, len(live))
+            self.stats.wait_total += sum(now - cmd.submitted for cmd in live)
+        live.sort(key=lambda cmd: cmd.sort_key(tick))
+        return live
@@ -1,15 +1,40 @@
-"""World event system: event types, WorldEvent dataclass, EventBus."""
+"""World event system: event types, WorldEvent dataclass, EventBus.
+
+`EventBus.dispatch` does two things with every event:
+
+  * world-state delivery, synchronously and in dispatch order — the event is
+    rendered once, recorded in `world.recent_events` and routed to the NPC
+    inboxes in range, so ticks and replays stay deterministic;
+  * publication to subscribers.  Each subscription has a filter (event types,
+    area), a bounded queue and its own asyncio task that hands the events to
+    its handler in batches.  A full queue drops its oldest event (counted in
+    the subscription's stats) instead of blocking, so a slow sink — the
+    WebSocket broadcast, the durable event log — never delays the tick or
+    the NPC loops.  `threaded=True` handlers run in a worker thread.
+
+Subscriptions start with `EventBus.start()` (the server's event loop, and
+headless / replay runs); until then their queues just fill and drop.
+`EventBus.flush()` waits until everything queued so far has been delivered,
+in order, for callers that must not lose events (fast-forward runs).
+"""
 from __future__ import annotations
 
+import asyncio
+import inspect
+import logging
+from collections import Counter, deque
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Callable, Optional
 
 import config
+from engine.inbox import HIGH, LOW, NORMAL
 
 if TYPE_CHECKING:
     from engine.world import NPC, World
 
+logger = logging.getLogger(__name__)
+
 
 class EventType(str, Enum):
     NPC_SPOKE = "npc_spoke"
@@ -54,7 +79,7 @@ class EventType(str, Enum):
     PLAYER_DIALOGUE_REPLIED = "player_dialogue_replied"
 
 
-@dataclass
+@dataclass(slots=True)
 class WorldEvent:
     event_type: EventType
     tick: int
@@ -63,29 +88,36 @@ class WorldEvent:
     origin_y: Optional[int] = None
     radius: int = config.NPC_HEARING_RADIUS
     payload: dict = field(default_factory=dict)
+    # Rendered once by the first to_summary() call (at dispatch) and reused
+    _summary: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _actor_name: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def summary(self) -> str:
+        """The cached summary ("" until the event has been rendered)."""
+        return self._summary or ""
+
+    @property
+    def actor_name(self) -> str:
+        """The actor's display name cached with the summary."""
+        return self._actor_name or ""
 
     def to_summary(self, world: "World") -> str:
-        """Convert event to a readable string for NPC inbox/context."""
-        actor_name = ""
-        if self.actor_id:
-            if self.actor_id == "player":
-                actor_name = world.player.name if world.player else "玩家"
-            else:
-                npc = world.get_npc(self.actor_id)
-                actor_name = npc.name if npc else self.actor_id
+        """Readable string for NPC inbox/context; rendered once, then cached."""
+        if self._summary is None:
+            self._actor_name = world.display_name(self.actor_id) if self.actor_id else ""
+            self._summary = self._render_summary(world, self._actor_name)
+        return self._summary
 
+    def _render_summary(self, world: "World", actor_name: str) -> str:
         et = self.event_type
         p = self.payload
 
         if et == EventType.NPC_SPOKE:
             target = p.get("target_id")
             target_name = ""
-            if target and target != "player":
-                tn = world.get_npc(target)
-                target_name = f" (对{tn.name}说)" if tn else ""
-            elif target == "player":
-                pname = world.player.name if world.player else "玩家"
-                target_name = f" (对{pname}说)"
+            if target == "player" or (target and world.get_npc(target)):
+                target_name = f" (对{world.display_name(target)}说)"
             return f"{actor_name}{target_name}: \"{p.get('message', '')}\""
 
         elif et == EventType.NPC_MOVED:
@@ -98,8 +130,7 @@ class WorldEvent:
             with_name = ""
             wid = p.get("with")
             if wid:
-                wn = world.get_npc(wid)
-                with_name = wn.name if wn else wid
+                with_name = world.display_name(wid)
             return (f"{actor_name} 与 {with_name} 交易: "
                     f"给出 {p.get('offer_qty',0)}{p.get('offer_item','?')}, "
                     f"换取 {p.get('request_qty',0)}{p.get('request_item','?')}")
@@ -147,8 +178,7 @@ class WorldEvent:
             target_name = ""
             tid = p.get("target_id")
             if tid:
-                tn = world.get_npc(tid)
-                target_name = tn.name if tn else tid
+                target_name = world.display_name(tid)
             return (f"{actor_name} 向 {target_name} 提议: "
                     f"给出 {p.get('offer_qty',0)}{p.get('offer_item','?')}, "
                     f"换取 {p.get('request_qty',0)}{p.get('request_item','?')}")
@@ -157,24 +187,21 @@ class WorldEvent:
             from_name = ""
             fid = p.get("from_id")
             if fid:
-                fn = world.get_npc(fid)
-                from_name = fn.name if fn else fid
+                from_name = world.display_name(fid)
             return f"{actor_name} 接受了 {from_name} 的交易提案"
 
         elif et == EventType.TRADE_REJECTED:
             from_name = ""
             fid = p.get("from_id")
             if fid:
-                fn = world.get_npc(fid)
-                from_name = fn.name if fn else fid
+                from_name = world.display_name(fid)
             return f"{actor_name} 拒绝了 {from_name} 的交易提案"
 
         elif et == EventType.TRADE_COUNTERED:
             from_name = ""
             fid = p.get("from_id")
             if fid:
-                fn = world.get_npc(fid)
-                from_name = fn.name if fn else fid
+                from_name = world.display_name(fid)
             return (f"{actor_name} 向 {from_name} 反提案: "
                     f"给出 {p.get('offer_qty',0)}{p.get('offer_item','?')}, "
                     f"换取 {p.get('request_qty',0)}{p.get('request_item','?')}")
@@ -211,8 +238,7 @@ class WorldEvent:
 
         elif et == EventType.PLAYER_DIALOGUE_REPLIED:
             npc_id = p.get("to_npc_id","")
-            tn = world.get_npc(npc_id)
-            npc_name = tn.name if tn else npc_id
+            npc_name = world.display_name(npc_id)
             return f"[玩家] 回复了 {npc_name}: \"{p.get('message','')}\""
 
         elif et == EventType.PLAYER_MOVED:
@@ -225,16 +251,14 @@ class WorldEvent:
             target = p.get("target_id")
             target_name = ""
             if target:
-                tn = world.get_npc(target)
-                target_name = f" (对{tn.name}说)" if tn else f" (对{target}说)"
+                target_name = f" (对{world.display_name(target)}说)"
             return f"[玩家] {p.get('name', actor_name)}{target_name}: \"{p.get('message', '')}\""
 
         elif et == EventType.PLAYER_TRADED:
             with_name = ""
             wid = p.get("with")
             if wid:
-                wn = world.get_npc(wid)
-                with_name = wn.name if wn else wid
+                with_name = world.display_name(wid)
             return (f"[玩家] {p.get('name', actor_name)} 与 {with_name} 交易")
 
         return str(et)
@@ -248,30 +272,226 @@ class WorldEvent:
             "summary": self.to_summary(world),
         }
         if self.actor_id:
-            if self.actor_id == "player":
-                d["actor"] = world.player.name if world.player else "玩家"
-            else:
-                npc = world.get_npc(self.actor_id)
-                d["actor"] = npc.name if npc else self.actor_id
+            d["actor"] = self._actor_name
         d.update(self.payload)
         return d
 
 
+# Inbox priority per event type (NORMAL otherwise); talk and trade outlive routine activity
+_INBOX_PRIORITY = {
+    EventType.NPC_SPOKE: HIGH,
+    EventType.PLAYER_SPOKE: HIGH,
+    EventType.PLAYER_DIALOGUE_REPLIED: HIGH,
+    EventType.NPC_TRADED: HIGH,
+    EventType.PLAYER_TRADED: HIGH,
+    EventType.TRADE_PROPOSED: HIGH,
+    EventType.TRADE_ACCEPTED: HIGH,
+    EventType.TRADE_REJECTED: HIGH,
+    EventType.TRADE_COUNTERED: HIGH,
+    EventType.NPC_MOVED: LOW,
+    EventType.PLAYER_MOVED: LOW,
+    EventType.NPC_GATHERED: LOW,
+    EventType.PLAYER_GATHERED: LOW,
+    EventType.NPC_RESTED: LOW,
+    EventType.NPC_ATE: LOW,
+    EventType.NPC_SLEPT: LOW,
+    EventType.NPC_THOUGHT: LOW,
+}
+
+# Event types coalesced into one inbox entry per actor
+_INBOX_COALESCE = frozenset({EventType.NPC_MOVED, EventType.PLAYER_MOVED})
+
+
+# ── Subscriptions ─────────────────────────────────────────────────────────────
+
+@dataclass
+class SubscriberStats:
+    delivered: int = 0
+    batches: int = 0
+    dropped: int = 0           # oldest events discarded because the queue was full
+    max_batch: int = 0
+    errors: int = 0            # handler exceptions (the batch is lost, the task keeps running)
+
+    def snapshot(self, queued: int) -> dict:
+        return {
+            "queued": queued,
+            "delivered": self.delivered,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "max_batch": self.max_batch,
+            "errors": self.errors,
+        }
+
+
+class Subscription:
+    """One subscriber: filter, bounded queue and the task feeding its handler."""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[list], object],
+        types=None,
+        area: Optional[tuple[int, int, int, int]] = None,
+        batch_max: int = config.EVENT_SUB_BATCH_MAX,
+        queue_max: int = config.EVENT_SUB_QUEUE_MAX,
+        threaded: bool = False,
+    ):
+        self.name = name
+        self.handler = handler
+        self.types = frozenset(types) if types is not None else None
+        self.area = area                   # (x0, y0, x1, y1) inclusive; global events always match
+        self.batch_max = batch_max
+        self.threaded = threaded
+        self.stats = SubscriberStats()
+        self._queue: deque = deque(maxlen=queue_max)
+        self._ready = asyncio.Event()
+        self._delivering = asyncio.Lock()   # one drain at a time keeps batches in order
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    def matches(self, event: WorldEvent) -> bool:
+        if self.types is not None and event.event_type not in self.types:
+            return False
+        if self.area is not None and event.origin_x is not None:
+            x0, y0, x1, y1 = self.area
+            return x0 <= event.origin_x <= x1 and y0 <= event.origin_y <= y1
+        return True
+
+    def offer(self, event: WorldEvent):
+        if len(self._queue) == self._queue.maxlen:
+            self.stats.dropped += 1
+        self._queue.append(event)
+        self._ready.set()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name=f"events:{self.name}")
+
+    async def stop(self):
+        """Deliver what is still queued (finishing any batch in flight), then end the task."""
+        if self._task is not None and not self._task.done():
+            self._closing = True
+            self._ready.set()
+            await self._task
+        else:
+            await self._drain()
+        self._task = None
+
+    def cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while not self._closing:
+            await self._ready.wait()
+            self._ready.clear()
+            await self._drain()
+
+    async def flush(self):
+        """Deliver everything queued so far (after any batch already in flight)."""
+        await self._drain()
+
+    async def _drain(self):
+        async with self._delivering:
+            await self._deliver()
+
+    async def _deliver(self):
+        queue = self._queue
+        while queue:
+            batch = [queue.popleft() for _ in range(min(self.batch_max, len(queue)))]
+            try:
+                if self.threaded:
+                    await asyncio.to_thread(self.handler, batch)
+                else:
+                    result = self.handler(batch)
+                    if inspect.isawaitable(result):
+                        await result
+            except Exception as e:
+                self.stats.errors += 1
+                logger.error(f"[EventBus] subscriber {self.name} failed: {e}")
+            self.stats.delivered += len(batch)
+            self.stats.batches += 1
+            self.stats.max_batch = max(self.stats.max_batch, len(batch))
+
+
+@dataclass
+class EventCounts:
+    """Metrics subscriber: events seen per type."""
+    counts: Counter = field(default_factory=Counter)
+    total: int = 0
+    last_tick: int = 0
+
+    def observe(self, batch: list):
+        self.counts.update(e.event_type.value for e in batch)
+        self.total += len(batch)
+        self.last_tick = batch[-1].tick
+
+    def snapshot(self) -> dict:
+        return {"total": self.total, "last_tick": self.last_tick, "by_type": dict(self.counts)}
+
+
 class EventBus:
-    """Dispatches events to nearby NPC inboxes and the global event log."""
+    """Delivers events to world state (recent ring, NPC inboxes) and publishes them to subscribers."""
+
+    def __init__(self):
+        self._subscriptions: list[Subscription] = []
+        self._started = False
+
+    def subscribe(self, name: str, handler: Callable[[list], object], **options) -> Subscription:
+        """Register `handler(batch)`; options are Subscription's (types, area, batch_max, queue_max, threaded)."""
+        sub = Subscription(name, handler, **options)
+        self._subscriptions.append(sub)
+        if self._started:
+            sub.start()
+        return sub
+
+    def subscription(self, name: str) -> Optional[Subscription]:
+        return next((sub for sub in self._subscriptions if sub.name == name), None)
+
+    def unsubscribe(self, sub: Subscription):
+        if sub in self._subscriptions:
+            self._subscriptions.remove(sub)
+            sub.cancel()
+
+    def start(self):
+        """Start every subscription's task (call from the running event loop)."""
+        self._started = True
+        for sub in self._subscriptions:
+            sub.start()
+
+    async def flush(self):
+        """Wait until every subscription has delivered what is queued so far."""
+        for sub in self._subscriptions:
+            await sub.flush()
+
+    async def stop(self):
+        """Flush every subscription's queue and stop its task."""
+        self._started = False
+        for sub in self._subscriptions:
+            await sub.stop()
+
+    def stats(self) -> dict:
+        return {sub.name: sub.stats.snapshot(len(sub._queue)) for sub in self._subscriptions}
 
     def dispatch(self, event: WorldEvent, world: "World"):
         summary = event.to_summary(world)
-        world.add_event(summary)
-
-        # Route to NPC inboxes based on proximity
-        for npc in world.npcs:
+        world.add_event(event)
+
+        # Route to NPC inboxes: global events (weather, god action) reach
+        # everyone, local ones only NPCs inside the radius (spatial index).
+        if event.origin_x is None:
+            recipients = world.npcs
+        else:
+            recipients = world.get_nearby_npcs(event.origin_x, event.origin_y, event.radius)
+        priority = _INBOX_PRIORITY.get(event.event_type, NORMAL)
+        key = (event.event_type, event.actor_id) if event.event_type in _INBOX_COALESCE else None
+        for npc in recipients:
             if npc.npc_id == event.actor_id:
                 continue  # actor doesn't receive their own event in inbox
-            if event.origin_x is None:
-                # Global event (weather, god action)
-                npc.memory.add_to_inbox(summary)
-            else:
-                dist = abs(npc.x - event.origin_x) + abs(npc.y - event.origin_y)
-                if dist <= event.radius:
-                    npc.memory.add_to_inbox(summary)
+            npc.memory.add_to_inbox(summary, priority, key, event)
+
+        for sub in self._subscriptions:
+            if sub.matches(event):
+                sub.offer(event)
@@ -0,0 +1,260 @@
+"""Headless fast-forward simulation: drive GameLoop on a virtual clock.
+
+The live server paces everything with wall-clock sleeps (a world tick every
+WORLD_TICK_SECONDS, NPC decisions every few seconds).  Here the same
+`GameLoop.step_world` / `decide_npc` calls run back to back: a virtual clock
+advances WORLD_TICK_SECONDS per tick and NPCs decide when their virtual
+think delay has elapsed, so the simulation runs as fast as the agents can
+answer.  Each tick's decisions are submitted to the command queue and
+applied as one batch, as the live loop does.  No uvicorn, WebSocket
+clients or broadcasts: the runner drops the broadcast and dialogue
+subscribers, starts the rest of the EventBus (the durable event log,
+metrics) and flushes it every tick, so the event log records the whole run.
+
+Agents:
+  rules   offline rule-based NPCs (agents/rule_agent.py), god disabled
+  llm     the configured LLM provider (e.g. LLM_PROVIDER=local), with at most
+          --concurrency NPC calls in flight per tick
+  replay  re-applies a recorded action log (--log) through the game loop
+
+Usage:
+    python -m game.headless --ticks 5376 --agent rules
+    python -m game.headless --ticks 200 --agent llm --concurrency 4
+    python -m game.headless --agent replay --log saves/actions/session_20250101_120000.alog
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import config
+from engine.action_log import COMMAND, GOD, HEADER, NPC, PLAYER, TICK, LogRecord, read_log
+from engine.world import GOD_ID
+
+logger = logging.getLogger(__name__)
+
+TICKS_PER_DAY = 48   # WorldTime advances half an hour per tick
+
+
+@dataclass
+class HeadlessStats:
+    ticks: int = 0
+    decisions: int = 0        # NPC / god decisions (or replayed action records)
+    errors: int = 0
+    wall_seconds: float = 0.0
+
+    @property
+    def ticks_per_sec(self) -> float:
+        return self.ticks / max(self.wall_seconds, 1e-9)
+
+
+class HeadlessRunner:
+    def __init__(self, game, agent: str = "rules", concurrency: int = 4, seed: int = 0):
+        self.game = game
+        self.agent_name = agent
+        self.concurrency = max(1, concurrency)
+        self.clock = 0.0                      # virtual seconds since start
+        self.stats = HeadlessStats()
+        random.seed(seed)                     # think delays use the module RNG
+        if agent == "rules":
+            from agents.rule_agent import RuleNPCAgent
+            self.agent = RuleNPCAgent(seed)
+        else:
+            self.agent = None                 # GameLoop's own NPCAgent
+
+    # ── Agent-driven run ──────────────────────────────────────────────────────
+
+    # ── Event delivery ────────────────────────────────────────────────────────
+
+    def _start_events(self):
+        bus = self.game.event_bus
+        for name in ("broadcast", "dialogue"):    # no clients to serve
+            sub = bus.subscription(name)
+            if sub is not None:
+                bus.unsubscribe(sub)
+        bus.start()
+
+    async def _stop_events(self):
+        await self.game.event_bus.stop()
+        self.game.rag.event_log.close()
+
+    async def run(self, ticks: int, report_every: int = 0) -> HeadlessStats:
+        self._start_events()
+        try:
+            return await self._run(ticks, report_every)
+        finally:
+            await self._stop_events()
+
+    async def _run(self, ticks: int, report_every: int) -> HeadlessStats:
+        game = self.game
+        next_npc = {npc.npc_id: random.uniform(1.0, 4.0) for npc in game.world.npcs}
+        next_god = random.uniform(5.0, 10.0)
+        use_god = self.agent_name == "llm"
+        sem = asyncio.Semaphore(self.concurrency)
+        t0 = time.perf_counter()
+
+        for _ in range(ticks):
+            if game.token_tracker.paused:
+                logger.warning("Token limit reached — stopping headless run.")
+                break
+            await game.step_world()
+            self.clock += config.WORLD_TICK_SECONDS
+            self.stats.ticks += 1
+
+            # Macro actions are stepped by the tick itself, like the brain loop
+            due = [
+                npc for npc in game.world.npcs
+                if not npc.macro and next_npc.get(npc.npc_id, 0.0) <= self.clock
+            ]
+            actions = await asyncio.gather(*(self._decide(npc, sem) for npc in due))
+            for npc, action in zip(due, actions):
+                if action:
+                    game.commands.submit(NPC, npc.npc_id, action)
+                next_npc[npc.npc_id] = self.clock + game.npc_think_delay(npc)
+
+            if use_god and next_god <= self.clock:
+                try:
+                    action = await game.god_agent.process(game.world.god, game.world)
+                    if action:
+                        game.commands.submit(GOD, GOD_ID, action)
+                    self.stats.decisions += 1
+                except Exception as e:
+                    self.stats.errors += 1
+                    logger.error(f"[God] headless step error: {e}")
+                next_god = self.clock + random.uniform(
+                    config.GOD_MIN_THINK_SECONDS, config.GOD_MAX_THINK_SECONDS
+                )
+            game.drain_commands()
+            await game.event_bus.flush()
+
+            if report_every and self.stats.ticks % report_every == 0:
+                self._report_progress(t0)
+
+        self.stats.wall_seconds = time.perf_counter() - t0
+        return self.stats
+
+    async def _decide(self, npc, sem: asyncio.Semaphore) -> Optional[dict]:
+        async with sem:
+            try:
+                action = await self.game.decide_npc(npc, self.agent)
+                self.stats.decisions += 1
+                return action
+            except Exception as e:
+                self.stats.errors += 1
+                logger.error(f"[{npc.name}] headless step error: {e}")
+                return None
+
+    def _report_progress(self, t0: float):
+        elapsed = time.perf_counter() - t0
+        logger.info(
+            f"tick {self.game.world.time.tick}  ({self.game.world.time.time_str})  "
+            f"{self.stats.ticks / max(elapsed, 1e-9):,.1f} ticks/s"
+        )
+
+    # ── Replay-driven run ─────────────────────────────────────────────────────
+
+    async def run_replay(self, path: str, ticks: Optional[int] = None) -> HeadlessStats:
+        """Feed a recorded session through the game loop instead of agents."""
+        self._start_events()
+        try:
+            return await self._run_replay(path, ticks)
+        finally:
+            await self._stop_events()
+
+    async def _run_replay(self, path: str, ticks: Optional[int]) -> HeadlessStats:
+        game = self.game
+        records = read_log(path)
+        header = next(records)
+        meta = header.data if header.kind == HEADER else {}
+        if (meta.get("seed"), meta.get("width"), meta.get("height"), meta.get("start_tick")) != (
+            game.world.seed, game.world.width, game.world.height, game.world.time.tick,
+        ):
+            raise ValueError(f"{path}: log was recorded for a different world ({meta})")
+
+        t0 = time.perf_counter()
+        for rec in records:
+            if rec.kind == TICK:
+                if ticks is not None and self.stats.ticks >= ticks:
+                    break
+                await game.step_world(seed=rec.data)
+                await game.event_bus.flush()
+                self.clock += config.WORLD_TICK_SECONDS
+                self.stats.ticks += 1
+            else:
+                await self._apply_record(rec)
+                self.stats.decisions += 1
+        self.stats.wall_seconds = time.perf_counter() - t0
+        return self.stats
+
+    async def _apply_record(self, rec: LogRecord):
+        # Recorded actions are already in apply order; bypass the command queue
+        game, world, wm = self.game, self.game.world, self.game.world_manager
+        if rec.kind == NPC:
+            npc = world.get_npc(rec.actor)
+            events = wm.apply_npc_action(npc, rec.data, world) if npc else []
+        elif rec.kind == PLAYER and world.player:
+            events = wm.apply_player_action(world.player, rec.data, world)
+        elif rec.kind == GOD:
+            events = wm.apply_god_action(rec.data, world)
+        elif rec.kind == COMMAND:
+            events = wm.apply_direct_god_command(rec.data, world)
+        else:
+            events = []
+        for evt in events:
+            game.event_bus.dispatch(evt, world)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ticks", type=int, default=None,
+                        help=f"ticks to simulate ({TICKS_PER_DAY} per game day; "
+                             f"default one week, or the whole log for replay)")
+    parser.add_argument("--agent", choices=("rules", "llm", "replay"), default="rules")
+    parser.add_argument("--log", help="action log to replay (--agent replay)")
+    parser.add_argument("--concurrency", type=int, default=4, help="max NPC decisions in flight")
+    parser.add_argument("--seed", type=int, default=0, help="seed for think delays / rule agent")
+    parser.add_argument("--report-every", type=int, default=TICKS_PER_DAY,
+                        help="log progress every N ticks (0 = off)")
+    parser.add_argument("--no-action-log", action="store_true", help="don't record this run")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.agent == "replay":
+        if not args.log:
+            parser.error("--agent replay needs --log")
+        config.ACTION_LOG_ENABLED = False
+    elif args.no_action_log:
+        config.ACTION_LOG_ENABLED = False
+
+    config.CHECKPOINT_RESTORE = False     # always start from a fresh world
+    from game.loop import GameLoop
+    game = GameLoop()
+    runner = HeadlessRunner(game, args.agent, args.concurrency, args.seed)
+    try:
+        if args.agent == "replay":
+            stats = asyncio.run(runner.run_replay(args.log, args.ticks))
+        else:
+            ticks = args.ticks if args.ticks is not None else TICKS_PER_DAY * 7
+            stats = asyncio.run(runner.run(ticks, args.report_every))
+    finally:
+        if game.world_manager.action_log:
+            game.world_manager.action_log.close()
+
+    world = game.world
+    print(f"{stats.ticks} ticks ({stats.ticks / TICKS_PER_DAY:.1f} game days, "
+          f"{runner.clock / 3600:.1f} h of real-time play) in {stats.wall_seconds:.2f} s "
+          f"→ {stats.ticks_per_sec:,.1f} ticks/s")
+    print(f"decisions={stats.decisions} errors={stats.errors} "
+          f"tokens={game.token_tracker.total_tokens} now={world.time.time_str}")
+    if args.agent != "replay":
+        print(f"action queue: {game.npc_agent.queue_stats.snapshot()}")
+        print(f"commands: {game.commands.stats.snapshot()}")
+
+
+if __name__ == "__main__":
+    main()
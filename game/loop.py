@@ -3,16 +3,23 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import os
 import random
+import time
 from typing import TYPE_CHECKING
 
 import config
-from agents.god_agent import GodAgent
+from agents.god_agent import GodAgent, NarrativeState
 from agents.npc_agent import NPCAgent
+from agents.observation import ObservationFrame
 from config_narrative import DAILY_NPC_CONFIG
-from engine.world import NPC, World, create_world
+from engine.action_log import COMMAND, GOD, NPC as NPC_CMD, PLAYER, ActionLog
+from engine.checkpoint import capture_world, encode, read_checkpoint, restore_world, write_checkpoint
+from engine.world import GOD_ID, NPC, World, create_world
+from engine.world_view import WorldView
 from engine.world_manager import WorldManager
-from game.events import EventBus, EventType, WorldEvent
+from game.commands import Command, CommandQueue
+from game.events import EventBus, EventCounts, EventType, WorldEvent
 from game.token_tracker import TokenTracker
 from rag import JSONRAGStorage
 from ws.manager import WSManager
@@ -39,28 +46,137 @@ class GameLoop:
         self.npc_agent = NPCAgent(self.token_tracker, rag_storage=self.rag)
         self.god_agent = GodAgent(self.token_tracker)
 
-        self._world_lock = asyncio.Lock()
+        # Decided actions wait here until the next drain (see game/commands.py)
+        self.commands = CommandQueue()
+        # Frozen world snapshot agents read from (see world_view()) and the
+        # shared per-tick observation frame, refreshed by the world tick loop
+        self._view: WorldView | None = None
+        self._frame: ObservationFrame | None = None
         self._running = False            # server-alive flag
         self._simulation_running = False # world ticking + agent brains running
 
         # Cancellable simulation tasks
         self._sim_tasks: list[asyncio.Task] = []
+        self._checkpoint_task: asyncio.Task | None = None
+
+        self.event_counts = EventCounts()
+        self._filling_dialogues: set[int] = set()   # id()s of dialogues awaiting reply options
+        self._subscribe_events()
+
+        if config.CHECKPOINT_RESTORE and os.path.exists(config.CHECKPOINT_PATH):
+            self._load_checkpoint(config.CHECKPOINT_PATH)
+        if config.ACTION_LOG_ENABLED:
+            self._open_action_log()
 
     # ── Public API ────────────────────────────────────────────────────────────
 
     async def start(self):
         """Start the server listener. Simulation does NOT auto-start."""
         self._running = True
+        self.event_bus.start()
         logger.info("GameLoop server started (simulation paused — click Start to begin).")
         # Send initial snapshot so clients see the frozen world
         await self._broadcast()
-        # Keep server alive
+        # Keep server alive; the sub-tick drain also serves player input while paused
         while self._running:
-            await asyncio.sleep(1.0)
+            await asyncio.sleep(config.COMMAND_DRAIN_SECONDS)
+            if self.commands:
+                self.drain_commands()
 
     async def stop(self):
         self._running = False
         await self._stop_simulation()
+        if config.CHECKPOINT_ENABLED:
+            await self.save_checkpoint()
+        if self.world_manager.action_log:
+            self.world_manager.action_log.close()
+        await self.event_bus.stop()
+        self.rag.event_log.close()
+        self.world.chunks.close()
+
+    def _subscribe_events(self):
+        """Wire the event consumers to the bus; each runs on its own task (see game/events.py)."""
+        bus = self.event_bus
+        bus.subscribe("broadcast", self._broadcast_with_events)
+        bus.subscribe("metrics", self.event_counts.observe)
+        bus.subscribe("dialogue", self._on_npc_spoke, types={EventType.NPC_SPOKE})
+        if config.EVENT_LOG_ENABLED:
+            bus.subscribe("event_log", self.rag.event_log.write, threaded=True)
+
+    def _open_action_log(self):
+        """Start a fresh replayable action log for this session."""
+        os.makedirs(config.ACTION_LOG_DIR, exist_ok=True)
+        path = os.path.join(config.ACTION_LOG_DIR, time.strftime("session_%Y%m%d_%H%M%S.alog"))
+        self.world_manager.action_log = ActionLog(
+            path, self.world.seed, self.world.width, self.world.height,
+            start_tick=self.world.time.tick,
+        )
+        logger.info(f"Action log → {path}")
+
+    # ── Checkpoints ───────────────────────────────────────────────────────────
+
+    def checkpoint_state(self) -> dict:
+        """Everything a restart needs, as one picklable dict (see engine/checkpoint.py)."""
+        return {
+            "world": capture_world(self.world),
+            "narrative": self.god_agent.narrative_state.to_dict(),
+            "tokens": self.token_tracker.state(),
+            "rng": {"world": self.world_manager.rng_state(), "module": random.getstate()},
+            "queue_stats": self.npc_agent.queue_stats,
+        }
+
+    def restore_checkpoint(self, state: dict):
+        discarded = self.world
+        self.world = restore_world(state["world"])
+        discarded.chunks.close()
+        self.god_agent.narrative_state = NarrativeState.from_dict(state["narrative"])
+        self.token_tracker.load_state(state["tokens"])
+        self.world_manager.set_rng_state(state["rng"]["world"])
+        random.setstate(state["rng"]["module"])
+        self.npc_agent.queue_stats = state["queue_stats"]
+        self._view = None
+        self._frame = None
+
+    async def save_checkpoint(self, path: str | None = None):
+        """Snapshot on the event loop (between command batches), then compress and write in a worker thread."""
+        path = path or config.CHECKPOINT_PATH
+        try:
+            t0 = time.perf_counter()
+            payload = encode(self.checkpoint_state())
+            snap_ms = (time.perf_counter() - t0) * 1000
+            await asyncio.to_thread(write_checkpoint, path, payload)
+            logger.info(
+                f"Checkpoint → {path} (tick {self.world.time.tick}, "
+                f"{len(payload) / 1024:.0f} KiB, {snap_ms:.1f} ms on loop)"
+            )
+        except Exception as e:
+            logger.error(f"Checkpoint error: {e}")
+
+    def _load_checkpoint(self, path: str):
+        try:
+            t0 = time.perf_counter()
+            self.restore_checkpoint(read_checkpoint(path))
+            logger.info(
+                f"Restored checkpoint {path} at {self.world.time.time_str} "
+                f"(tick {self.world.time.tick}) in {(time.perf_counter() - t0) * 1000:.1f} ms"
+            )
+        except Exception as e:
+            logger.error(f"Checkpoint restore failed ({path}): {e} — starting a new world.")
+
+    def delete_saves(self):
+        """Delete RAG saves and the checkpoint (the running world is kept)."""
+        self.rag.delete_all()
+        if os.path.exists(config.CHECKPOINT_PATH):
+            os.remove(config.CHECKPOINT_PATH)
+        logger.info("All saves deleted.")
+
+    def _maybe_checkpoint(self):
+        """Start a periodic checkpoint unless one is still being written."""
+        interval = config.CHECKPOINT_INTERVAL_TICKS
+        if not (config.CHECKPOINT_ENABLED and interval and self.world.time.tick % interval == 0):
+            return
+        if self._checkpoint_task is None or self._checkpoint_task.done():
+            self._checkpoint_task = asyncio.create_task(self.save_checkpoint())
 
     # ── Simulation start / stop ───────────────────────────────────────────────
 
@@ -115,8 +231,7 @@ class GameLoop:
         elif command == "save_game":
             asyncio.create_task(self._save_game())
         elif command == "delete_saves":
-            self.rag.delete_all()
-            logger.info("All saves deleted.")
+            self.delete_saves()
         elif command == "delete_npc_memory":
             npc_id = cmd.get("value", "").strip()
             if npc_id:
@@ -132,7 +247,7 @@ class GameLoop:
         elif command == "set_player_name":
             name = str(cmd.get("value", "")).strip()
             if name and self.world.player:
-                self.world.player.name = name
+                self.world.rename("player", name)
 
     async def _start_and_broadcast(self):
         await self.start_simulation()
@@ -189,17 +304,13 @@ class GameLoop:
             self.handle_god_command(cmd)
             return
 
-        events: list[WorldEvent] = []
-        async with self._world_lock:
-            events = self.world_manager.apply_player_action(player, msg, self.world)
-
-        for evt in events:
-            self.event_bus.dispatch(evt, self.world)
-
-        await self._broadcast_with_events(events if events else [])
+        events = await self.commands.submit(PLAYER, player.player_id, msg)
+        if not events:
+            await self._broadcast()   # events reach clients through the broadcast subscriber
 
     async def _save_game(self):
-        """Persist current world state snapshot to RAG storage."""
+        """Write a checkpoint and persist the client snapshot to RAG storage."""
+        await self.save_checkpoint()
         try:
             state = self.serializer.world_snapshot(
                 self.world, self.token_tracker, [], self._simulation_running
@@ -241,45 +352,72 @@ class GameLoop:
 
     # ── World tick loop ───────────────────────────────────────────────────────
 
+    async def step_world(self, seed: int | None = None) -> list[WorldEvent]:
+        """Apply the pending command batch, then advance one tick and dispatch its events."""
+        self.drain_commands()
+        tick_events = self.world_manager.tick(self.world, seed)
+        for evt in tick_events:
+            self.event_bus.dispatch(evt, self.world)
+        self._frame = ObservationFrame.capture(self.world_view())
+        return tick_events
+
+    def drain_commands(self) -> list[WorldEvent]:
+        """Apply every pending command in deterministic order and resolve its future."""
+        all_events: list[WorldEvent] = []
+        for cmd in self.commands.take_batch(self.world.time.tick):
+            events: list[WorldEvent] = []
+            try:
+                events = self._apply_command(cmd)
+                for evt in events:
+                    self.event_bus.dispatch(evt, self.world)
+            except Exception as e:
+                logger.error(f"[{cmd.actor_id}] command error: {e}")
+            finally:
+                # Taken commands always resolve, or their submitters would wait forever
+                if not cmd.future.done():
+                    cmd.future.set_result(events)
+            all_events.extend(events)
+        return all_events
+
+    def _apply_command(self, cmd: Command) -> list[WorldEvent]:
+        wm, world = self.world_manager, self.world
+        if cmd.kind == NPC_CMD:
+            npc = world.get_npc(cmd.actor_id)
+            return wm.apply_npc_action(npc, cmd.action, world) if npc else []
+        if cmd.kind == PLAYER:
+            return wm.apply_player_action(world.player, cmd.action, world) if world.player else []
+        if cmd.kind == GOD:
+            return wm.apply_god_action(cmd.action, world)
+        return wm.apply_direct_god_command(cmd.action, world)
+
+    def world_view(self) -> WorldView:
+        """Frozen view of the world as of the last tick or applied action.
+
+        Re-captured lazily once the world has changed; chunks, glyph rows and
+        flow fields that did not change are shared with the previous view.
+        """
+        view = self._view
+        if view is None or view.revision != self.world_manager.revision:
+            view = self._view = WorldView.capture(self.world, view, self.world_manager.revision)
+        return view
+
     async def _world_tick_loop(self):
         """Advances world time and passive effects every WORLD_TICK_SECONDS."""
         while self._simulation_running:
-            market_event = None
-            async with self._world_lock:
-                self.world.time.advance()
-                self.world_manager.apply_passive(self.world)
-
-                # Update market prices every MARKET_UPDATE_INTERVAL ticks
-                tick = self.world.time.tick
-                if tick % config.MARKET_UPDATE_INTERVAL == 0:
-                    market_event = self.world_manager.update_market(self.world)
-            if market_event:
-                self.event_bus.dispatch(market_event, self.world)
+            tick_events = await self.step_world()
+            self._maybe_checkpoint()
 
             # Apply any queued direct god commands (immediate, no LLM)
             if self.world.god.pending_commands:
                 direct_cmds = list(self.world.god.pending_commands)
                 self.world.god.pending_commands.clear()
-                events: list[WorldEvent] = []
-                async with self._world_lock:
-                    for cmd in direct_cmds:
-                        evts = self.world_manager.apply_direct_god_command(cmd, self.world)
-                        events.extend(evts)
-                for evt in events:
-                    self.event_bus.dispatch(evt, self.world)
-                if events:
-                    await self._broadcast_with_events(events)
-                    await asyncio.sleep(config.WORLD_TICK_SECONDS)
-                    continue
-
-            # Spawn dialogue option generation tasks if needed
-            if getattr(self.world, "_pending_dialogue_option_gen", False) and self.world.player:
-                self.world._pending_dialogue_option_gen = False
-                for dialogue in list(self.world.player.dialogue_queue):
-                    if dialogue.get("reply_options") is None:
-                        asyncio.create_task(self._fill_dialogue_options(dialogue))
+                for cmd in direct_cmds:
+                    self.commands.submit(COMMAND, GOD_ID, cmd)
+                tick_events = tick_events + self.drain_commands()
 
-            await self._broadcast()
+            # Ticks with events reach clients through the broadcast subscriber
+            if not tick_events:
+                await self._broadcast()
             await asyncio.sleep(config.WORLD_TICK_SECONDS)
 
     # ── NPC brain loop ────────────────────────────────────────────────────────
@@ -294,32 +432,46 @@ class GameLoop:
                 await asyncio.sleep(2.0)
                 continue
 
-            try:
-                action = await self.npc_agent.process(npc, self.world)
-
-                if action.get("action") not in ("idle", None):
-                    events: list[WorldEvent] = []
-                    async with self._world_lock:
-                        events = self.world_manager.apply_npc_action(npc, action, self.world)
-
-                    for evt in events:
-                        self.event_bus.dispatch(evt, self.world)
-
-                    if events:
-                        await self._broadcast_with_events(events)
+            # A running macro is stepped by the world tick; no LLM call needed
+            if npc.macro:
+                await asyncio.sleep(config.WORLD_TICK_SECONDS)
+                continue
 
+            try:
+                await self.step_npc(npc)
             except Exception as e:
                 logger.error(f"[{npc.name}] brain loop error: {e}")
 
-            # Wait before next decision
-            base = random.uniform(config.NPC_MIN_THINK_SECONDS, config.NPC_MAX_THINK_SECONDS)
-            if npc.last_action == "talk":
-                base = random.uniform(3.0, 6.0)
-            # 日常NPC（旷/木/岚/石）think频率降低以节省API调用
-            daily_cfg = DAILY_NPC_CONFIG.get(npc.npc_id)
-            if daily_cfg:
-                base *= daily_cfg.get("think_interval_multiplier", 1.0)
-            await asyncio.sleep(base)
+            await asyncio.sleep(self.npc_think_delay(npc))
+
+    async def step_npc(self, npc: NPC, agent=None) -> list[WorldEvent]:
+        """One decision for `npc`, submitted and awaited until the next drain applies it."""
+        action = await self.decide_npc(npc, agent)
+        if action is None:
+            return []
+        return await self.commands.submit(NPC_CMD, npc.npc_id, action)
+
+    async def decide_npc(self, npc: NPC, agent=None) -> dict | None:
+        """The NPC's next action (queued follow-up or an `agent.process` call); None when idle."""
+        # Queued follow-up actions run without another LLM call
+        action = self.npc_agent.next_queued_action(npc, self.world)
+        if action is None:
+            action = await (agent or self.npc_agent).process(npc, self.world_view(), self._frame)
+        if action.get("action") in ("idle", None):
+            return None
+        return action
+
+    @staticmethod
+    def npc_think_delay(npc: NPC) -> float:
+        """Seconds an NPC waits before its next decision."""
+        base = random.uniform(config.NPC_MIN_THINK_SECONDS, config.NPC_MAX_THINK_SECONDS)
+        if npc.last_action == "talk":
+            base = random.uniform(3.0, 6.0)
+        # 日常NPC（旷/木/岚/石）think频率降低以节省API调用
+        daily_cfg = DAILY_NPC_CONFIG.get(npc.npc_id)
+        if daily_cfg:
+            base *= daily_cfg.get("think_interval_multiplier", 1.0)
+        return base
 
     # ── God brain loop ────────────────────────────────────────────────────────
 
@@ -333,16 +485,7 @@ class GameLoop:
                 continue
 
             try:
-                action = await self.god_agent.process(self.world.god, self.world)
-                if action:
-                    events: list[WorldEvent] = []
-                    async with self._world_lock:
-                        events = self.world_manager.apply_god_action(action, self.world)
-                    for evt in events:
-                        self.event_bus.dispatch(evt, self.world)
-                    if events:
-                        await self._broadcast_with_events(events)
-
+                await self.step_god()
             except Exception as e:
                 logger.error(f"[God] brain loop error: {e}")
 
@@ -350,6 +493,13 @@ class GameLoop:
                 random.uniform(config.GOD_MIN_THINK_SECONDS, config.GOD_MAX_THINK_SECONDS)
             )
 
+    async def step_god(self) -> list[WorldEvent]:
+        """One god decision, submitted and awaited until the next drain applies it."""
+        action = await self.god_agent.process(self.world.god, self.world)
+        if not action:
+            return []
+        return await self.commands.submit(GOD, GOD_ID, action)
+
     # ── Broadcast helpers ─────────────────────────────────────────────────────
 
     async def _broadcast(self):
@@ -358,6 +508,15 @@ class GameLoop:
         )
         await self.ws_manager.broadcast(snapshot)
 
+    async def _on_npc_spoke(self, events: list[WorldEvent]):
+        """Dialogue subscriber: generate quick-reply options for what NPCs just said to the player."""
+        if not self.world.player or not any(e.payload.get("target_id") == "player" for e in events):
+            return
+        for dialogue in list(self.world.player.dialogue_queue):
+            if dialogue.get("reply_options") is None and id(dialogue) not in self._filling_dialogues:
+                self._filling_dialogues.add(id(dialogue))
+                asyncio.create_task(self._fill_dialogue_options(dialogue))
+
     async def _fill_dialogue_options(self, dialogue: dict):
         """Async task: call GodAgent to generate quick-reply options for a player dialogue."""
         try:
@@ -366,10 +525,12 @@ class GameLoop:
             )
             dialogue["reply_options"] = options
             # Broadcast updated player state (dialogue_queue now has options)
-            await self._broadcast_with_events([])
+            await self._broadcast()
         except Exception as e:
             logger.warning(f"[GameLoop] _fill_dialogue_options error: {e}")
             dialogue["reply_options"] = ["好的，继续说", "我没有兴趣", "能详细说说吗？"]
+        finally:
+            self._filling_dialogues.discard(id(dialogue))
 
     async def _broadcast_with_events(self, events: list[WorldEvent]):
         snapshot = self.serializer.world_snapshot(
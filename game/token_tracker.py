@@ -66,6 +66,23 @@ class TokenTracker:
         if self._total.total < new_limit:
             self._paused = False
 
+    def state(self) -> dict:
+        """Totals, per-agent usage and limit state, for checkpoints."""
+        return {
+            "limit": self.session_limit,
+            "paused": self._paused,
+            "total": (self._total.prompt_tokens, self._total.completion_tokens),
+            "per_agent": {
+                aid: (u.prompt_tokens, u.completion_tokens) for aid, u in self._per_agent.items()
+            },
+        }
+
+    def load_state(self, state: dict):
+        self.session_limit = state["limit"]
+        self._paused = state["paused"]
+        self._total = AgentTokenUsage(*state["total"])
+        self._per_agent = {aid: AgentTokenUsage(*u) for aid, u in state["per_agent"].items()}
+
     def snapshot(self) -> dict:
         return {
             "total_tokens_used": self._total.total,
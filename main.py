@@ -5,7 +5,7 @@ import asyncio
 import json
 import logging
 from pathlib import Path
-from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import FileResponse, JSONResponse
 from fastapi.staticfiles import StaticFiles
 
@@ -114,7 +114,7 @@ async def post_settings(request: Request):
     if "player_name" in data and game_loop.world.player:
         name = str(data["player_name"]).strip()
         if name:
-            game_loop.world.player.name = name
+            game_loop.world.rename("player", name)
 
     return JSONResponse({"ok": True})
 
@@ -151,6 +151,7 @@ async def update_npc_profile(npc_id: str, request: Request):
     try:
         profile = NPCProfile.from_dict(data)
         profile.apply_to_npc(npc)
+        game_loop.world.refresh_entity(npc.npc_id)  # name / initial may have changed
         return JSONResponse({"ok": True})
     except Exception as e:
         return JSONResponse({"ok": False, "error": str(e)}, status_code=400)
@@ -184,6 +185,7 @@ async def import_npc_profiles(request: Request):
             try:
                 profile = NPCProfile.from_dict(item)
                 profile.apply_to_npc(npc)
+                game_loop.world.refresh_entity(npc.npc_id)
                 updated.append(npc_id)
             except Exception:
                 pass
@@ -193,9 +195,14 @@ async def import_npc_profiles(request: Request):
 # ── Market API ────────────────────────────────────────────────────────────────
 
 @app.get("/api/market")
-async def get_market():
-    """Return current market state."""
-    market = game_loop.world.market
+async def get_market(resolution: str = "tick", days: int | None = Query(None, alias="range")):
+    """Return current market state plus a price series at `resolution` over the last `range` days."""
+    world = game_loop.world
+    market = world.market
+    try:
+        series = market.history.query(resolution, days, world.time.day)
+    except ValueError as e:
+        return JSONResponse({"ok": False, "error": str(e)}, status_code=400)
     prices = {}
     for item, mp in market.prices.items():
         prices[item] = {
@@ -208,11 +215,45 @@ async def get_market():
         }
     return JSONResponse({
         "prices": prices,
-        "history": {item: list(hist) for item, hist in market.history.items()},
+        "history": market.history.recent(),
+        "series": series,
+        "orders": {"pending": len(market.orders), "last_clearing": market.orders.last_clearing},
         "last_update_tick": market.last_update_tick,
     })
 
 
+# ── Event log API ─────────────────────────────────────────────────────────────
+
+@app.get("/api/events")
+def get_events(
+    since_tick: int | None = None,
+    event_type: str | None = Query(None, alias="type"),
+    actor: str | None = None,
+    cursor: int | None = None,
+    limit: int = 100,
+):
+    """Page through the durable event log (sync: file reads run in the threadpool)."""
+    types = set(event_type.split(",")) if event_type else None
+    limit = max(1, min(limit, config.EVENT_LOG_PAGE_MAX))
+    events, next_cursor = game_loop.rag.event_log.query(since_tick, types, actor, cursor, limit)
+    return JSONResponse({"events": events, "next_cursor": next_cursor})
+
+
+# ── Agent stats API ───────────────────────────────────────────────────────────
+
+@app.get("/api/agent_stats")
+async def get_agent_stats():
+    """Return action-queue amortization / invalidation, command-batch and event-bus counters."""
+    return JSONResponse({
+        "action_queue": game_loop.npc_agent.queue_stats.snapshot(),
+        "commands": game_loop.commands.stats.snapshot(),
+        "events": {
+            **game_loop.event_counts.snapshot(),
+            "subscribers": game_loop.event_bus.stats(),
+        },
+    })
+
+
 # ── Saves API ─────────────────────────────────────────────────────────────────
 
 @app.get("/api/saves")
@@ -222,7 +263,7 @@ async def get_saves():
 
 @app.post("/api/saves/delete")
 async def delete_all_saves():
-    game_loop.rag.delete_all()
+    game_loop.delete_saves()
     return JSONResponse({"ok": True})
 
 
@@ -0,0 +1,410 @@
+"""Durable, append-only log of every dispatched WorldEvent.
+
+Storage layout (under the RAG save directory):
+
+    events/
+        events-000001.ndjson.gz   ← sealed segment, one gzip member per index block
+        events-000001.idx         ← its sparse tick index (JSON)
+        events-000002.ndjson      ← active segment, plain NDJSON (safe to `tail -f`)
+
+One JSON object per line:
+
+    {"seq", "tick", "type", "actor_id", "actor", "x", "y", "summary", "payload"}
+
+`seq` numbers every logged event and doubles as the pagination cursor.  The
+log is an EventBus subscriber: each batch it receives is written at once
+(`write`) from a worker thread, so writers hold `_write_lock`.  The
+active segment is sealed when it reaches EVENT_LOG_SEGMENT_BYTES, when ticks
+go backwards (a restored checkpoint), and at startup for a segment left by the
+previous run; sealing compresses it in a background thread.
+
+Every EVENT_LOG_INDEX_EVERY lines the index records a block: its first tick,
+first seq and byte offset.  Sealed segments compress each block as its own
+gzip member, so `query` seeks to the block holding `since_tick` (or the
+cursor) and decompresses from there — it never loads a whole file.
+"""
+from __future__ import annotations
+
+import bisect
+import gzip
+import json
+import logging
+import os
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Iterator, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_SEGMENT_RE = re.compile(r"^events-(\d{6})\.(ndjson|ndjson\.gz|idx)$")
+_READ_CHUNK = 64 * 1024
+
+
+class _Segment:
+    __slots__ = ("number", "path", "sealed", "blocks", "size",
+                 "first_tick", "last_tick", "first_seq", "last_seq")
+
+    def __init__(self, number: int, path: Path):
+        self.number = number
+        self.path = path
+        self.sealed = False
+        self.blocks: list[list[int]] = []     # [first tick, first seq, byte offset]
+        self.size = 0                         # bytes of `path` covered by `blocks`
+        self.first_tick = self.last_tick = 0
+        self.first_seq = self.last_seq = -1
+
+    def meta(self) -> dict:
+        return {
+            "first_tick": self.first_tick, "last_tick": self.last_tick,
+            "first_seq": self.first_seq, "last_seq": self.last_seq,
+            "size": self.size, "blocks": self.blocks,
+        }
+
+    def view(self) -> "_Segment":
+        """Copy a reader can use without the lock."""
+        snap = _Segment(self.number, self.path)
+        snap.sealed = self.sealed
+        snap.blocks = list(self.blocks)
+        snap.size = self.size
+        snap.first_tick, snap.last_tick = self.first_tick, self.last_tick
+        snap.first_seq, snap.last_seq = self.first_seq, self.last_seq
+        return snap
+
+
+class EventLog:
+    """Writer and reader of the rotated event log; GameLoop subscribes `write` to the EventBus."""
+
+    def __init__(
+        self,
+        directory,
+        segment_bytes: int = config.EVENT_LOG_SEGMENT_BYTES,
+        index_every: int = config.EVENT_LOG_INDEX_EVERY,
+    ):
+        self.dir = Path(directory)
+        self.segment_bytes = segment_bytes
+        self.index_every = index_every
+        self._lock = threading.Lock()          # guards segment metadata (readers run in threads)
+        self._write_lock = threading.RLock()   # serialises writers (subscriber thread vs. clear/close)
+        self._segments: list[_Segment] = []    # oldest first; the last may be active
+        self._active: Optional[_Segment] = None
+        self._fh = None
+        self._pending: list[tuple[int, int, bytes]] = []   # (tick, seq, line) not yet written
+        self._block_lines = 0                  # lines in the active segment's last block
+        self._next_seq = 0
+        self._last_tick: Optional[int] = None
+        self._sealers: list[threading.Thread] = []
+        self._open_existing()
+
+    # ── Writing ───────────────────────────────────────────────────────────────
+
+    def write(self, events: list):
+        """Append a batch of dispatched events and flush it (EventBus subscriber handler)."""
+        with self._write_lock:
+            for event in events:
+                self.append(event)
+            self.flush()
+
+    def append(self, event):
+        """Queue one dispatched (already rendered) WorldEvent; written on the next flush."""
+        if self._last_tick is not None and event.tick < self._last_tick:
+            self.flush()
+            self._rotate()
+        self._last_tick = event.tick
+        seq = self._next_seq
+        self._next_seq += 1
+        record = {
+            "seq": seq,
+            "tick": event.tick,
+            "type": event.event_type.value,
+            "actor_id": event.actor_id,
+            "actor": event.actor_name or None,
+            "x": event.origin_x,
+            "y": event.origin_y,
+            "summary": event.summary,
+            "payload": event.payload,
+        }
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=str) + "\n"
+        self._pending.append((event.tick, seq, line.encode("utf-8")))
+
+    def flush(self):
+        """Write the queued lines, index them, and seal the segment once it is full."""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        if self._active is None:
+            self._start_segment()
+        elif self._fh is None:                 # written to again after close()
+            self._fh = open(self._active.path, "ab")
+        seg = self._active
+        self._fh.write(b"".join(line for _, _, line in pending))
+        self._fh.flush()
+        with self._lock:
+            offset = seg.size
+            for tick, seq, line in pending:
+                if self._block_lines == 0:
+                    seg.blocks.append([tick, seq, offset])
+                    if seg.first_seq < 0:
+                        seg.first_tick, seg.first_seq = tick, seq
+                self._block_lines = (self._block_lines + 1) % self.index_every
+                offset += len(line)
+            seg.size = offset
+            seg.last_tick, seg.last_seq = pending[-1][0], pending[-1][1]
+        if seg.size >= self.segment_bytes:
+            self._rotate()
+
+    def close(self):
+        """Flush and close; the active segment is sealed at the next startup (or reopened by a later write)."""
+        with self._write_lock:
+            self.flush()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            for t in self._sealers:
+                t.join()
+
+    def clear(self):
+        """Delete every segment; numbering and `seq` start over."""
+        with self._write_lock:
+            self.close()
+            with self._lock:
+                self._segments.clear()
+                self._active = None
+            self._pending.clear()
+            self._block_lines = 0
+            self._next_seq = 0
+            self._last_tick = None
+            if self.dir.exists():
+                for p in self.dir.iterdir():
+                    if p.name.startswith("events-"):
+                        p.unlink()
+
+    def _start_segment(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        number = self._segments[-1].number + 1 if self._segments else 1
+        seg = _Segment(number, self._path(number, "ndjson"))
+        self._fh = open(seg.path, "wb")
+        self._block_lines = 0
+        with self._lock:
+            self._segments.append(seg)
+            self._active = seg
+
+    def _rotate(self):
+        seg = self._active
+        if seg is None:
+            return
+        self._fh.close()
+        self._fh = None
+        self._active = None
+        self._sealers = [t for t in self._sealers if t.is_alive()]
+        t = threading.Thread(target=self._seal, args=(seg,), name="event-log-seal", daemon=True)
+        self._sealers.append(t)
+        t.start()
+
+    def _seal(self, seg: _Segment):
+        """Compress a finished plain segment block by block and write its index."""
+        plain = seg.path
+        gz_path = self._path(seg.number, "ndjson.gz")
+        tmp = gz_path.with_name(gz_path.name + ".tmp")
+        try:
+            blocks = []
+            ends = [b[2] for b in seg.blocks[1:]] + [seg.size]
+            with open(plain, "rb") as src, open(tmp, "wb") as dst:
+                for (tick, seq, offset), end in zip(seg.blocks, ends):
+                    src.seek(offset)
+                    blocks.append([tick, seq, dst.tell()])
+                    dst.write(gzip.compress(src.read(end - offset)))
+                size = dst.tell()
+            os.replace(tmp, gz_path)
+            sealed = seg.view()
+            sealed.blocks, sealed.size = blocks, size
+            _write_json(self._path(seg.number, "idx"), sealed.meta())
+            with self._lock:
+                seg.path, seg.blocks, seg.size, seg.sealed = gz_path, blocks, size, True
+            plain.unlink()
+            self._enforce_retention()
+        except OSError as e:
+            logger.warning(f"Event log: failed to seal {plain}: {e}")
+
+    def _enforce_retention(self):
+        keep = config.EVENT_LOG_KEEP_SEGMENTS
+        if keep <= 0:
+            return
+        with self._lock:
+            sealed = [s for s in self._segments if s.sealed]
+            drop = sealed[:-keep] if len(sealed) > keep else []
+            for seg in drop:
+                self._segments.remove(seg)
+        for seg in drop:
+            for ext in ("ndjson.gz", "idx"):
+                p = self._path(seg.number, ext)
+                if p.exists():
+                    p.unlink()
+
+    # ── Startup ───────────────────────────────────────────────────────────────
+
+    def _open_existing(self):
+        if not self.dir.exists():
+            return
+        found: dict[int, set] = {}
+        for p in self.dir.iterdir():
+            if p.name.endswith(".tmp"):
+                p.unlink()              # interrupted seal; the plain segment is still there
+                continue
+            m = _SEGMENT_RE.match(p.name)
+            if m:
+                found.setdefault(int(m.group(1)), set()).add(m.group(2))
+        for number in sorted(found):
+            kinds = found[number]
+            if "idx" in kinds and "ndjson.gz" in kinds:
+                seg = _Segment(number, self._path(number, "ndjson.gz"))
+                with open(self._path(number, "idx"), "r", encoding="utf-8") as f:
+                    meta = json.load(f)
+                for key, value in meta.items():
+                    setattr(seg, key, value)
+                seg.sealed = True
+                if "ndjson" in kinds:
+                    self._path(number, "ndjson").unlink()   # sealed before the last shutdown
+            elif "ndjson" in kinds:
+                seg = self._index_plain(number)
+                if seg is None:
+                    continue
+                self._seal(seg)
+            else:
+                logger.warning(f"Event log: segment {number} has no index; skipped")
+                continue
+            self._segments.append(seg)
+        if self._segments:
+            self._next_seq = self._segments[-1].last_seq + 1
+
+    def _index_plain(self, number: int) -> Optional[_Segment]:
+        """Rebuild the block index of a plain segment left by a previous run."""
+        seg = _Segment(number, self._path(number, "ndjson"))
+        offset = 0
+        with open(seg.path, "rb") as f:
+            for i, line in enumerate(f):
+                if not line.endswith(b"\n"):
+                    break                  # torn last line of a crashed run
+                rec = json.loads(line)
+                if i % self.index_every == 0:
+                    seg.blocks.append([rec["tick"], rec["seq"], offset])
+                if seg.first_seq < 0:
+                    seg.first_tick, seg.first_seq = rec["tick"], rec["seq"]
+                seg.last_tick, seg.last_seq = rec["tick"], rec["seq"]
+                offset += len(line)
+        seg.size = offset
+        if not seg.blocks:
+            seg.path.unlink()
+            return None
+        return seg
+
+    def _path(self, number: int, ext: str) -> Path:
+        return self.dir / f"events-{number:06d}.{ext}"
+
+    # ── Reading ───────────────────────────────────────────────────────────────
+
+    def query(
+        self,
+        since_tick: Optional[int] = None,
+        types=None,
+        actor_id: Optional[str] = None,
+        after_seq: Optional[int] = None,
+        limit: int = 100,
+    ) -> tuple[list[dict], Optional[int]]:
+        """Up to `limit` logged events after `after_seq` from `since_tick` on, filtered by type / actor.
+
+        Returns (events, next cursor); the cursor is None once the log is exhausted.
+        Events still buffered for the current tick are not visible yet.
+        """
+        for _ in range(3):
+            with self._lock:
+                segments = [s.view() for s in self._segments if s.first_seq >= 0]
+            try:
+                return self._query(segments, since_tick, types, actor_id, after_seq, limit)
+            except FileNotFoundError:
+                continue                   # a segment was sealed under us; re-read the index
+        return [], after_seq
+
+    def _query(self, segments, since_tick, types, actor_id, after_seq, limit):
+        out: list[dict] = []
+        for seg in segments:
+            if since_tick is not None and seg.last_tick < since_tick:
+                continue
+            if after_seq is not None and seg.last_seq <= after_seq:
+                continue
+            for line in self._lines(seg, self._start_block(seg, since_tick, after_seq)):
+                rec = json.loads(line)
+                if after_seq is not None and rec["seq"] <= after_seq:
+                    continue
+                if since_tick is not None and rec["tick"] < since_tick:
+                    continue
+                if types is not None and rec["type"] not in types:
+                    continue
+                if actor_id is not None and rec["actor_id"] != actor_id:
+                    continue
+                out.append(rec)
+                if len(out) >= limit:
+                    return out, rec["seq"]
+        return out, None
+
+    @staticmethod
+    def _start_block(seg: _Segment, since_tick, after_seq) -> int:
+        start = 0
+        if since_tick is not None:
+            start = bisect.bisect_left([b[0] for b in seg.blocks], since_tick) - 1
+        if after_seq is not None:
+            start = max(start, bisect.bisect_right([b[1] for b in seg.blocks], after_seq + 1) - 1)
+        return max(start, 0)
+
+    def _lines(self, seg: _Segment, block: int) -> Iterator[bytes]:
+        offset = seg.blocks[block][2]
+        with open(seg.path, "rb") as f:
+            f.seek(offset)
+            if not seg.sealed:
+                while offset < seg.size:
+                    line = f.readline()
+                    offset += len(line)
+                    yield line
+                return
+            yield from _gzip_lines(f)
+
+    def stats(self) -> dict:
+        with self._lock:
+            segments = [s for s in self._segments if s.first_seq >= 0]
+            return {
+                "segments": len(segments),
+                "events": sum(s.last_seq - s.first_seq + 1 for s in segments),
+                "bytes": sum(s.size for s in segments),
+                "first_tick": segments[0].first_tick if segments else None,
+                "last_tick": segments[-1].last_tick if segments else None,
+            }
+
+
+def _gzip_lines(f) -> Iterator[bytes]:
+    """Lines of consecutive gzip members, read from the current position of `f`."""
+    d = zlib.decompressobj(wbits=31)
+    buf = b""
+    while True:
+        data = f.read(_READ_CHUNK)
+        if not data:
+            break
+        while data:
+            buf += d.decompress(data)
+            if d.eof:
+                data = d.unused_data
+                d = zlib.decompressobj(wbits=31)
+            else:
+                data = b""
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                yield line + b"\n"
+
+
+def _write_json(path: Path, obj):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f)
+    os.replace(tmp, path)
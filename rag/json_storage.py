@@ -7,7 +7,7 @@ Storage layout:
             npc_sui.json
             ...
         world_state.json      ← latest game state snapshot
-        events.json           ← recent global events log
+        events/               ← durable world event log (see rag/event_log.py)
 """
 from __future__ import annotations
 
@@ -18,6 +18,7 @@ from pathlib import Path
 
 import config
 from rag.base import BaseRAGStorage
+from rag.event_log import EventLog
 from rag.records import MemoryRecord
 
 logger = logging.getLogger(__name__)
@@ -31,7 +32,7 @@ class JSONRAGStorage(BaseRAGStorage):
         self._mem_dir = self._root / "memories"
         self._mem_dir.mkdir(parents=True, exist_ok=True)
         self._state_path = self._root / "world_state.json"
-        self._events_path = self._root / "events.json"
+        self.event_log = EventLog(self._root / "events")
 
     # ── Internal helpers ───────────────────────────────────────────────────────
 
@@ -125,8 +126,7 @@ class JSONRAGStorage(BaseRAGStorage):
             self._mem_dir.mkdir(parents=True, exist_ok=True)
         if self._state_path.exists():
             self._state_path.unlink()
-        if self._events_path.exists():
-            self._events_path.unlink()
+        self.event_log.clear()
         logger.info("RAG: all saves deleted")
 
     # ── Metadata ───────────────────────────────────────────────────────────────
@@ -135,6 +135,7 @@ class JSONRAGStorage(BaseRAGStorage):
         info: dict = {
             "has_game_state": self._state_path.exists(),
             "npc_memories": {},
+            "event_log": self.event_log.stats(),
         }
         if self._mem_dir.exists():
             for p in self._mem_dir.glob("*.json"):
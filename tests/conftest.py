@@ -0,0 +1,23 @@
+"""Shared pytest setup: import the backend from the repo root, keep saves out of it."""
+from __future__ import annotations
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_saves(tmp_path, monkeypatch):
+    """Point every save location at a temp dir and disable on-disk logs and checkpoints."""
+    monkeypatch.setattr(config, "RAG_SAVE_DIR", str(tmp_path / "saves"))
+    monkeypatch.setattr(config, "CHUNK_SAVE_DIR", str(tmp_path / "chunks"))
+    monkeypatch.setattr(config, "ACTION_LOG_ENABLED", False)
+    monkeypatch.setattr(config, "EVENT_LOG_ENABLED", False)
+    monkeypatch.setattr(config, "CHECKPOINT_ENABLED", False)
+    monkeypatch.setattr(config, "CHECKPOINT_RESTORE", False)
+    return tmp_path
@@ -0,0 +1,94 @@
+"""The running market counters must always equal a full recount (engine/market.py)."""
+from __future__ import annotations
+
+import asyncio
+
+import config
+from engine.market import verify_ledger
+from engine.world import ResourceType, TileType, create_world
+from engine.world_manager import WorldManager
+from game.events import EventBus
+
+
+def _world():
+    world = create_world(seed=7, chunk_dir=config.CHUNK_SAVE_DIR)
+    return world, WorldManager(EventBus())
+
+
+def _resource_tile(world, rtype: ResourceType):
+    for tile in world.iter_tiles():
+        res = tile.resource
+        if res and res.resource_type == rtype and res.quantity >= 2 and tile.tile_type != TileType.TOWN:
+            return tile
+    raise AssertionError(f"no {rtype.value} tile")
+
+
+def test_every_action_kind_keeps_ledger_consistent():
+    world, wm = _world()
+    a, b = world.npcs[:2]
+    assert verify_ledger(world) == []
+
+    # gather
+    tile = _resource_tile(world, ResourceType.WOOD)
+    world.move_npc(a, tile.x, tile.y)
+    wood = a.inventory.wood
+    wm.apply_npc_action(a, {"action": "gather"}, world)
+    assert a.inventory.wood > wood
+    assert verify_ledger(world) == []
+
+    # craft
+    a.inventory.set("wood", a.inventory.wood + 2)
+    wm.apply_npc_action(a, {"action": "craft", "craft_item": "rope"}, world)
+    assert a.inventory.get("rope") >= 1
+    assert verify_ledger(world) == []
+
+    # sell and buy at the exchange: orders take escrow, the tick clears them
+    world.move_npc(a, config.EXCHANGE_X, config.EXCHANGE_Y)
+    world.move_npc(b, config.EXCHANGE_X, config.EXCHANGE_Y)
+    b.inventory.gold += 50
+    wm.apply_npc_action(a, {"action": "sell", "sell_item": "wood", "sell_qty": 1}, world)
+    wm.apply_npc_action(b, {"action": "buy", "buy_item": "wood", "buy_qty": 1}, world)
+    assert verify_ledger(world) == []
+    wm.tick(world)
+    assert verify_ledger(world) == []
+
+    # direct trade, then propose / accept
+    a.inventory.set("wood", a.inventory.wood + 2)
+    b.inventory.set("food", b.inventory.food + 2)
+    wood, food = a.inventory.wood, a.inventory.food
+    trade = {"target_id": b.npc_id, "offer_item": "wood", "offer_qty": 1,
+             "request_item": "food", "request_qty": 1}
+    wm.apply_npc_action(a, {"action": "trade", **trade}, world)
+    assert (a.inventory.wood, a.inventory.food) == (wood - 1, food + 1)
+    assert verify_ledger(world) == []
+    wm.apply_npc_action(a, {"action": "propose_trade", **trade}, world)
+    wm.apply_npc_action(b, {"action": "accept_trade", "proposal_from": a.npc_id}, world)
+    assert (a.inventory.wood, a.inventory.food) == (wood - 2, food + 2)
+    assert verify_ledger(world) == []
+
+    # regrowth of the tile gathered above
+    depleted = tile.resource.quantity
+    for _ in range(30):
+        wm.tick(world)
+    assert tile.resource.quantity > depleted
+    assert verify_ledger(world) == []
+
+    # god spawn on a plain tile
+    spot = next(t for t in world.iter_tiles() if t.tile_type == TileType.GRASS and not t.resource)
+    wm.apply_god_action({"action": "spawn_resource", "resource_type": "stone",
+                         "x": spot.x, "y": spot.y, "quantity": 4}, world)
+    assert spot.resource and spot.resource.quantity == 4
+    assert verify_ledger(world) == []
+
+
+def test_headless_rules_run_keeps_ledger_consistent(monkeypatch):
+    # update_market raises as soon as the counters drift from a recount
+    monkeypatch.setattr(config, "MARKET_CHECK_LEDGER", True)
+    from game.headless import HeadlessRunner
+    from game.loop import GameLoop
+
+    game = GameLoop()
+    runner = HeadlessRunner(game, "rules", seed=1)
+    stats = asyncio.run(runner.run(240))
+    assert stats.ticks == 240 and stats.decisions > 0
+    assert verify_ledger(game.world) == []
@@ -0,0 +1,87 @@
+"""Memory benchmark for the hot world objects.
+
+Measures (with tracemalloc) the heap cost of:
+  - the Tile views of a 256×256 map (one 256×256 TileStore),
+  - 100k Inventory objects,
+  - 100k WorldEvent objects (a typical long event history),
+  - 100k tile.resource views held at once.
+
+Usage:
+    python tools/bench_memory.py [--size N] [--count N]
+"""
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from engine.tilestore import TileStore  # noqa: E402
+from engine.world import Inventory, Resource, ResourceType, make_tiles  # noqa: E402
+from game.events import EventType, WorldEvent  # noqa: E402
+
+
+def measure(build) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, obj
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=256, help="map side for the tile views")
+    parser.add_argument("--count", type=int, default=100_000, help="objects per category")
+    args = parser.parse_args()
+    n = args.count
+
+    store = TileStore(args.size, args.size)
+    for y in range(0, args.size, 3):
+        for x in range(0, args.size, 2):
+            store.set_resource(x, y, 0, 5, 10)
+
+    def tiles():
+        return make_tiles(store)
+
+    def inventories():
+        return [Inventory() for _ in range(n)]
+
+    def events():
+        return [
+            WorldEvent(EventType.NPC_GATHERED, tick=i, actor_id="npc_he",
+                       origin_x=i % 20, origin_y=i % 17,
+                       payload={"resource": "wood", "amount": 2})
+            for i in range(n)
+        ]
+
+    grid = make_tiles(store)
+    flat = [t for row in grid for t in row if t.resource][:n]
+
+    def resource_views():
+        return [t.resource for t in flat]
+
+    def detached_resources():
+        return [Resource(ResourceType.WOOD, 5, 10) for _ in range(n)]
+
+    rows = [
+        (f"Tile views ({args.size}×{args.size})", tiles, args.size * args.size),
+        (f"Inventory ×{n}", inventories, n),
+        (f"WorldEvent ×{n}", events, n),
+        (f"tile.resource views ×{len(flat)}", resource_views, len(flat)),
+        (f"Resource ×{n}", detached_resources, n),
+    ]
+    print(f"{'object':<34}{'total':>12}{'per object':>14}")
+    for label, build, count in rows:
+        size, keep = measure(build)
+        print(f"{label:<34}{size / 1e6:>10.2f} MB{size / max(count, 1):>12.1f} B")
+        del keep
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""World generation benchmark.
+
+Times the vectorized noise generator (engine/worldgen.py) on whole maps of
+64², 256² and 1024² tiles, both as one bulk call and chunk by chunk the way
+ChunkStore generates large worlds, next to the classic per-tile generator
+(a port of the 20×20 village cluster / resource loops scaled to the same
+density) for comparison.
+
+Usage:
+    python tools/bench_worldgen.py [--seed N] [--repeat N] [--skip-classic]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import config  # noqa: E402
+from engine.tilestore import TileStore  # noqa: E402
+from engine.world import (  # noqa: E402
+    TileType, _place_cluster, _place_food, _seed_resources, make_tiles,
+)
+from engine.worldgen import generate_chunk, generate_layers  # noqa: E402
+
+SIZES = (64, 256, 1024)
+
+
+def classic_generate(seed: int, size: int):
+    """Per-tile Python generation at the classic village densities."""
+    rng = random.Random(seed)
+    store = TileStore(size, size)
+    tiles = make_tiles(store)
+    density = size * size / 400
+    for _ in range(round(4 * density)):
+        _place_cluster(tiles, size, size, TileType.ROCK,
+                       rng.randrange(size), rng.randrange(size), rng.randint(2, 3))
+    for _ in range(round(8 * density)):
+        _place_cluster(tiles, size, size, TileType.FOREST,
+                       rng.randrange(size), rng.randrange(size), rng.randint(1, 3))
+    _seed_resources(tiles, rng)
+    _place_food(tiles, size, size, round(10 * density), rng)
+
+
+def bulk_generate(seed: int, size: int):
+    generate_layers(seed, 0, 0, size, size)
+
+
+def chunked_generate(seed: int, size: int):
+    cs = config.CHUNK_SIZE
+    for cy in range(0, size, cs):
+        for cx in range(0, size, cs):
+            store = TileStore(min(cs, size - cx), min(cs, size - cy), cx, cy)
+            generate_chunk(seed, store, [], (cx // cs, cy // cs))
+
+
+def best_of(fn, seed: int, size: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(seed, size)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-classic", action="store_true",
+                        help="skip the slow per-tile generator (dominates at 1024²)")
+    args = parser.parse_args()
+
+    variants = [("noise (bulk)", bulk_generate), ("noise (chunked)", chunked_generate)]
+    if not args.skip_classic:
+        variants.append(("classic per-tile", classic_generate))
+
+    print(f"{'map':>10}  " + "  ".join(f"{name:>18}" for name, _ in variants))
+    for size in SIZES:
+        cells = []
+        for _, fn in variants:
+            repeat = 1 if fn is classic_generate else args.repeat
+            cells.append(f"{best_of(fn, args.seed, size, repeat) * 1000:>15.1f} ms")
+        print(f"{size:>5}×{size:<4}  " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
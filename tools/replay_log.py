@@ -0,0 +1,48 @@
+"""Replay an action log and print the rebuilt world.
+
+Rebuilds the world recorded in a session log (saves/actions/*.alog) up to a
+given tick and reports how fast the replay ran, followed by the NPC,
+player and market state at that tick.
+
+Usage:
+    python tools/replay_log.py saves/actions/session_20250101_120000.alog [--tick N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from engine.replay import replay  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log", help="action log file")
+    parser.add_argument("--tick", type=int, default=None, help="stop after this tick (default: end)")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    result = replay(args.log, until_tick=args.tick)
+    elapsed = time.perf_counter() - t0
+    world = result.world
+
+    print(f"replayed {result.records} records / {result.ticks} ticks in {elapsed * 1000:.1f} ms "
+          f"({result.ticks / max(elapsed, 1e-9):,.0f} ticks/s)"
+          + (f", {result.skipped} skipped" if result.skipped else ""))
+    print(f"tick {world.time.tick}  {world.time.time_str}  weather={world.weather.value}")
+    for npc in world.npcs:
+        inv = {k: v for k, v in npc.inventory.to_dict().items() if v}
+        print(f"  {npc.name:<4} ({npc.x:>3},{npc.y:>3}) energy={npc.energy:<3} {inv}")
+    if world.player:
+        p = world.player
+        print(f"  [player] {p.name} ({p.x},{p.y}) energy={p.energy}")
+    prices = "  ".join(f"{item}={mp.current:.2f}" for item, mp in world.market.prices.items())
+    print(f"  market: {prices}")
+
+
+if __name__ == "__main__":
+    main()
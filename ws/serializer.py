@@ -40,7 +40,7 @@ class WorldSerializer:
             "time": self._serialize_time(world),
             "weather": world.weather.value,
             "tiles": self._serialize_tiles(world),
-            "npcs": [self._serialize_npc(npc) for npc in world.npcs],
+            "npcs": [self._serialize_npc(npc, world) for npc in world.npcs],
             "god": self._serialize_god(world),
             "events": [e.to_dict(world) for e in (events or [])],
             "token_usage": token_tracker.snapshot(),
@@ -57,30 +57,30 @@ class WorldSerializer:
         return snapshot
 
     def _serialize_tiles(self, world: World) -> list[dict]:
+        """Tiles of every loaded chunk (the whole map for single-chunk worlds)."""
         result = []
-        for row in world.tiles:
-            for tile in row:
-                t: dict = {
-                    "x": tile.x,
-                    "y": tile.y,
-                    "t": _TILE_LETTER.get(tile.tile_type, "g"),
-                }
-                if tile.resource and tile.resource.quantity > 0:
-                    t["r"] = _RESOURCE_LETTER.get(tile.resource.resource_type, "?")
-                    t["q"] = tile.resource.quantity
-                    t["mq"] = tile.resource.max_quantity
-                if tile.npc_ids:
-                    t["n"] = tile.npc_ids
-                if tile.is_exchange:
-                    t["e"] = 1
-                if tile.player_here:
-                    t["p"] = 1
-                if tile.furniture:
-                    t["f"] = tile.furniture
-                result.append(t)
+        for tile in world.iter_tiles():
+            t: dict = {
+                "x": tile.x,
+                "y": tile.y,
+                "t": _TILE_LETTER.get(tile.tile_type, "g"),
+            }
+            if tile.resource and tile.resource.quantity > 0:
+                t["r"] = _RESOURCE_LETTER.get(tile.resource.resource_type, "?")
+                t["q"] = tile.resource.quantity
+                t["mq"] = tile.resource.max_quantity
+            if tile.npc_ids:
+                t["n"] = tile.npc_ids
+            if tile.is_exchange:
+                t["e"] = 1
+            if tile.player_here:
+                t["p"] = 1
+            if tile.furniture:
+                t["f"] = tile.furniture
+            result.append(t)
         return result
 
-    def _serialize_npc(self, npc) -> dict:
+    def _serialize_npc(self, npc, world) -> dict:
         d: dict = {
             "id": npc.npc_id,
             "name": npc.name,
@@ -96,13 +96,14 @@ class WorldSerializer:
             "equipped": getattr(npc, "equipped", None),
             "inv_count": npc.inventory.total_items(),
             "inv_max": config.INVENTORY_MAX_SLOTS,
-            "pending_proposals": len(getattr(npc, "pending_proposals", [])),
+            "pending_proposals": world.proposals.count(npc.npc_id),
             # Hierarchical decision-making state (Level-1 strategic layer)
             "goal": getattr(npc, "goal", ""),
             "plan": list(getattr(npc, "plan", [])),
             # Emotional state & observation feedback
             "mood": getattr(npc, "mood", ""),
             "last_action_result": getattr(npc, "last_action_result", ""),
+            "macro": npc.macro["action"] if npc.macro else None,
         }
         # Conditionally include inner thought
         if config.SHOW_NPC_THOUGHTS and getattr(npc, "last_thought", ""):
@@ -168,7 +169,7 @@ class WorldSerializer:
             }
         return {
             "prices": prices,
-            "history": {item: list(hist) for item, hist in market.history.items()},
+            "history": market.history.recent(),
             "last_update_tick": market.last_update_tick,
         }
 